@@ -0,0 +1,20 @@
+# app_paths.py
+import os
+from PyQt6.QtCore import QCoreApplication, QStandardPaths
+
+APP_NAME = "automatyzer"
+
+def set_application_name():
+    """
+    Ustawia wspólną nazwę aplikacji, a z nią folder danych (dziennik kolejki, indeks czcionek, pamięć podręczna ffprobe),
+    dzięki czemu GUI i tryb wiersza poleceń korzystają z tych samych plików. Wywoływane po utworzeniu aplikacji Qt.
+    Wcześniej nazwa pochodziła od pliku startowego - dawny folder jest przenoszony, jeśli nowego jeszcze nie ma.
+    """
+    legacy_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppLocalDataLocation)
+    QCoreApplication.setApplicationName(APP_NAME)
+    data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppLocalDataLocation)
+    if legacy_dir != data_dir and os.path.isdir(legacy_dir) and not os.path.exists(data_dir):
+        try:
+            os.rename(legacy_dir, data_dir)
+        except OSError:
+            pass
@@ -0,0 +1,66 @@
+# ass_fonts.py
+# Odczyt nazw czcionek używanych przez napisy ASS - bez zależności od Qt
+import codecs
+import re
+
+_OVERRIDE_BLOCK = re.compile(r"\{[^}]*\}")
+_FONT_OVERRIDE = re.compile(r"\\fn\s*([^\\}]*)")
+
+def _decode(data):
+    for bom, encoding in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if data.startswith(bom):
+            return data.decode(encoding, errors="replace")
+    return data.decode("utf-8", errors="replace")
+
+
+def font_display_name(name):
+    # "@" na początku to wariant pionowy tej samej czcionki (libass szuka czcionki bez tego znaku)
+    return name.strip().lstrip("@").strip()
+
+
+def normalize_font_name(name):
+    return font_display_name(name).casefold()
+
+
+def referenced_fonts(subtitle_path):
+    """
+    Słownik {znormalizowana nazwa: nazwa z pliku} czcionek z linii Style: oraz znaczników \\fn w dialogach.
+    Zwraca None, gdy pliku nie da się odczytać albo nie zawiera stylów - wtedy nie wiadomo, których czcionek potrzebuje.
+    """
+    try:
+        with open(subtitle_path, "rb") as subtitle_file:
+            text = _decode(subtitle_file.read())
+    except OSError:
+        return None
+
+    fonts, styles_found = {}, False
+    section, fontname_column, text_column = "", 1, 9
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("[") and line.endswith("]"):
+            section = line.lower()
+            continue
+        key, separator, value = line.partition(":")
+        if not separator:
+            continue
+        key = key.strip().lower()
+        if key == "format":
+            columns = [column.strip().lower() for column in value.split(",")]
+            if "styles" in section and "fontname" in columns:
+                fontname_column = columns.index("fontname")
+            elif section == "[events]" and "text" in columns:
+                text_column = columns.index("text")
+        elif key == "style":
+            fields = value.split(",")
+            if len(fields) > fontname_column:
+                styles_found = True
+                fonts.setdefault(normalize_font_name(fields[fontname_column]), font_display_name(fields[fontname_column]))
+        elif key == "dialogue" and "\\fn" in value:
+            # Tekst to ostatnia kolumna i może zawierać przecinki
+            fields = value.split(",", text_column)
+            if len(fields) > text_column:
+                for block in _OVERRIDE_BLOCK.findall(fields[text_column]):
+                    for name in _FONT_OVERRIDE.findall(block):
+                        fonts.setdefault(normalize_font_name(name), font_display_name(name))
+    fonts.pop("", None)
+    return fonts if styles_found else None
@@ -0,0 +1,171 @@
+# automatyzer.py
+# Tryb bez interfejsu graficznego: python -m automatyzer run zadania.txt --jobs N
+# Zdarzenia kolejki wypisywane są na stdout jako JSON Lines, a wyjście narzędzi (z --verbose) na stderr.
+import argparse
+import json
+import signal
+import sys
+import time
+from PyQt6.QtCore import QCoreApplication, QSettings, QTimer
+
+from app_paths import set_application_name
+from process_manager import ProcessManager, DEFAULT_RESOURCE_BUDGETS
+from task_manager import TaskManager
+from task_file import parse_task_lines, batch_task_kwargs, batch_task_groups
+from task_manifest import is_manifest, iter_manifest_tasks
+from presets import load_preset
+
+EXIT_OK, EXIT_FAILED, EXIT_INVALID, EXIT_INTERRUPTED = 0, 1, 2, 130
+PROGRESS_INTERVAL = 1.0 # Najwyżej jedno zdarzenie postępu na sekundę dla każdego zadania
+
+class EventWriter:
+    """Wypisuje zdarzenia jako pojedyncze linie JSON, od razu opróżniając bufor (czytelne przez potok i SSH)."""
+    def __init__(self, stream):
+        self.stream = stream
+
+    def emit(self, event, **fields):
+        self.stream.write(json.dumps({"event": event, "time": round(time.time(), 3), **fields}, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+class ConsoleOutput:
+    """Zamiennik okna logu dla ProcessManagera: komunikaty >>> to zdarzenia, wyjście narzędzi trafia na stderr."""
+    def __init__(self, events, verbose=False):
+        self.events = events
+        self.verbose = verbose
+
+    def append(self, text):
+        self.events.emit("log", message=text.removeprefix(">>> "))
+
+    def write(self, text, channel=None):
+        if not self.verbose:
+            return
+        prefix = f"[{channel}] " if channel else ""
+        for line in text.replace("\r", "\n").splitlines():
+            if line.strip():
+                sys.stderr.write(prefix + line + "\n")
+        sys.stderr.flush()
+
+    def clear(self):
+        pass
+
+
+def _task_fields(task):
+    return {"id": task.task_id, "file": str(task.mkv_file) if task.mkv_file else None}
+
+
+def run_queue(args, events):
+    settings = QSettings("settings.ini", QSettings.Format.IniFormat)
+    if is_manifest(args.tasks_file):
+        fatal_errors = []
+        tasks_to_process = list(iter_manifest_tasks(args.tasks_file, fatal_errors, lambda name: load_preset(settings, name)))
+    else:
+        try:
+            with open(args.tasks_file, 'r', encoding='utf-8') as f:
+                tasks_to_process, fatal_errors = parse_task_lines(f)
+        except (OSError, UnicodeDecodeError) as e:
+            events.emit("error", message=f"Nie udało się otworzyć pliku: {e}")
+            return EXIT_INVALID
+
+    if fatal_errors:
+        events.emit("error", message="Wystąpiły krytyczne błędy uniemożliwiające import.", details=fatal_errors)
+        return EXIT_INVALID
+
+    app = QCoreApplication([sys.argv[0]])
+    set_application_name()
+
+    task_manager = TaskManager(None, None, None)
+    process_manager = ProcessManager(task_manager, ConsoleOutput(events, args.verbose), None)
+    task_manager.process_manager = process_manager
+
+    # Domyślne wartości pochodzą z ustawień GUI, a opcje wiersza poleceń mają pierwszeństwo
+    process_manager.single_pass_remux_hardsub = args.single_pass or settings.value("processing/single_pass_remux_hardsub", False, type=bool)
+    process_manager.segment_count = args.segments if args.segments is not None else settings.value("processing/segment_count", 1, type=int)
+    process_manager.skip_up_to_date = not args.force and settings.value("processing/skip_up_to_date", True, type=bool)
+    process_manager.attach_used_fonts_only = settings.value("processing/attach_used_fonts_only", True, type=bool)
+    process_manager.resource_budgets.update({
+        resource_class: max(1, settings.value(f"processing/budget_{resource_class}", default, type=int))
+        for resource_class, default in DEFAULT_RESOURCE_BUDGETS.items()
+    })
+    process_manager.max_parallel_jobs = max(1, args.jobs if args.jobs is not None else settings.value("processing/max_parallel_jobs", 1, type=int))
+
+    subtitle_track_name = args.track_name if args.track_name is not None else settings.value("remux/subtitle_track_name", "")
+    for priority, group in batch_task_groups(tasks_to_process):
+        tasks = task_manager.add_tasks([batch_task_kwargs(task_data[:-1], subtitle_track_name) for task_data in group], priority)
+        for task, task_data in zip(tasks, group):
+            events.emit("task_queued", **_task_fields(task), script=task.selected_script, warnings=task_data[-1])
+
+    results = {"succeeded": 0, "failed": 0}
+    started_at = time.monotonic()
+    last_progress = {}
+
+    def on_progress(task, fraction, eta):
+        now = time.monotonic()
+        if fraction < 1.0 and now - last_progress.get(task.task_id, 0) < PROGRESS_INTERVAL:
+            return
+        last_progress[task.task_id] = now
+        events.emit("task_progress", **_task_fields(task), status=task.status, progress=round(fraction, 4), eta=eta if eta >= 0 else None)
+
+    def on_finished(task, success):
+        last_progress.pop(task.task_id, None)
+        results["succeeded" if success else "failed"] += 1
+        fields = {} if success else {"status": task.status}
+        events.emit("task_finished", **_task_fields(task), success=success, **fields)
+
+    def on_queue_finished():
+        events.emit("queue_finished", **results, elapsed=round(time.monotonic() - started_at, 1))
+        app.exit(EXIT_FAILED if results["failed"] else EXIT_OK)
+
+    def on_interrupt(*_):
+        process_manager.kill_process()
+        events.emit("interrupted", **results)
+        app.exit(EXIT_INTERRUPTED)
+
+    process_manager.task_started.connect(lambda task: events.emit("task_started", **_task_fields(task)))
+    process_manager.task_progress.connect(on_progress)
+    process_manager.task_finished.connect(on_finished)
+    process_manager.log_message.connect(lambda message: events.emit("warning", message=message))
+    process_manager.queue_finished.connect(on_queue_finished)
+
+    signal.signal(signal.SIGINT, on_interrupt)
+    signal.signal(signal.SIGTERM, on_interrupt)
+    # Pętla Qt nie oddaje sterowania interpreterowi, więc bez tego sygnały byłyby obsłużone dopiero po kolejnym zdarzeniu
+    signal_timer = QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(200)
+
+    # Start dopiero w pętli zdarzeń - zadania kończące się od razu (np. aktualne) mogą już zamknąć aplikację
+    QTimer.singleShot(0, process_manager.process_next_task if tasks else on_queue_finished)
+    result = app.exec()
+    process_manager.kill_process()
+    process_manager.shutdown()
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="automatyzer", description="Automatyzer - przetwarzanie kolejki zadań bez interfejsu graficznego.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Wykonuje zadania z pliku TXT (format jak przy imporcie w GUI).")
+    run.add_argument("tasks_file", help="Plik TXT z zadaniami albo manifest .json/.jsonl/.toml")
+    run.add_argument("-j", "--jobs", type=int, help="Liczba zadań wykonywanych równolegle (domyślnie z settings.ini)")
+    run.add_argument("--segments", type=int, help="Liczba segmentów kodowania CPU jednego pliku")
+    run.add_argument("--single-pass", action="store_true", help="Remux i hardsub w jednym przebiegu")
+    run.add_argument("--track-name", help="Nazwa ścieżki napisów przy remuksie")
+    run.add_argument("--force", action="store_true", help="Nie pomijaj zadań, których wynik jest aktualny")
+    run.add_argument("-v", "--verbose", action="store_true", help="Wypisuj wyjście FFmpeg i mkvmerge na stderr")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    events = EventWriter(sys.stdout)
+    # stdout należy wyłącznie do zdarzeń JSON - pozostałe komunikaty (np. print w trybie debugowania) idą na stderr
+    sys.stdout = sys.stderr
+    if args.command == "run":
+        return run_queue(args, events)
+    return EXIT_INVALID
+
+
+if __name__ == "__main__":
+    sys.exit(main())
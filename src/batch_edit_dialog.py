@@ -1,60 +1,282 @@
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QDialogButtonBox, QLineEdit, QPushButton, 
     QFileDialog, QComboBox, QSpinBox, QCheckBox, QWidget, QHBoxLayout, QSplitter,
-    QListWidget, QListWidgetItem, QFormLayout, QMessageBox
+    QListView, QFormLayout, QMessageBox, QLabel, QToolButton, QAbstractItemView
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QAbstractListModel, QModelIndex, pyqtSignal, pyqtSlot
 from PyQt6.QtGui import QIcon
 from pathlib import Path
-from dataclasses import make_dataclass, astuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import make_dataclass, fields
+from itertools import islice
+from media_probe import get_probe_service
+from task_file import PathChecker, task_warnings
 
 # Zaktualizowana struktura danych, zawiera teraz listę ostrzeżeń
-TaskData = make_dataclass("TaskData", ["mkv", "sub", "font", "script", "ffmpeg", "bitrate", "debug", "intro", "output", "warnings"])
+TaskData = make_dataclass("TaskData", ["mkv", "sub", "font", "script", "ffmpeg", "bitrate", "debug", "intro", "output", "options", "warnings"])
+TASK_DATA_FIELDS = [f.name for f in fields(TaskData)]
+
+class TaskValidator(QObject):
+    """
+    Sprawdza istnienie plików zadań w puli wątków, aby import z udziału sieciowego nie blokował okna.
+    Wyniki os.stat są wspólne dla wszystkich zadań (PathChecker), a każdy wynik trafia do wątku GUI osobno, zaraz po sprawdzeniu.
+    """
+    validated = pyqtSignal(int, int, list) # indeks zadania, numer sprawdzenia, ostrzeżenia
+    _result_ready = pyqtSignal(int, int, object)
+
+    def __init__(self, max_workers=8, parent=None):
+        super().__init__(parent)
+        self._checker = PathChecker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="validate")
+        self._closed = False
+        self._result_ready.connect(self._deliver)
+
+    def validate(self, index, task, generation=0):
+        future = self._executor.submit(task_warnings, task.mkv, task.sub, task.font, task.script, task.intro, self._checker)
+        future.add_done_callback(lambda f: self._emit(index, generation, f))
+
+    def _emit(self, index, generation, future):
+        if self._closed or future.cancelled():
+            return
+        self._result_ready.emit(index, generation, future.result())
+
+    @pyqtSlot(int, int, object)
+    def _deliver(self, index, generation, warnings):
+        if not self._closed:
+            self.validated.emit(index, generation, warnings)
+
+    def shutdown(self):
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class BatchTaskModel(QAbstractListModel):
+    """
+    Lista importowanych zadań dla QListView. Zadania pobierane są ze źródeł (generatorów) partiami, gdy widok
+    dochodzi do końca listy (canFetchMore/fetchMore), więc nawet bardzo długi plik otwiera się od razu.
+    """
+    FETCH_BATCH = 500
+    rows_fetched = pyqtSignal(int, int) # pierwszy i ostatni nowy wiersz
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks = []
+        self._sources = deque()
+        self._warning_icon = QIcon.fromTheme("dialog-warning")
+
+    def add_source(self, tasks_data):
+        self._sources.append(iter(tasks_data))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tasks)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.tasks):
+            return None
+        task = self.tasks[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"Zadanie {index.row()+1}: {task.mkv.name if task.mkv else 'Nowe zadanie'}"
+        if role == Qt.ItemDataRole.DecorationRole and task.warnings:
+            return self._warning_icon
+        if role == Qt.ItemDataRole.ToolTipRole and task.warnings:
+            return "\n".join(task.warnings)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and bool(self._sources)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        new_tasks = []
+        while self._sources and len(new_tasks) < self.FETCH_BATCH:
+            batch = [TaskData(*task) for task in islice(self._sources[0], self.FETCH_BATCH - len(new_tasks))]
+            if len(batch) < self.FETCH_BATCH - len(new_tasks):
+                self._sources.popleft()
+            new_tasks.extend(batch)
+        if not new_tasks:
+            return
+        first = len(self.tasks)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_tasks) - 1)
+        self.tasks.extend(new_tasks)
+        self.endInsertRows()
+        self.rows_fetched.emit(first, len(self.tasks) - 1)
+
+    def fetch_all(self):
+        while self._sources:
+            self.fetchMore()
+
+    def task_changed(self, row):
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def set_field(self, rows, name, value):
+        """Ustawia jedno pole w wielu zadaniach naraz; widok dostaje jedno powiadomienie o zmianie całego zakresu."""
+        if not rows:
+            return
+        for row in rows:
+            setattr(self.tasks[row], name, value)
+        self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)))
+
 
 class BatchEditDialog(QDialog):
-    def __init__(self, tasks_data, parent=None, batch_import_logic=None):
+    def __init__(self, tasks_data, parent=None, batch_import_logic=None, fatal_errors=None):
         super().__init__(parent)
         self.setWindowTitle("Podsumowanie i Edycja Importowanych Zadań")
         self.setMinimumSize(1000, 600)
 
-        self.tasks = [TaskData(*task) for task in tasks_data]
         self.batch_import_logic = batch_import_logic
-
+        self._fatal_errors = [fatal_errors or []]
+        self._pending_checks = 0
+        self._validated_rows = 0
+        self._check_generation = {} # wiersz -> numer ostatniego ponownego sprawdzenia po edycji
+        self._fetching_all = False
+
+        self.model = BatchTaskModel(self)
+        self.model.add_source(tasks_data)
+        self.tasks = self.model.tasks
         self._setup_ui()
-
-        self.task_list.currentItemChanged.connect(self._display_task_details)
+        self._validator = TaskValidator(parent=self)
+        self._validator.validated.connect(self._on_task_validated)
+        self.model.rows_fetched.connect(self._on_rows_fetched)
+
+        self.task_list.selectionModel().currentChanged.connect(self._display_task_details)
+        self.task_list.selectionModel().selectionChanged.connect(self._update_bulk_buttons)
+        self.select_all_button.clicked.connect(self._select_all_tasks)
+        for field, button in self.bulk_buttons.items():
+            button.clicked.connect(lambda checked, field=field: self._apply_to_selected(field))
         self.button_box.accepted.connect(self.accept)
         self.button_box.rejected.connect(self.reject)
         self.script_combo.currentIndexChanged.connect(self._update_form_state)
         self.encoder_combo.currentIndexChanged.connect(self._update_form_state)
         self.import_more_button.clicked.connect(self._import_more_tasks)
 
-        self._populate_list()
-        if self.task_list.count() > 0:
-            self.task_list.setCurrentRow(0)
+        self.model.fetchMore()
+        if self.model.rowCount() > 0:
+            self.task_list.setCurrentIndex(self.model.index(0))
+        self._update_bulk_buttons()
+
+    def _on_rows_fetched(self, first, last):
+        # Przy zatwierdzaniu pobierana jest reszta pliku - sprawdzanie plików w tym momencie nic by już nie dało
+        if self._fetching_all:
+            return
+        self._validate_tasks(range(self._validated_rows, last + 1))
+
+    def _validate_tasks(self, indexes):
+        """Ostrzeżenia o brakujących plikach dopisywane są do ostrzeżeń z importu w miarę napływania wyników."""
+        # Odczyt w tle (z trwałej pamięci podręcznej, jeśli plik już był badany) podczas edycji importu
+        probe_service = get_probe_service()
+        for index in indexes:
+            self._pending_checks += 1
+            self._validator.validate(index, self.tasks[index])
+            probe_service.prefetch(self.tasks[index].mkv)
+            self._validated_rows = index + 1
+        self._update_validation_status()
+
+    def _revalidate_tasks(self, rows):
+        """Po zmianie ścieżek lub skryptu ostrzeżenia są liczone od nowa; wynik starszego sprawdzenia jest pomijany."""
+        for row in rows:
+            if row >= self._validated_rows:
+                continue # pierwsze sprawdzenie jeszcze nie zostało zlecone i obejmie już nowe wartości
+            generation = self._check_generation.get(row, 0) + 1
+            self._check_generation[row] = generation
+            self._pending_checks += 1
+            self._validator.validate(row, self.tasks[row], generation)
+        self._update_validation_status()
+
+    def _on_task_validated(self, index, generation, warnings):
+        self._pending_checks -= 1
+        if generation == self._check_generation.get(index, 0):
+            task = self.tasks[index]
+            # Pierwsze sprawdzenie uzupełnia ostrzeżenia z importu, kolejne opisują już stan po edycji
+            task.warnings = list(task.warnings or []) + warnings if generation == 0 else warnings
+            self.model.task_changed(index)
+        self._update_validation_status()
+
+    def _update_bulk_buttons(self):
+        count = len(self.task_list.selectionModel().selectedRows())
+        for button in self.bulk_buttons.values():
+            button.setEnabled(count > 1)
+        self.selection_label.setText(f"Zaznaczone zadania: {count}" if count > 1 else "")
+
+    def _select_all_tasks(self):
+        self.model.fetch_all()
+        self.task_list.selectAll()
+
+    def _apply_to_selected(self, field):
+        """Kopiuje wartość pola z formularza do wszystkich zaznaczonych zadań jedną zmianą modelu."""
+        current = self.task_list.currentIndex()
+        self._save_current_task_details(current)
+        if not current.isValid():
+            return
+        value = getattr(self.tasks[current.row()], field)
+        rows = [index.row() for index in self.task_list.selectionModel().selectedRows()]
+        if field == "script":
+            self.model.set_field([row for row in rows if self.tasks[row].script != value], "output", None)
+        self.model.set_field(rows, field, value)
+        if field in ("font", "script"):
+            self._revalidate_tasks(rows)
+        self._update_form_state()
+
+    def _update_validation_status(self):
+        if self._pending_checks:
+            self.validation_label.setText(f"Sprawdzanie plików: {self._validated_rows - self._pending_checks}/{self._validated_rows}...")
+        else:
+            with_warnings = sum(1 for task in self.tasks if task.warnings)
+            self.validation_label.setText(f"Zadania z ostrzeżeniami: {with_warnings}" if with_warnings else "")
+
+    def _fetch_all_tasks(self):
+        self._fetching_all = True
+        try:
+            self.model.fetch_all()
+        finally:
+            self._fetching_all = False
+
+    def accept(self):
+        self._fetch_all_tasks()
+        errors = [error for errors in self._fatal_errors for error in errors]
+        if errors:
+            shown = "\n".join(errors[:20]) + (f"\n... i {len(errors) - 20} więcej" if len(errors) > 20 else "")
+            answer = QMessageBox.question(self, "Błędne linie",
+                                          f"W dalszej części importowanych plików są błędne linie, które zostały pominięte:\n\n{shown}\n\nDodać pozostałe zadania?")
+            if answer != QMessageBox.StandardButton.Yes:
+                self._validate_tasks(range(self._validated_rows, len(self.tasks)))
+                return
+        super().accept()
+
+    def done(self, result):
+        self._validator.shutdown()
+        super().done(result)
 
     def _import_more_tasks(self):
         if not self.batch_import_logic:
             QMessageBox.critical(self, "Błąd", "Wystąpił błąd wewnętrzny: Brak dostępu do logiki importu.")
             return
         
-        new_tasks_data = self.batch_import_logic.get_tasks_from_file()
-        if new_tasks_data:
-            current_item = self.task_list.currentItem()
-            if current_item:
-                self._save_current_task_details(current_item)
-
-            new_tasks = [TaskData(*task) for task in new_tasks_data]
-            self.tasks.extend(new_tasks)
-            self._populate_list()
-            self.task_list.setCurrentRow(len(self.tasks) - len(new_tasks))
+        source = self.batch_import_logic.get_tasks_from_file()
+        if source:
+            self._save_current_task_details(self.task_list.currentIndex())
+
+            new_tasks_data, fatal_errors = source
+            self._fatal_errors.append(fatal_errors)
+            # Nowe zadania trafiają na koniec listy, za nie wczytaną jeszcze częścią poprzednich plików
+            was_complete = not self.model.canFetchMore()
+            first_new = self.model.rowCount()
+            self.model.add_source(new_tasks_data)
+            if was_complete:
+                self.model.fetchMore()
+                self.task_list.setCurrentIndex(self.model.index(first_new))
 
     def _setup_ui(self):
         main_layout = QVBoxLayout(self)
         splitter = QSplitter(Qt.Orientation.Horizontal)
         main_layout.addWidget(splitter)
 
-        self.task_list = QListWidget()
+        self.task_list = QListView()
+        self.task_list.setModel(self.model)
+        self.task_list.setUniformItemSizes(True)
+        self.task_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         splitter.addWidget(self.task_list)
 
         form_widget = QWidget()
@@ -70,15 +292,35 @@ class BatchEditDialog(QDialog):
         self.encoder_combo = self._create_encoder_combo()
         self.bitrate_spin = self._create_bitrate_spinbox()
         self.debug_check = self._create_debug_checkbox()
+        self.mkv_line, self.sub_line, self.font_line, self.intro_line = (
+            widget.findChild(QLineEdit) for widget in (self.mkv_edit, self.sub_edit, self.font_edit, self.intro_edit))
+        self._editors = [self.mkv_line, self.sub_line, self.font_line, self.intro_line,
+                         self.script_combo, self.encoder_combo, self.bitrate_spin, self.debug_check]
+
+        # Przyciski kopiujące wartość pola do wszystkich zaznaczonych zadań
+        self.bulk_buttons = {}
+        def with_bulk_button(widget, field):
+            button = QToolButton()
+            button.setText("⇊")
+            button.setToolTip("Zastosuj tę wartość do wszystkich zaznaczonych zadań")
+            self.bulk_buttons[field] = button
+            row = QWidget()
+            layout = QHBoxLayout(row)
+            layout.setContentsMargins(0, 0, 0, 0)
+            layout.addWidget(widget, 1)
+            layout.addWidget(button)
+            return row
 
         self.form_layout.addRow("Plik MKV:", self.mkv_edit)
         self.form_layout.addRow("Napisy:", self.sub_edit)
-        self.form_layout.addRow("Czcionki:", self.font_edit)
+        self.form_layout.addRow("Czcionki:", with_bulk_button(self.font_edit, "font"))
         self.form_layout.addRow("Wstawka:", self.intro_edit)
-        self.form_layout.addRow("Skrypt:", self.script_combo)
-        self.form_layout.addRow("Enkoder:", self.encoder_combo)
-        self.form_layout.addRow("Bitrate:", self.bitrate_spin)
+        self.form_layout.addRow("Skrypt:", with_bulk_button(self.script_combo, "script"))
+        self.form_layout.addRow("Enkoder:", with_bulk_button(self.encoder_combo, "ffmpeg"))
+        self.form_layout.addRow("Bitrate:", with_bulk_button(self.bitrate_spin, "bitrate"))
         self.form_layout.addRow("Debug:", self.debug_check)
+        self.selection_label = QLabel()
+        self.form_layout.addRow("", self.selection_label)
         
         self.form_widget = form_widget
         self.form_widget.setEnabled(False)
@@ -88,6 +330,10 @@ class BatchEditDialog(QDialog):
         bottom_buttons_layout = QHBoxLayout()
         self.import_more_button = QPushButton("Importuj więcej...")
         bottom_buttons_layout.addWidget(self.import_more_button)
+        self.select_all_button = QPushButton("Zaznacz wszystkie")
+        bottom_buttons_layout.addWidget(self.select_all_button)
+        self.validation_label = QLabel()
+        bottom_buttons_layout.addWidget(self.validation_label)
         bottom_buttons_layout.addStretch()
 
         self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
@@ -97,76 +343,76 @@ class BatchEditDialog(QDialog):
         
         main_layout.addLayout(bottom_buttons_layout)
 
-    def _populate_list(self):
-        self.task_list.clear()
-        for i, task in enumerate(self.tasks):
-            text = f"Zadanie {i+1}: {task.mkv.name if task.mkv else 'Nowe zadanie'}"
-            item = QListWidgetItem(text)
-            item.setData(Qt.ItemDataRole.UserRole, i)
-            
-            if task.warnings:
-                item.setIcon(QIcon.fromTheme("dialog-warning"))
-                item.setToolTip("\n".join(task.warnings))
-
-            self.task_list.addItem(item)
-
     def _display_task_details(self, current, previous):
-        if previous:
+        if previous.isValid():
             self._save_current_task_details(previous)
 
-        if not current:
+        if not current.isValid():
             self.form_widget.setEnabled(False)
             return
 
         self.form_widget.setEnabled(True)
-        task_index = current.data(Qt.ItemDataRole.UserRole)
+        task_index = current.row()
         task = self.tasks[task_index]
 
-        for child in self.form_widget.findChildren(QWidget):
-            child.blockSignals(True)
+        for editor in self._editors:
+            editor.blockSignals(True)
 
-        self.mkv_edit.findChild(QLineEdit).setText(str(task.mkv) if task.mkv else "")
-        self.sub_edit.findChild(QLineEdit).setText(str(task.sub) if task.sub else "")
-        self.font_edit.findChild(QLineEdit).setText(str(task.font) if task.font else "")
-        self.intro_edit.findChild(QLineEdit).setText(str(task.intro) if task.intro else "")
+        self.mkv_line.setText(str(task.mkv) if task.mkv else "")
+        self.sub_line.setText(str(task.sub) if task.sub else "")
+        self.font_line.setText(str(task.font) if task.font else "")
+        self.intro_line.setText(str(task.intro) if task.intro else "")
         self.script_combo.setCurrentIndex(task.script - 1 if 1 <= task.script <= 4 else 2)
         self.encoder_combo.setCurrentIndex(task.ffmpeg - 1 if 1 <= task.ffmpeg <= 3 else 0)
         self.bitrate_spin.setValue(task.bitrate)
         self.debug_check.setChecked(task.debug)
 
-        for child in self.form_widget.findChildren(QWidget):
-            child.blockSignals(False)
+        for editor in self._editors:
+            editor.blockSignals(False)
         
         self._update_form_state()
 
-    def _save_current_task_details(self, item):
-        if not item:
+    def _save_current_task_details(self, index):
+        if not index.isValid():
             return
         
-        task_index = item.data(Qt.ItemDataRole.UserRole)
+        task_index = index.row()
+        task = self.tasks[task_index]
         
-        mkv_path = self.mkv_edit.findChild(QLineEdit).text()
-        sub_path = self.sub_edit.findChild(QLineEdit).text()
-        font_path = self.font_edit.findChild(QLineEdit).text()
-        intro_path = self.intro_edit.findChild(QLineEdit).text()
+        mkv_path = self.mkv_line.text()
+        sub_path = self.sub_line.text()
+        font_path = self.font_line.text()
+        intro_path = self.intro_line.text()
         
-        self.tasks[task_index] = TaskData(
-            mkv=Path(mkv_path) if mkv_path else None,
-            sub=Path(sub_path) if sub_path else None,
-            font=Path(font_path) if font_path else None,
-            script=self.script_combo.currentIndex() + 1,
-            ffmpeg=self.encoder_combo.currentIndex() + 1,
-            bitrate=self.bitrate_spin.value(),
-            debug=self.debug_check.isChecked(),
-            intro=Path(intro_path) if intro_path else None,
-            output=self.tasks[task_index].output,
-            warnings=self.tasks[task_index].warnings
-        )
-        item.setText(f"Zadanie {task_index+1}: {self.tasks[task_index].mkv.name if self.tasks[task_index].mkv else 'Nowe zadanie'}")
+        # Zmieniane są tylko pola, które się różnią - zwykłe przejście między zadaniami nic nie zapisuje
+        values = {
+            "mkv": Path(mkv_path) if mkv_path else None,
+            "sub": Path(sub_path) if sub_path else None,
+            "font": Path(font_path) if font_path else None,
+            "script": self.script_combo.currentIndex() + 1,
+            "ffmpeg": self.encoder_combo.currentIndex() + 1,
+            "bitrate": self.bitrate_spin.value(),
+            "debug": self.debug_check.isChecked(),
+            "intro": Path(intro_path) if intro_path else None,
+        }
+        changed = {name for name, value in values.items() if getattr(task, name) != value}
+        if not changed:
+            return
+        for name in changed:
+            setattr(task, name, values[name])
+        if "script" in changed:
+            # Ścieżka wyjściowa z importu dotyczy pierwotnego skryptu (np. plik .mkv remuxu) - po zmianie skryptu
+            # wynik trafia do domyślnej lokalizacji, zgodnej z tym, co zapisuje odcisk przepisu
+            task.output = None
+        self.model.task_changed(task_index)
+        if changed & {"mkv", "sub", "font", "intro", "script"}:
+            self._revalidate_tasks([task_index])
 
     def get_edited_tasks(self):
-        self._save_current_task_details(self.task_list.currentItem())
-        return [astuple(task) for task in self.tasks]
+        self._save_current_task_details(self.task_list.currentIndex())
+        self._fetch_all_tasks()
+        # Płytka kopia - astuple kopiowałby rekurencyjnie każdą ścieżkę, co przy dziesiątkach tysięcy zadań trwa sekundy
+        return [tuple(getattr(task, name) for name in TASK_DATA_FIELDS) for task in self.tasks]
 
     def _update_form_state(self):
         script_type = self.script_combo.currentIndex() + 1
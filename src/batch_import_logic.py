@@ -1,8 +1,16 @@
 # batch_import_logic.py
 
-from pathlib import Path
+from itertools import chain, islice
+from PyQt6.QtCore import Qt, QSettings
+from PyQt6.QtGui import QGuiApplication
 from PyQt6.QtWidgets import QFileDialog, QMessageBox, QDialog
 from batch_edit_dialog import BatchEditDialog # NOWY IMPORT
+from episode_scan import scan_tree, pair_episodes
+from presets import load_preset
+from task_file import iter_task_lines, read_lines
+from task_manifest import is_manifest, iter_manifest_tasks
+
+FIRST_BATCH = 500
 
 class BatchImportLogic:
     def __init__(self, parent_dialog):
@@ -28,105 +36,90 @@ class BatchImportLogic:
             <li>Jeśli któreś pole nie jest używane, zostaw je puste, ale zachowaj średniki (np. <code>...;;;...</code>).</li>
             <li>Linie zaczynające się od <b>#</b> są ignorowane.</li>
         </ul>
+        <h4>Manifest JSON / JSON Lines / TOML</h4>
+        <p>Plik <code>.json</code>, <code>.jsonl</code> lub <code>.toml</code> opisuje zadania polami o nazwach:
+        <code>mkv_file</code>, <code>subtitle_file</code>, <code>font_folder</code>, <code>intro_file</code>, <code>output_path</code>,
+        <code>selected_script</code>, <code>selected_ffmpeg_script</code>, <code>gpu_bitrate</code>, <code>debug_mode</code>,
+        <code>subtitle_track_name</code>, <code>movie_name</code>, <code>keep_movie_name</code>, <code>priority</code> (0-2) oraz <code>preset</code> (nazwa zapisanego presetu).</p>
+        <ul>
+            <li>JSON/TOML: <code>{"version": 1, "defaults": {...}, "tasks": [{...}, ...]}</code> (w TOML: tabela <code>[defaults]</code> i <code>[[tasks]]</code>).</li>
+            <li>JSON Lines: jedno zadanie w linii; linia <code>{"defaults": {...}}</code> ustawia wartości dla kolejnych linii.</li>
+            <li>Pierwszeństwo: pola zadania, potem <code>defaults</code>, potem preset (preset zadania zastępuje preset z <code>defaults</code>). Ścieżki względne liczone są od folderu manifestu.</li>
+            <li>Manifest JSON można też zapisać z bieżącej kolejki (Opcje → Eksportuj kolejkę).</li>
+        </ul>
         """
-        QMessageBox.information(self.parent, "Pomoc - Format pliku TXT", help_text)
-
-    def _parse_txt_lines(self, lines):
-        tasks_to_process, fatal_errors = [], []
-        for i, line in enumerate(lines):
-            line_num, line_content = i + 1, line.strip()
-            if not line_content or line_content.startswith('#'):
-                continue
-            
-            parts = [p.strip() for p in line_content.split(';')]
-            while len(parts) < 8:
-                parts.append("")
-            
-            if len(parts) > 8:
-                fatal_errors.append(f"Linia {line_num}: Zbyt wiele pól (oczekiwano 8, otrzymano {len(parts)}).")
-                continue
-
-            mkv_path_str, sub_path_str, font_path_str, script_str, ffmpeg_str, bitrate_str, debug_str, intro_path_str = parts
-            
-            try:
-                script_type = int(script_str) if script_str else 0
-                ffmpeg_type = int(ffmpeg_str) if ffmpeg_str else 0
-                bitrate = int(bitrate_str) if bitrate_str else 0
-                debug = debug_str.lower() in ['true', '1', 'tak']
-            except ValueError:
-                fatal_errors.append(f"Linia {line_num}: Błędny format danych (liczby).")
-                continue
-
-            warnings = []
-            mkv_path = Path(mkv_path_str) if mkv_path_str else None
-            subtitle_path = Path(sub_path_str) if sub_path_str else None
-            font_folder = Path(font_path_str) if font_path_str else None
-            intro_path = Path(intro_path_str) if intro_path_str else None
-
-            if not mkv_path:
-                warnings.append("Brak ścieżki do pliku MKV.")
-            elif not mkv_path.is_file():
-                warnings.append(f"Plik MKV nie istnieje: {mkv_path_str}")
-
-            if script_type in [1, 2, 3]:
-                if not subtitle_path:
-                    warnings.append("Brak ścieżki do napisów.")
-                elif not subtitle_path.is_file():
-                    warnings.append(f"Plik napisów nie istnieje: {sub_path_str}")
-                if not font_folder:
-                    warnings.append("Brak folderu czcionek.")
-                elif not font_folder.is_dir():
-                    warnings.append(f"Folder czcionek nie istnieje: {font_path_str}")
-            
-            if script_type == 4:
-                if not intro_path:
-                    warnings.append("Brak ścieżki do wstawki.")
-                elif not intro_path.is_file():
-                    warnings.append(f"Plik wstawki nie istnieje: {intro_path_str}")
-
-            if script_type not in [1, 2, 3, 4]:
-                warnings.append(f"Nieznany typ skryptu: {script_type}. Ustawiono domyślny (3).")
-                script_type = 3
-
-            if script_type == 3:
-                ffmpeg_type = 0
-                bitrate = 0
-
-            task_data = (mkv_path, subtitle_path, font_folder, script_type, ffmpeg_type, bitrate, debug, intro_path, None, warnings)
-            tasks_to_process.append(task_data)
-        
-        return tasks_to_process, fatal_errors
+        QMessageBox.information(self.parent, "Pomoc - Format pliku zadań", help_text)
 
     def get_tasks_from_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(self.parent, "Wybierz plik z zadaniami", "", "Text Files (*.txt);;All Files (*)")
+        """
+        Zwraca (zadania, błędy krytyczne) albo None. Zadania to generator czytający plik w miarę przewijania listy
+        w oknie edycji; sprawdzana od razu jest tylko pierwsza partia, a błędy z dalszych linii trafiają do listy później.
+        """
+        file_path, _ = QFileDialog.getOpenFileName(self.parent, "Wybierz plik z zadaniami", "",
+                                                   "Pliki zadań (*.txt *.json *.jsonl *.toml);;Text Files (*.txt);;Manifest (*.json *.jsonl *.toml);;All Files (*)")
         if not file_path:
             return None
 
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-        except Exception as e:
-            QMessageBox.critical(self.parent, "Błąd", f"Nie udało się otworzyć pliku: {e}")
-            return None
-
-        tasks_to_process, fatal_errors = self._parse_txt_lines(lines)
+        # Istnienie plików sprawdza w tle okno edycji importu - na udziale sieciowym trwałoby to tu nawet minutę
+        fatal_errors = []
+        if is_manifest(file_path):
+            settings = QSettings("settings.ini", QSettings.Format.IniFormat)
+            tasks = iter_manifest_tasks(file_path, fatal_errors, lambda name: load_preset(settings, name), validate=False)
+        else:
+            try:
+                file = open(file_path, 'r', encoding='utf-8')
+            except Exception as e:
+                QMessageBox.critical(self.parent, "Błąd", f"Nie udało się otworzyć pliku: {e}")
+                return None
+            tasks = iter_task_lines(read_lines(file, fatal_errors), fatal_errors, validate=False)
+        first_tasks = list(islice(tasks, FIRST_BATCH))
 
         if fatal_errors:
+            tasks.close()
             QMessageBox.critical(self.parent, "Błędy krytyczne", "Wystąpiły krytyczne błędy uniemożliwiające import:\n\n" + "\n".join(fatal_errors))
             return None
 
-        if not tasks_to_process:
+        if not first_tasks:
             QMessageBox.information(self.parent, "Informacja", "Nie znaleziono zadań do zaimportowania w pliku.")
             return None
-        
-        return tasks_to_process
+
+        return chain(first_tasks, tasks), fatal_errors
+
+    def get_tasks_from_directory(self, paths):
+        """(zadania, błędy) dla wszystkich odcinków MKV z podanych folderów (razem z podfolderami) w ustawieniach z okna zadania."""
+        QGuiApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            matches = pair_episodes(scan_tree(paths))
+        finally:
+            QGuiApplication.restoreOverrideCursor()
+
+        if not matches:
+            QMessageBox.information(self.parent, "Informacja", "Nie znaleziono plików MKV w wybranym folderze.")
+            return None
+
+        script_type = self.parent.selected_script
+        ffmpeg_type, bitrate = self.parent.selected_ffmpeg_script, self.parent.gpu_bitrate
+        if script_type == 3:
+            ffmpeg_type, bitrate = 0, 0
+        intro_path = self.parent.intro_file if script_type == 4 else None
+        tasks_to_process = [
+            (match.video, match.subtitle, match.font_dir, script_type, ffmpeg_type, bitrate, self.parent.debug_mode, intro_path, None, None, [])
+            for match in matches
+        ]
+        return tasks_to_process, []
 
     def import_from_txt(self):
-        tasks_to_process = self.get_tasks_from_file()
-        if tasks_to_process is None:
+        return self._edit_tasks(self.get_tasks_from_file())
+
+    def import_from_directory(self, paths):
+        return self._edit_tasks(self.get_tasks_from_directory(paths))
+
+    def _edit_tasks(self, source):
+        if source is None:
             return None
 
-        edit_dialog = BatchEditDialog(tasks_to_process, self.parent, self)
+        tasks_to_process, fatal_errors = source
+        edit_dialog = BatchEditDialog(tasks_to_process, self.parent, self, fatal_errors)
         if edit_dialog.exec() == QDialog.DialogCode.Accepted:
             final_tasks = edit_dialog.get_edited_tasks()
             if final_tasks:
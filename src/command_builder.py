@@ -0,0 +1,149 @@
+# command_builder.py
+import platform
+from pathlib import Path
+
+# Wspólne ustawienia kodowania CPU (libx264) dla zwykłego hardsuba i kodowania w segmentach
+CPU_VIDEO_OPTIONS = ["-c:v", "libx264", "-profile:v", "main", "-level:v", "4.0", "-preset", "veryfast", "-crf", "16", "-maxrate", "20M", "-bufsize", "25M", "-x264-params", "colormatrix=bt709"]
+FONT_SUFFIXES = ['.ttf', '.otf', '.ttc', '.woff', '.woff2']
+# Strumienie, które zostawia remux (--audio-tracks 1 --no-subtitles: obraz i pierwsza ścieżka audio - w typowym
+# układzie MKV ścieżka o ID 1), wybierane wprost, gdy FFmpeg czyta plik źródłowy w trybie jednoprzebiegowym.
+# Bez -map FFmpeg wybrałby ścieżkę audio z największą liczbą kanałów.
+REMUX_STREAM_MAPS = ["-map", "0:v:0", "-map", "0:a:0?", "-sn"]
+
+def ffmpeg_filter_path(file_path):
+    """Ścieżka w postaci bezpiecznej dla argumentów filtrów FFmpeg (dwukropki i ukośniki w Windows)."""
+    if platform.system() != "Windows":
+        return str(file_path)
+    return str(file_path).replace('\\', '\\\\').replace(':', '\\:')
+
+
+def subtitle_filter(subtitle_source, font_folder=None):
+    # Bez osobnego pliku napisów wypalana jest pierwsza ścieżka napisów z samego MKV
+    subtitle_filter = f"subtitles='{ffmpeg_filter_path(subtitle_source)}'"
+    if font_folder:
+        subtitle_filter += f":fontsdir='{ffmpeg_filter_path(font_folder)}'"
+    return subtitle_filter
+
+
+# --- Ścieżki wyjściowe ---
+def remux_output_path(task, mkv_file, is_final=True):
+    mkv_path = Path(mkv_file)
+    # Integracja niestandardowej ścieżki (tylko dla remuxu, który jest wynikiem końcowym)
+    if is_final and task.output_path:
+        return Path(task.output_path)
+    return mkv_path.with_name(f"{mkv_path.stem}_remux.mkv")
+
+
+def hardsub_output_path(task, mkv_file, is_final=False):
+    mkv_path = Path(mkv_file)
+    if is_final and task.output_path:
+        return Path(task.output_path)
+    return mkv_path.with_name(mkv_path.name.replace("_remux.mkv" if is_final else ".mkv", "_hardsub.mp4"))
+
+
+def intro_output_path(task, mkv_file):
+    mkv_path = Path(mkv_file)
+    if task.output_path:
+        return Path(task.output_path)
+    return mkv_path.with_name(f"{mkv_path.stem}_HARD.mp4")
+
+
+# --- Polecenia ---
+def mkvmerge_args(task, mkv_file, subtitle_file, font_folder, output_file, fonts=None):
+    """
+    Zwraca (argumenty mkvmerge, lista plików wejściowych - źródło, napisy i dołączane czcionki).
+    fonts to lista czcionek do dołączenia; None oznacza wszystkie czcionki z font_folder.
+    """
+    font_path = Path(font_folder) if font_folder else None
+    # --- TWOJA POPRAWNA LOGIKA ---
+    track_name = task.subtitle_track_name.strip() or ""
+    movie_name = task.movie_name
+    args = ["-o", str(output_file), "--audio-tracks", "1", "--no-subtitles",
+            "--no-track-tags", "--no-chapters", "--no-attachments", str(mkv_file),
+            "--language", "0:pol", "--track-name", f"0:{track_name}", str(subtitle_file)]
+    if movie_name == " ":
+        pass
+    elif movie_name:
+        args.extend(["--title", movie_name])
+    else:
+        args.extend(["--title", ""])
+    # -----------------------------
+
+    inputs = [Path(mkv_file), Path(subtitle_file)]
+    if fonts is None:
+        fonts = sorted(font for font in font_path.iterdir() if font.suffix.lower() in FONT_SUFFIXES) if font_path and font_path.is_dir() else []
+    for font in fonts:
+        args.extend(["--attach-file", str(font)])
+        inputs.append(Path(font))
+    return args, inputs
+
+
+def ffmpeg_hardsub_args(task, mkv_file, output_file, video_subtitle_filter, stream_maps=()):
+    mkv_path = Path(mkv_file)
+    input_args = ["-i", str(mkv_path), *stream_maps]
+    if task.selected_ffmpeg_script == 1: # CPU
+        return ["-y", *input_args, "-vf", f"format=yuv420p,{video_subtitle_filter}", "-map_metadata", "-1", "-movflags", "+faststart", *CPU_VIDEO_OPTIONS, "-c:a", "copy", str(output_file)]
+    if task.selected_ffmpeg_script == 2: # GPU (CUDA)
+        return ["-y", "-vsync", "0", "-hwaccel", "cuda", *input_args, "-vf", video_subtitle_filter, "-c:a", "copy", "-c:v", "h264_nvenc", "-preset", "p2", "-tune", "1", "-b:v", f"{task.gpu_bitrate}M", "-bufsize", "15M", "-maxrate", "15M", "-qmin", "0", "-g", "250", "-bf", "3", "-b_ref_mode", "middle", "-temporal-aq", "1", "-rc-lookahead", "20", "-i_qfactor", "0.75", "-b_qfactor", "1.1", str(output_file)]
+    if task.selected_ffmpeg_script == 3: # GPU (VA-API)
+        return ["-y", "-hwaccel", "vaapi", "-hwaccel_output_format", "vaapi", *input_args, "-vf", f"{video_subtitle_filter},format=nv12,hwupload", "-c:a", "copy", "-c:v", "h264_vaapi", "-b:v", f"{task.gpu_bitrate}M", str(output_file)]
+    return []
+
+
+def ffmpeg_intro_args(task, mkv_file, intro_file, output_file, framerate=None):
+    mkv_path, intro_path = Path(mkv_file), Path(intro_file)
+    subtitle_path = ffmpeg_filter_path(mkv_path)
+    bitrate = task.gpu_bitrate
+    framerate_arg = ["-r:v", framerate] if framerate else []
+
+    audio_filter = "[0:a:0]loudnorm=I=-20:LRA=10:tp=-1.8[a_intro_norm];[1:a:0]loudnorm=I=-20:LRA=10:tp=-1.8[a_main_norm];[a_intro_norm][a_main_norm]concat=n=2:v=0:a=1[a_out]"
+
+    # Skrypt dla CPU
+    if task.selected_ffmpeg_script == 1:
+        filter_complex_cpu = (
+            f"[1:v]subtitles='{subtitle_path}'[v_subs];"
+            f"[0:v][v_subs]concat=n=2:v=1[v_out];{audio_filter}"
+        )
+        x264_params = (
+            "deblock=-2:-1:me=umh:rc-lookahead=250:qcomp=0.60:aq-mode=3:aq-strength=0.80:"
+            "merange=32:ipratio=1.30:no-dct-decimate=1:vbv-bufsize=78125:vbv-maxrate=62500:"
+            "coder=default:chromaoffset=0:udu_sei=false:mbtree=1:b-pyramid=2:direct=auto:"
+            "trellis=1:colormatrix=bt709"
+        )
+        return [
+            "-i", str(intro_path), "-i", str(mkv_path),
+            "-filter_complex", filter_complex_cpu,
+            "-map", "[v_out]", "-map", "[a_out]",
+            "-c:v", "libx264", "-b:v", f"{bitrate}M",
+            "-bufsize", "15M", "-maxrate", "15M", "-preset", "medium",
+            "-c:a", "aac", "-b:a", "128k",
+            "-profile:v", "high", "-level:v", "4.1", "-tune", "animation",
+            "-x264-params", x264_params, *framerate_arg, "-sar", "1:1",
+            "-pix_fmt", "yuv420p", "-sn", "-movflags", "faststart", "-y", str(output_file)
+        ]
+
+    # Skrypty dla GPU (CUDA lub VA-API)
+    if task.selected_ffmpeg_script in [2, 3]:
+        video_filter_cpu = f"[1:v]subtitles='{subtitle_path}'[v_subs];[0:v][v_subs]concat=n=2:v=1:a=0[v_cpu]"
+
+        if task.selected_ffmpeg_script == 2:
+            hw_accel_args = ["-hwaccel", "cuda"]
+            filter_complex = f"{video_filter_cpu};[v_cpu]hwupload_cuda[v_out];{audio_filter}"
+            video_codec_args = ["-c:v", "h264_nvenc", "-preset", "p2"]
+        else: # selected_ffmpeg_script == 3
+            hw_accel_args = ["-hwaccel", "vaapi"]
+            filter_complex = f"{video_filter_cpu};[v_cpu]format=nv12,hwupload[v_out];{audio_filter}"
+            video_codec_args = ["-c:v", "h264_vaapi", "-profile:v", "high"]
+
+        return [
+            *hw_accel_args,
+            "-i", str(intro_path), "-i", str(mkv_path),
+            "-filter_complex", filter_complex,
+            "-map", "[v_out]", "-map", "[a_out]",
+            *video_codec_args,
+            "-b:v", f"{bitrate}M", "-bufsize", "15M", "-maxrate", "15M",
+            *framerate_arg,
+            "-c:a", "aac", "-b:a", "128k",
+            "-movflags", "+faststart", "-y", str(output_file)
+        ]
+    return []
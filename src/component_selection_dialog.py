@@ -8,9 +8,11 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QPushButton, QFileDia
                              QDialogButtonBox, QMessageBox, QHBoxLayout, QLineEdit,
                              QToolButton, QStyle, QTabWidget, QWidget, QGroupBox,
                              QComboBox, QInputDialog)
-from PyQt6.QtCore import Qt, QSettings
+from PyQt6.QtCore import Qt, QSettings, QTimer
 from mkv_info_dialog import MkvInfoDialog
 from batch_import_logic import BatchImportLogic
+from presets import load_preset
+from episode_scan import scan_tree, pair_episodes
 
 class ComponentSelectionDialog(QDialog):
     def __init__(self, use_per_option_paths=False, parent=None, is_flatpak=False):
@@ -248,6 +250,8 @@ class ComponentSelectionDialog(QDialog):
         other_layout = QVBoxLayout(other_group)
         self.debug_checkbox = QCheckBox("Debug Mode", self)
         self.import_button = QPushButton("Importuj zadania z pliku TXT", self)
+        self.import_dir_button = QPushButton("Importuj odcinki z folderu", self)
+        self.import_dir_button.setToolTip("Wyszukuje pliki MKV w folderze i podfolderach, dobierając do nich napisy i czcionki.\nFolder można też przeciągnąć na to okno.")
         self.help_button = QToolButton(self)
         self.help_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogHelpButton))
         import_layout = QHBoxLayout()
@@ -255,6 +259,7 @@ class ComponentSelectionDialog(QDialog):
         import_layout.addWidget(self.help_button)
         other_layout.addWidget(self.debug_checkbox)
         other_layout.addLayout(import_layout)
+        other_layout.addWidget(self.import_dir_button)
         advanced_tab_layout.addWidget(other_group)
         advanced_tab_layout.addStretch()
         self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
@@ -273,6 +278,7 @@ class ComponentSelectionDialog(QDialog):
         self.script_button_group.buttonClicked.connect(self.update_ui_state)
 
         self.import_button.clicked.connect(self._handle_batch_import) # ZMIANA
+        self.import_dir_button.clicked.connect(self._select_import_directory)
         self.help_button.clicked.connect(self.batch_import_handler.show_import_help_dialog)
 
         self.button_box.accepted.connect(self.accept)
@@ -297,6 +303,18 @@ class ComponentSelectionDialog(QDialog):
             self.batch_tasks = tasks
             self.accept() # Zamknij to okno, aby MainWindow mogło przetworzyć zadania
 
+    def _select_import_directory(self):
+        folder = QFileDialog.getExistingDirectory(self, "Wybierz folder z odcinkami", self._get_last_used_directory())
+        if folder:
+            self._set_last_used_folder(folder)
+            self._handle_directory_import([Path(folder)])
+
+    def _handle_directory_import(self, paths):
+        tasks = self.batch_import_handler.import_from_directory(paths)
+        if tasks is not None:
+            self.batch_tasks = tasks
+            self.accept()
+
     def show_mkv_info_dialog(self):
         if self.mkv_file:
             dialog = MkvInfoDialog(self.mkv_file, self)
@@ -454,9 +472,24 @@ class ComponentSelectionDialog(QDialog):
             super().dragEnterEvent(event)
 
     def dropEvent(self, event):
-        urls = event.mimeData().urls()
-        for url in urls:
-            path = Path(url.toLocalFile())
+        paths = [Path(url.toLocalFile()) for url in event.mimeData().urls()]
+        dropped_dirs = [path for path in paths if path.is_dir()]
+        if dropped_dirs:
+            # Folder z odcinkami (a nie sam folder czcionek): kilka odcinków trafia do importu wsadowego,
+            # a pojedynczy wypełnia pola tego okna dobranymi napisami i czcionkami
+            matches = pair_episodes(scan_tree(paths))
+            if len(matches) > 1:
+                event.acceptProposedAction()
+                # Okno edycji importu otwierane dopiero po zakończeniu przeciągania (źródło czeka na wynik upuszczenia)
+                QTimer.singleShot(0, lambda: self._handle_directory_import(paths))
+                return
+            if len(matches) == 1 and any(path in matches[0].video.parents for path in dropped_dirs):
+                match = matches[0]
+                self.mkv_file = match.video
+                self.subtitle_file = match.subtitle or self.subtitle_file
+                self.font_folder = match.font_dir or self.font_folder
+                paths = [path for path in paths if path.is_file()]
+        for path in paths:
             if path.suffix.lower() in ['.mp4']:
                 self.intro_file = path
             elif path.suffix.lower() == '.mkv':
@@ -639,25 +672,22 @@ class ComponentSelectionDialog(QDialog):
         if index == -1: # Ignoruj placeholder
             return
 
-        preset_name = self.preset_combo.itemText(index)
-        self.settings.beginGroup(f"presets/{preset_name}")
+        preset = load_preset(self.settings, self.preset_combo.itemText(index))
+        if preset is None:
+            return
 
         # Odczytaj i zastosuj ustawienia
-        script_id = self.settings.value("selected_script", 3, type=int)
-        self.button_group.button(script_id).setChecked(True)
+        self.button_group.button(preset["selected_script"]).setChecked(True)
+        self.script_button_group.button(preset["selected_ffmpeg_script"]).setChecked(True)
 
-        ffmpeg_script_id = self.settings.value("selected_ffmpeg_script", 1, type=int)
-        self.script_button_group.button(ffmpeg_script_id).setChecked(True)
+        self.bitrate_spinbox.setValue(preset["gpu_bitrate"])
+        self.debug_checkbox.setChecked(preset["debug_mode"])
+        self.subtitle_track_name_edit.setText(preset["subtitle_track_name"])
+        self.movie_name_edit.setText(preset["movie_name"])
+        self.movie_name_checkbox.setChecked(preset["keep_movie_name"])
+        self.custom_output_checkbox.setChecked(preset["custom_output"])
+        self.output_dir_edit.setText(preset["output_dir"])
 
-        self.bitrate_spinbox.setValue(self.settings.value("gpu_bitrate", 8, type=int))
-        self.debug_checkbox.setChecked(self.settings.value("debug_mode", False, type=bool))
-        self.subtitle_track_name_edit.setText(self.settings.value("subtitle_track_name", ""))
-        self.movie_name_edit.setText(self.settings.value("movie_name", ""))
-        self.movie_name_checkbox.setChecked(self.settings.value("keep_movie_name", False, type=bool))
-        self.custom_output_checkbox.setChecked(self.settings.value("custom_output", False, type=bool))
-        self.output_dir_edit.setText(self.settings.value("output_dir", ""))
-
-        self.settings.endGroup()
         self.update_ui_state() # Zaktualizuj UI po wczytaniu presetu
 
     @property
@@ -0,0 +1,193 @@
+# control_server.py
+import json
+import time
+from PyQt6.QtCore import QObject
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+from task_manifest import TASK_FIELDS, ManifestError, resolve_task
+from task_queue import PRIORITY_NORMAL, PRIORITY_LABELS
+
+SERVER_NAME = "automatyzer-control"
+MAX_REQUEST_BYTES = 16 * 1024 * 1024 # Jedna linia żądania; wystarcza na tysiące zadań w jednym "submit"
+PROGRESS_INTERVAL = 1.0
+
+class RequestError(Exception):
+    pass
+
+
+def task_summary(task, is_running=False):
+    return {
+        "task_id": task.task_id,
+        "mkv_file": str(task.mkv_file) if task.mkv_file else None,
+        "selected_script": task.selected_script,
+        "status": task.status,
+        "priority": task.priority,
+        "running": is_running,
+        "retry": task.retry,
+    }
+
+
+class ControlServer(QObject):
+    """
+    Lokalne API sterowania kolejką (QLocalServer: gniazdo Unix lub nazwany potok w Windows).
+    Protokół to JSON Lines: każde żądanie to jedna linia {"cmd": ..., "id": ...}, odpowiedź powtarza "id".
+    Polecenia: submit (lista zadań, opcjonalnie priority), cancel (task_id), list, subscribe, unsubscribe.
+    Po subscribe połączenie dostaje też zdarzenia {"event": ...} z postępem kolejki.
+    """
+    def __init__(self, task_manager, process_manager, parent=None):
+        super().__init__(parent)
+        self.task_manager = task_manager
+        self.process_manager = process_manager
+        self.server = QLocalServer(self)
+        # Gniazdo dostępne tylko dla użytkownika, który uruchomił program
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self._on_new_connection)
+        self.subscribers = set()
+        self._last_progress = {}
+
+        process_manager.task_started.connect(lambda task: self._broadcast("task_started", **task_summary(task, True)))
+        process_manager.task_progress.connect(self._on_task_progress)
+        process_manager.task_finished.connect(self._on_task_finished)
+        process_manager.queue_finished.connect(lambda: self._broadcast("queue_finished"))
+
+    def start(self, name=SERVER_NAME):
+        """Zwraca None po uruchomieniu albo opis błędu."""
+        if self.server.isListening():
+            return None
+        probe = QLocalSocket()
+        probe.connectToServer(name)
+        if probe.waitForConnected(200):
+            probe.abort()
+            return f"Gniazdo {name} jest już używane przez inną instancję programu."
+        # Plik gniazda mógł zostać po awarii - bez usunięcia listen() by się nie powiódł
+        QLocalServer.removeServer(name)
+        if not self.server.listen(name):
+            return self.server.errorString()
+        return None
+
+    def stop(self):
+        for socket in list(self.subscribers):
+            socket.disconnectFromServer()
+        self.subscribers.clear()
+        self.server.close()
+
+    def is_listening(self):
+        return self.server.isListening()
+
+    # --- Połączenia ---
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._on_disconnected(s))
+
+    def _on_disconnected(self, socket):
+        self.subscribers.discard(socket)
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket):
+        while socket.canReadLine():
+            line = bytes(socket.readLine()).strip()
+            if line:
+                self._send(socket, self._handle_line(socket, line))
+        if socket.bytesAvailable() > MAX_REQUEST_BYTES:
+            self._send(socket, {"ok": False, "error": "Żądanie jest za długie."})
+            socket.disconnectFromServer()
+
+    def _send(self, socket, message):
+        if socket.state() == QLocalSocket.LocalSocketState.ConnectedState:
+            socket.write((json.dumps(message, ensure_ascii=False) + "\n").encode('utf-8'))
+
+    # --- Żądania ---
+    def _handle_line(self, socket, line):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("Żądanie musi być obiektem JSON.")
+            request_id = request.get("id")
+            handler = {
+                "submit": self._cmd_submit,
+                "cancel": self._cmd_cancel,
+                "list": self._cmd_list,
+                "subscribe": self._cmd_subscribe,
+                "unsubscribe": self._cmd_unsubscribe,
+            }.get(request.get("cmd"))
+            if handler is None:
+                raise RequestError(f"Nieznane polecenie: {request.get('cmd')}")
+            response = {"ok": True, **handler(socket, request)}
+        except ValueError:
+            response = {"ok": False, "error": "Niepoprawny JSON."}
+        except RequestError as e:
+            response = {"ok": False, "error": str(e)}
+        except Exception as e:
+            # Wyjątek nie może opuścić slotu readyRead - PyQt6 zakończyłby wtedy cały program
+            response = {"ok": False, "error": f"Błąd obsługi żądania: {e}"}
+        if request_id is not None:
+            response["id"] = request_id
+        return response
+
+    def _cmd_submit(self, socket, request):
+        tasks = request.get("tasks")
+        if not isinstance(tasks, list) or not tasks:
+            raise RequestError("Pole 'tasks' musi być niepustą listą zadań.")
+        priority = request.get("priority", PRIORITY_NORMAL)
+        if not isinstance(priority, int) or isinstance(priority, bool) or priority not in PRIORITY_LABELS:
+            raise RequestError(f"Nieznany priorytet: {priority}")
+        # Cała paczka jest sprawdzana przed dodaniem - błąd w jednym zadaniu nie zostawia połowy w kolejce
+        batch = [self._task_kwargs(index, task_data) for index, task_data in enumerate(tasks)]
+        added = self.task_manager.add_tasks(batch, priority)
+        self.process_manager.process_next_task()
+        return {"task_ids": [task.task_id for task in added]}
+
+    @staticmethod
+    def _task_kwargs(index, task_data):
+        # Te same kontrole typów i wartości co przy wczytywaniu manifestu; API przyjmuje tylko pola zadania
+        label = f"Zadanie {index}"
+        if not isinstance(task_data, dict):
+            raise RequestError(f"{label}: oczekiwano obiektu.")
+        unknown = set(task_data) - set(TASK_FIELDS)
+        if unknown:
+            raise RequestError(f"{label}: nieznane pola: {', '.join(sorted(unknown))}")
+        try:
+            kwargs, _ = resolve_task(label, task_data, {})
+        except ManifestError as e:
+            raise RequestError(str(e))
+        return kwargs
+
+    def _cmd_cancel(self, socket, request):
+        task_id = request.get("task_id")
+        if not isinstance(task_id, int) or isinstance(task_id, bool):
+            raise RequestError("Pole 'task_id' musi być liczbą całkowitą.")
+        if not self.process_manager.cancel_task(task_id):
+            raise RequestError(f"Nie ma zadania o ID {task_id}.")
+        return {}
+
+    def _cmd_list(self, socket, request):
+        return {"tasks": [task_summary(task, self.process_manager.is_task_running(task)) for task in self.task_manager.tasks]}
+
+    def _cmd_subscribe(self, socket, request):
+        self.subscribers.add(socket)
+        return {}
+
+    def _cmd_unsubscribe(self, socket, request):
+        self.subscribers.discard(socket)
+        return {}
+
+    # --- Zdarzenia ---
+    def _broadcast(self, event, **fields):
+        if not self.subscribers:
+            return
+        message = {"event": event, **fields}
+        for socket in list(self.subscribers):
+            self._send(socket, message)
+
+    def _on_task_progress(self, task, fraction, eta):
+        now = time.monotonic()
+        if fraction < 1.0 and now - self._last_progress.get(task.task_id, 0) < PROGRESS_INTERVAL:
+            return
+        self._last_progress[task.task_id] = now
+        self._broadcast("task_progress", task_id=task.task_id, status=task.status, progress=round(fraction, 4), eta=eta if eta >= 0 else None)
+
+    def _on_task_finished(self, task, success):
+        self._last_progress.pop(task.task_id, None)
+        self._broadcast("task_finished", task_id=task.task_id, success=success, status=task.status)
@@ -0,0 +1,157 @@
+# debug_log.py
+import gzip
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+
+class DebugLogWriter:
+    """
+    Zapis logów trybu debugowania w osobnym wątku.
+    Wiadomości trafiają do kolejki, a wątek zapisuje je paczkami do osobnego pliku dla każdego zadania.
+    Plik, który przekroczy max_bytes, jest rotowany, a starsze części kompresowane gzipem.
+    Przy otwarciu logu nowego zadania usuwane są logi starsze niż max_age_days i te spoza max_logs najnowszych zadań.
+    """
+    _CLOSE = object()
+    # {znacznik czasu}_{zadanie}.log oraz jego rotowane części .N.gz
+    _STREAM_FILE = re.compile(r"^(\d{8}-\d{6}_.+?\.log)(?:\.\d+\.gz)?$")
+
+    def __init__(self, log_dir, max_bytes=10 * 1024 * 1024, backup_count=5, flush_interval=0.5, max_logs=200, max_age_days=30):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.max_logs = max_logs
+        self.max_age_days = max_age_days
+        self._queue = queue.SimpleQueue()
+        self._files = {}
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    @staticmethod
+    def stream_name(label):
+        """Bezpieczna nazwa pliku logu: znacznik czasu + nazwa zadania."""
+        safe_label = re.sub(r'[^\w.-]+', '_', str(label)).strip('_') or "zadanie"
+        return f"{datetime.now():%Y%m%d-%H%M%S}_{safe_label}"
+
+    def path_for(self, stream):
+        return os.path.join(self.log_dir, f"{stream}.log")
+
+    def write(self, stream, message):
+        self._ensure_thread()
+        self._queue.put((stream, f"{datetime.now()}: {message}\n"))
+
+    def close_stream(self, stream):
+        """Zamyka plik zadania po zapisaniu wszystkiego, co jest już w kolejce."""
+        if self._thread is not None:
+            self._queue.put((stream, self._CLOSE))
+
+    def shutdown(self, timeout=5):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _ensure_thread(self):
+        with self._thread_lock:
+            if self._thread is None:
+                # Wątek powstaje dopiero przy pierwszym wpisie, więc bez trybu debugowania nic nie działa w tle
+                self._thread = threading.Thread(target=self._run, name="debug-log", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        running = True
+        while running:
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # Zbierz wszystko, co czeka w kolejce, i zapisz jednym wywołaniem na plik
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            pending = {}
+            for item in items:
+                if item is None:
+                    running = False
+                    continue
+                stream, message = item
+                if message is self._CLOSE:
+                    self._write_batch(stream, pending.pop(stream, []))
+                    self._close_file(stream)
+                else:
+                    pending.setdefault(stream, []).append(message)
+            for stream, messages in pending.items():
+                self._write_batch(stream, messages)
+
+        for stream in list(self._files):
+            self._close_file(stream)
+
+    def _write_batch(self, stream, messages):
+        if not messages:
+            return
+        try:
+            log_file = self._files.get(stream)
+            if log_file is None:
+                os.makedirs(self.log_dir, exist_ok=True)
+                log_file = self._files[stream] = open(self.path_for(stream), "a", encoding='utf-8')
+                # Nowy log jest już na liście, więc liczy się do max_logs
+                self._apply_retention()
+            log_file.write("".join(messages))
+            log_file.flush()
+            if log_file.tell() >= self.max_bytes:
+                self._rotate(stream)
+        except OSError as e:
+            # Błąd zapisu logu nie może przerwać kodowania
+            print(f"Błąd zapisu logu debugowania: {e}")
+
+    def _apply_retention(self):
+        """Usuwa logi (razem z częściami .gz) zadań spoza max_logs najnowszych i starszych niż max_age_days."""
+        try:
+            with os.scandir(self.log_dir) as entries:
+                files = [(entry.name, entry.stat().st_mtime) for entry in entries if entry.is_file()]
+        except OSError:
+            return
+        logs = {}
+        for name, mtime in files:
+            match = self._STREAM_FILE.match(name)
+            if match:
+                parts, newest = logs.get(match.group(1), ([], 0))
+                logs[match.group(1)] = (parts + [name], max(newest, mtime))
+        open_logs = {os.path.basename(self.path_for(stream)) for stream in self._files}
+        cutoff = time.time() - self.max_age_days * 86400
+        # Nazwy zaczynają się od znacznika czasu, więc sortowanie nazw porządkuje logi od najnowszego
+        for position, log_name in enumerate(sorted(logs, reverse=True)):
+            parts, newest = logs[log_name]
+            if log_name in open_logs or (position < self.max_logs and newest >= cutoff):
+                continue
+            for name in parts:
+                try:
+                    os.remove(os.path.join(self.log_dir, name))
+                except OSError:
+                    pass
+
+    def _close_file(self, stream):
+        log_file = self._files.pop(stream, None)
+        if log_file is not None:
+            log_file.close()
+
+    def _rotate(self, stream):
+        self._close_file(stream)
+        base = self.path_for(stream)
+        oldest = f"{base}.{self.backup_count}.gz"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{base}.{index}.gz"
+            if os.path.exists(source):
+                os.replace(source, f"{base}.{index + 1}.gz")
+        with open(base, "rb") as source, gzip.open(f"{base}.1.gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(base)
@@ -102,14 +102,18 @@ class DiscordRPCManager:
         details, state = "Oczekuje na zadania", "Brak zadań w kolejce"
         script_to_details_map = {1: "Przetwarza: Hardsuba", 2: "Przetwarza: Remuxa + Hardsuba", 3: "Przetwarza: Remuxa", 4: "Przetwarza: Hardsuba z intrem"}
         if num_tasks > 0:
-            current_task = self.task_manager.get_task(0)
-            if is_processing:
+            running_tasks = self.task_manager.process_manager.running_tasks()
+            if is_processing and running_tasks:
+                current_task = running_tasks[0]
                 details = script_to_details_map.get(current_task.selected_script, "Przetwarza...")
+                if len(running_tasks) > 1:
+                    details = f"Przetwarza: {len(running_tasks)} zadania równolegle"
                 ffmpeg_speed = self.task_manager.process_manager.current_ffmpeg_speed
+                waiting = num_tasks - len(running_tasks)
                 if current_task.selected_script in [1, 2, 4] and ffmpeg_speed:
                     state = f"Prędkość: {ffmpeg_speed}"
                 else:
-                    state = f"{num_tasks - 1} w kolejce" if num_tasks > 1 else "Ostatnie zadanie"
+                    state = f"{waiting} w kolejce" if waiting > 0 else "Ostatnie zadanie"
             else:
                 details = "Oczekuje na rozpoczęcie..."
                 state = f"{num_tasks} zadań w kolejce"
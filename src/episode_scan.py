@@ -0,0 +1,242 @@
+# episode_scan.py
+# Skanowanie drzewa katalogów i dobieranie napisów oraz czcionek do odcinków - bez zależności od Qt
+import difflib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from command_builder import FONT_SUFFIXES
+
+FONT_DIR_NAMES = {"fonts", "czcionki", "attachments"}
+FUZZY_THRESHOLD = 0.6
+SCAN_WORKERS = 8
+
+_SEASON_EPISODE = re.compile(r"s(\d{1,2})[ ._-]?e(\d{1,4})", re.IGNORECASE)
+_EPISODE_MARKER = re.compile(r"(?:^|[\s._\-\[(])(?:ep?|odc(?:inek)?)[\s._]*(\d{1,4})(?!\d)", re.IGNORECASE)
+_DASH_NUMBER = re.compile(r"\s-\s(\d{1,4})(?:v\d)?(?!\d)")
+_BRACKETS = re.compile(r"\[[^\]]*\]|\([^)]*\)|\{[^}]*\}")
+_NUMBER = re.compile(r"(?<![\dx])(\d{1,3})(?:v\d)?(?![\dp])", re.IGNORECASE)
+# Znaczniki techniczne, których liczby nie są numerem odcinka: kodeki, głębia bitowa, rozdzielczość, dźwięk
+_TECHNICAL_TOKENS = re.compile(
+    r"(?<![a-z0-9])(?:[hx][ .]?26[45]|hevc|avc|xvid|\d{1,2}[ -]?bits?|\d{3,4}[pi]|\d{3,4}x\d{3,4}"
+    r"|(?:aac|ac3|e-?ac-?3|ddp?|dts(?:-hd)?|flac|opus|truehd|mp3)[ .]?(?:\d(?:\.\d)?)?|\d\.\d)(?![a-z0-9])",
+    re.IGNORECASE
+)
+_SEPARATORS = re.compile(r"[\s._\-]+")
+
+@dataclass
+class ScanResult:
+    videos: list = field(default_factory=list)
+    subtitles: list = field(default_factory=list)
+    font_dirs: list = field(default_factory=list)
+
+
+@dataclass
+class EpisodeMatch:
+    video: Path
+    subtitle: Path | None = None
+    font_dir: Path | None = None
+
+
+def is_font_file(name):
+    return os.path.splitext(name)[1].lower() in FONT_SUFFIXES
+
+
+def episode_font_dir(directory, font_subdirs, has_loose_fonts):
+    """
+    Folder czcionek dla odcinków z jednego katalogu: sam katalog, gdy czcionki leżą luzem obok odcinków,
+    a w przeciwnym razie podfolder fonts/czcionki/attachments (font_subdirs). None, gdy nie ma żadnego.
+    Tej samej reguły używa obserwowanie folderów (watch_folder).
+    """
+    if has_loose_fonts:
+        return Path(directory)
+    return min((Path(subdir) for subdir in font_subdirs), default=None)
+
+
+def _scan_dir(path):
+    """Jeden poziom drzewa: (pliki, podkatalogi, czy katalog zawiera czcionki)."""
+    files, subdirs, has_fonts = [], [], False
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    files.append(entry.path)
+                    has_fonts = has_fonts or is_font_file(entry.name)
+    except OSError:
+        pass
+    return files, subdirs, has_fonts
+
+
+def scan_tree(roots, max_workers=SCAN_WORKERS):
+    """
+    Przegląda katalogi (i pojedyncze pliki) z `roots`, odczytując poziomy drzewa równolegle.
+    Na udziałach sieciowych czas skanowania wyznacza opóźnienie każdego os.scandir, więc kilka zapytań naraz
+    skraca go kilkukrotnie.
+    """
+    result = ScanResult()
+    files, dirs = [], []
+    for root in roots:
+        root = Path(root)
+        if root.is_dir():
+            dirs.append(str(root))
+        elif root.is_file():
+            files.append(str(root))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {executor.submit(_scan_dir, path): path for path in dirs}
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = running.pop(future)
+                dir_files, subdirs, has_fonts = future.result()
+                files.extend(dir_files)
+                if has_fonts or Path(path).name.lower() in FONT_DIR_NAMES:
+                    result.font_dirs.append(Path(path))
+                for subdir in subdirs:
+                    running[executor.submit(_scan_dir, subdir)] = subdir
+
+    for file_path in files:
+        name = os.path.basename(file_path).lower()
+        # Pośrednie pliki remuxu to wynik wcześniejszych zadań, a nie nowe odcinki
+        if name.endswith(".mkv") and not name.endswith("_remux.mkv"):
+            result.videos.append(Path(file_path))
+        elif name.endswith(".ass"):
+            result.subtitles.append(Path(file_path))
+    result.videos.sort()
+    result.subtitles.sort()
+    result.font_dirs.sort()
+    return result
+
+
+def episode_key(stem):
+    """(sezon lub None, numer odcinka) odczytane z nazwy pliku albo None."""
+    match = _SEASON_EPISODE.search(stem)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    # Znaczniki techniczne (h264, 10bit, AAC2.0, 5.1) zwykle stoją za numerem odcinka i zawierają liczby
+    cleaned = _TECHNICAL_TOKENS.sub(" ", stem)
+    match = _EPISODE_MARKER.search(stem) or _DASH_NUMBER.search(cleaned)
+    if match:
+        return None, int(match.group(1))
+    # Pierwsza samodzielna liczba poza nawiasami ([1080p], [ABCD1234], (2019) to znaczniki, a nie numer odcinka)
+    numbers = _NUMBER.findall(_BRACKETS.sub(" ", cleaned))
+    return (None, int(numbers[0])) if numbers else None
+
+
+def normalized_stem(stem):
+    return _SEPARATORS.sub(" ", _BRACKETS.sub(" ", stem)).strip().lower()
+
+
+def _same_episode(key_a, key_b):
+    if key_a is None or key_b is None or key_a[1] != key_b[1]:
+        return False
+    return key_a[0] is None or key_b[0] is None or key_a[0] == key_b[0]
+
+
+def _nearest_font_dir(fonts_by_parent, *paths):
+    """Folder czcionek najbliższy plikom: w ich katalogu, obok niego albo wyżej w drzewie."""
+    for path in paths:
+        if path is None:
+            continue
+        for directory in path.parents:
+            font_dir = fonts_by_parent.get(directory)
+            if font_dir is not None:
+                return font_dir
+    return None
+
+
+def pair_episodes(scan):
+    """
+    Dobiera do każdego MKV napisy i folder czcionek. Kolejność dopasowań: ta sama nazwa (także z dopiskiem
+    języka, np. odcinek.pl.ass), ten sam numer odcinka (i sezonu, jeśli oba go podają), a na końcu podobieństwo nazw.
+    Każdy plik napisów trafia najwyżej do jednego odcinka; niejednoznaczne numery odcinków zostawiają odcinek bez napisów.
+    """
+    unused = {subtitle: True for subtitle in scan.subtitles}
+    by_stem = {}
+    for subtitle in scan.subtitles:
+        by_stem.setdefault(subtitle.stem.lower(), []).append(subtitle)
+        base = subtitle.stem.lower().rsplit(".", 1)[0]
+        if base != subtitle.stem.lower():
+            by_stem.setdefault(base, []).append(subtitle)
+    by_episode = {}
+    subtitle_keys = {}
+    for subtitle in scan.subtitles:
+        key = episode_key(subtitle.stem)
+        subtitle_keys[subtitle] = key
+        if key is not None:
+            by_episode.setdefault(key[1], []).append(subtitle)
+
+    def take(candidates, video):
+        candidates = [c for c in candidates if unused[c]]
+        if not candidates:
+            return None
+        # Przy kilku kandydatach wygrywa plik z tego samego katalogu, a potem najbardziej podobna nazwa
+        reference = normalized_stem(video.stem)
+        best = max(candidates, key=lambda c: (c.parent == video.parent, difflib.SequenceMatcher(None, reference, normalized_stem(c.stem)).ratio()))
+        unused[best] = False
+        return best
+
+    matches = [EpisodeMatch(video) for video in scan.videos]
+    for match in matches:
+        match.subtitle = take(by_stem.get(match.video.stem.lower(), []), match.video)
+
+    video_keys = {match.video: episode_key(match.video.stem) for match in matches}
+    videos_by_episode = {}
+    for match in matches:
+        if video_keys[match.video] is not None:
+            videos_by_episode.setdefault(video_keys[match.video][1], []).append(match)
+    for match in matches:
+        key = video_keys[match.video]
+        if match.subtitle is not None or key is None:
+            continue
+        # Numer odcinka wystarcza tylko wtedy, gdy jednoznacznie wskazuje parę: jeden taki plik napisów i jeden
+        # taki odcinek bez napisów (najpierw w tym samym katalogu, a jeśli tam nie ma napisów - w całym drzewie)
+        candidates = [s for s in by_episode.get(key[1], []) if unused[s] and _same_episode(key, subtitle_keys[s])]
+        rivals = [m.video for m in videos_by_episode[key[1]] if m.subtitle is None and _same_episode(key, video_keys[m.video])]
+        local = [s for s in candidates if s.parent == match.video.parent]
+        if local:
+            candidates = local
+            rivals = [video for video in rivals if video.parent == match.video.parent]
+        if len(candidates) == 1 and len(rivals) == 1:
+            unused[candidates[0]] = False
+            match.subtitle = candidates[0]
+
+    # Podobieństwo nazw liczone jest tylko dla resztek, więc duże sezony nie płacą za porównania "każdy z każdym"
+    for match in matches:
+        if match.subtitle is None:
+            reference = normalized_stem(match.video.stem)
+            key = video_keys[match.video]
+            if key is not None and sum(1 for s in scan.subtitles if unused[s] and _same_episode(key, subtitle_keys[s])) > 1:
+                # Kilka plików napisów z numerem tego odcinka - podobieństwo nazw nie rozstrzyga, który jest właściwy
+                continue
+            best, best_ratio = None, FUZZY_THRESHOLD
+            for subtitle in (s for s in scan.subtitles if unused[s]):
+                # Podobne nazwy z różnymi numerami odcinków to różne odcinki
+                if key is not None and subtitle_keys[subtitle] is not None and not _same_episode(key, subtitle_keys[subtitle]):
+                    continue
+                matcher = difflib.SequenceMatcher(None, reference, normalized_stem(subtitle.stem))
+                if matcher.quick_ratio() >= best_ratio and matcher.ratio() >= best_ratio:
+                    best, best_ratio = subtitle, matcher.ratio()
+            if best is not None:
+                unused[best] = False
+                match.subtitle = best
+
+    # Podfolder fonts/czcionki/attachments służy katalogowi, w którym leży, a czcionki luzem - samemu katalogowi z nimi
+    font_subdirs, loose_font_dirs = {}, set()
+    for font_dir in scan.font_dirs:
+        if font_dir.name.lower() in FONT_DIR_NAMES:
+            font_subdirs.setdefault(font_dir.parent, []).append(font_dir)
+        else:
+            loose_font_dirs.add(font_dir)
+    fonts_by_parent = {
+        directory: episode_font_dir(directory, font_subdirs.get(directory, []), directory in loose_font_dirs)
+        for directory in loose_font_dirs | set(font_subdirs)
+    }
+    for match in matches:
+        match.font_dir = _nearest_font_dir(fonts_by_parent, match.subtitle, match.video)
+    return matches
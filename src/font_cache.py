@@ -0,0 +1,69 @@
+# font_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from PyQt6.QtCore import QStandardPaths
+
+class FontCache:
+    """
+    Trwały indeks czcionek w bazie SQLite: (ścieżka, rozmiar, mtime_ns) -> opis krojów z pliku
+    (nazwy, styl, pokrycie znaków) albo None dla pliku, którego nie da się odczytać.
+    Zmieniony plik nie trafi na stary wpis, a usunięte z folderu pliki są z indeksu wykreślane.
+    """
+    def __init__(self, db_path=None):
+        if db_path is None:
+            data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppLocalDataLocation)
+            db_path = os.path.join(data_dir, "font_index.sqlite")
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS fonts ("
+                " path TEXT PRIMARY KEY, folder TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " data TEXT NOT NULL, indexed_at REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS fonts_folder ON fonts(folder)")
+        return self._connection
+
+    def folder_entries(self, folder):
+        """{ścieżka: (rozmiar, mtime_ns, opis)} dla wszystkich plików zapisanych z folderu."""
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT path, size, mtime_ns, data FROM fonts WHERE folder = ?", (str(folder),)
+                ).fetchall()
+            return {path: (size, mtime_ns, json.loads(data)) for path, size, mtime_ns, data in rows}
+        except (sqlite3.Error, OSError, ValueError):
+            return {}
+
+    def update_folder(self, folder, entries, removed):
+        """Zapisuje nowe wpisy [(ścieżka, rozmiar, mtime_ns, opis)] i usuwa pliki, których w folderze już nie ma."""
+        try:
+            with self._lock:
+                connection = self._connect()
+                now = time.time()
+                connection.executemany(
+                    "INSERT OR REPLACE INTO fonts (path, folder, size, mtime_ns, data, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(path, str(folder), size, mtime_ns, json.dumps(data), now) for path, size, mtime_ns, data in entries]
+                )
+                connection.executemany("DELETE FROM fonts WHERE path = ?", [(path,) for path in removed])
+                connection.commit()
+        except (sqlite3.Error, OSError):
+            # Indeks jest tylko przyspieszeniem - błąd zapisu nie może przerwać zadania
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
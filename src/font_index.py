@@ -0,0 +1,286 @@
+# font_index.py
+# Indeks nazw czcionek w folderze i wybór plików potrzebnych napisom
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from ass_fonts import normalize_font_name, referenced_fonts
+from command_builder import FONT_SUFFIXES
+from font_cache import FontCache
+
+# Identyfikatory nazw w tabeli "name", po których libass dopasowuje czcionkę:
+# rodzina, pełna nazwa, nazwa PostScript, rodzina typograficzna
+NAME_IDS = {1, 4, 6, 16}
+FAMILY_NAME_IDS = (16, 1)
+STYLE_NAME_IDS = (17, 2)
+INDEX_WORKERS = 8
+# Ile folderów czcionek pamiętać w pamięci (najdawniej używane są zapominane; trwały indeks zostaje)
+MAX_CACHED_FOLDERS = 32
+
+# Podtabele cmap od najpełniejszej: pełny Unicode (format 12), potem tylko BMP (format 4)
+_CMAP_PREFERENCE = ((3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0))
+
+def _decode_name(platform_id, encoding_id, raw):
+    if platform_id in (0, 3):
+        return raw.decode("utf-16-be", errors="replace")
+    if platform_id == 1 and encoding_id == 0:
+        return raw.decode("mac_roman", errors="replace")
+    return None
+
+
+def _parse_name_table(data):
+    """(znormalizowane nazwy, nazwa rodziny, nazwa stylu) - rodzina i styl najlepiej w wersji angielskiej z Windows."""
+    names, preferred = set(), {}
+    if len(data) < 6:
+        return names, "", ""
+    _, count, string_offset = struct.unpack_from(">HHH", data, 0)
+    for i in range(count):
+        record_offset = 6 + i * 12
+        if record_offset + 12 > len(data):
+            break
+        platform_id, encoding_id, language_id, name_id, length, offset = struct.unpack_from(">HHHHHH", data, record_offset)
+        if name_id not in NAME_IDS and name_id not in STYLE_NAME_IDS:
+            continue
+        start = string_offset + offset
+        name = _decode_name(platform_id, encoding_id, data[start:start + length])
+        if not name:
+            continue
+        if name_id in NAME_IDS:
+            names.add(normalize_font_name(name))
+        rank = 0 if (platform_id, language_id) == (3, 0x409) else 1
+        if name_id not in preferred or rank < preferred[name_id][0]:
+            preferred[name_id] = (rank, name.strip())
+    names.discard("")
+    family = next((preferred[i][1] for i in FAMILY_NAME_IDS if i in preferred), "")
+    style = next((preferred[i][1] for i in STYLE_NAME_IDS if i in preferred), "")
+    return names, family, style
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _cmap_coverage(data):
+    """Pokrycie znaków z tabeli cmap jako posortowane, rozłączne przedziały [pierwszy, ostatni] kodów Unicode."""
+    if not data or len(data) < 4:
+        return []
+    count = struct.unpack_from(">H", data, 2)[0]
+    subtables = {}
+    for i in range(count):
+        platform_id, encoding_id, offset = struct.unpack_from(">HHI", data, 4 + i * 8)
+        subtables[(platform_id, encoding_id)] = offset
+    for key in _CMAP_PREFERENCE:
+        offset = subtables.get(key)
+        if offset is None:
+            continue
+        table_format = struct.unpack_from(">H", data, offset)[0]
+        if table_format == 12:
+            group_count = struct.unpack_from(">I", data, offset + 12)[0]
+            groups = data[offset + 16:offset + 16 + group_count * 12]
+            return _merge_ranges((start, end) for start, end, _ in struct.iter_unpack(">III", groups))
+        if table_format == 4:
+            segment_count = struct.unpack_from(">H", data, offset + 6)[0] // 2
+            ends = struct.unpack_from(f">{segment_count}H", data, offset + 14)
+            starts = struct.unpack_from(f">{segment_count}H", data, offset + 16 + segment_count * 2)
+            # Ostatni segment 0xFFFF-0xFFFF jest tylko znacznikiem końca tabeli
+            return _merge_ranges((start, end) for start, end in zip(starts, ends) if start != 0xFFFF)
+    return []
+
+
+def _face(table):
+    """Opis jednego kroju; table(znacznik) zwraca zawartość tabeli albo None."""
+    names, family, style = _parse_name_table(table(b"name") or b"")
+    if not names:
+        return None
+    weight, italic = 400, False
+    os2 = table(b"OS/2")
+    if os2 and len(os2) >= 64:
+        weight = struct.unpack_from(">H", os2, 4)[0]
+        italic = bool(struct.unpack_from(">H", os2, 62)[0] & 1)
+    return {"names": sorted(names), "family": family, "style": style, "weight": weight, "italic": italic,
+            "coverage": _cmap_coverage(table(b"cmap"))}
+
+
+def _sfnt_tables(data, base):
+    """Czytnik tabel jednej czcionki TTF/OTF (lub jednej czcionki kolekcji TTC) zaczynającej się od base."""
+    num_tables = struct.unpack_from(">H", data, base + 4)[0]
+    tables = {}
+    for i in range(num_tables):
+        tag, _, offset, length = struct.unpack_from(">4sIII", data, base + 12 + i * 16)
+        tables[tag] = (offset, length)
+
+    def table(tag):
+        if tag not in tables:
+            return None
+        offset, length = tables[tag]
+        return data[offset:offset + length]
+    return table
+
+
+def _woff_tables(data):
+    num_tables = struct.unpack_from(">H", data, 12)[0]
+    tables = {}
+    for i in range(num_tables):
+        tag, offset, comp_length, orig_length, _ = struct.unpack_from(">4sIIII", data, 44 + i * 20)
+        tables[tag] = (offset, comp_length, orig_length)
+
+    def table(tag):
+        if tag not in tables:
+            return None
+        offset, comp_length, orig_length = tables[tag]
+        raw = data[offset:offset + comp_length]
+        return zlib.decompress(raw) if comp_length < orig_length else raw
+    return table
+
+
+def read_font(path):
+    """
+    Lista krojów zapisanych w pliku (kolekcja TTC zawiera ich kilka) albo None, gdy nazw nie da się odczytać
+    (np. WOFF2, który wymaga dekompresji Brotli, albo uszkodzony plik).
+    """
+    try:
+        with open(path, "rb") as font_file:
+            # Plik jest mapowany, a nie wczytywany - z dużych kolekcji (CJK mają dziesiątki MB) czytane są tylko
+            # nagłówki i kilka potrzebnych tabel
+            with mmap.mmap(font_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                signature = data[:4]
+                if signature == b"ttcf":
+                    num_fonts = struct.unpack_from(">I", data, 8)[0]
+                    readers = [_sfnt_tables(data, offset) for offset in struct.unpack_from(f">{num_fonts}I", data, 12)]
+                elif signature in (b"\x00\x01\x00\x00", b"OTTO", b"true"):
+                    readers = [_sfnt_tables(data, 0)]
+                elif signature == b"wOFF":
+                    readers = [_woff_tables(data)]
+                else:
+                    return None
+                faces = [face for face in map(_face, readers) if face]
+        return faces or None
+    except (OSError, ValueError, struct.error, zlib.error):
+        # ValueError zgłasza też mmap dla pustego pliku
+        return None
+
+
+class FontFolderIndex:
+    """
+    Nazwa czcionki -> pliki w jednym folderze; pliki, których nazw nie udało się odczytać, są w `unreadable`.
+    `faces` to opisy krojów (nazwy, styl, pokrycie znaków) każdego odczytanego pliku.
+    """
+    def __init__(self, fonts, by_name, unreadable, faces):
+        self.fonts = fonts
+        self.by_name = by_name
+        self.unreadable = unreadable
+        self.faces = faces
+
+
+_font_cache = None
+_index_cache = OrderedDict() # folder -> (stan plików, indeks), od najdawniej używanego
+_index_lock = threading.Lock()
+_folder_locks = {}
+
+def get_font_cache():
+    global _font_cache
+    with _index_lock:
+        if _font_cache is None:
+            _font_cache = FontCache()
+        return _font_cache
+
+
+def _build_index(folder, files, cache):
+    """Indeks folderu na podstawie trwałego indeksu - czytane są tylko pliki nowe lub zmienione, równolegle."""
+    stored = cache.folder_entries(folder)
+    faces, changed = {}, []
+    for path, size, mtime_ns in files:
+        entry = stored.get(path)
+        if entry is not None and entry[:2] == (size, mtime_ns):
+            faces[path] = entry[2]
+        else:
+            changed.append((path, size, mtime_ns))
+    if changed:
+        with ThreadPoolExecutor(max_workers=min(INDEX_WORKERS, len(changed))) as executor:
+            for (path, _, _), result in zip(changed, executor.map(read_font, [path for path, _, _ in changed])):
+                faces[path] = result
+    current = {path for path, _, _ in files}
+    removed = [path for path in stored if path not in current]
+    if changed or removed:
+        cache.update_folder(folder, [(path, size, mtime_ns, faces[path]) for path, size, mtime_ns in changed], removed)
+
+    fonts, by_name, unreadable = [], {}, []
+    for path, _, _ in files:
+        font = Path(path)
+        fonts.append(font)
+        if faces[path] is None:
+            unreadable.append(font)
+            continue
+        for name in {name for face in faces[path] for name in face["names"]}:
+            by_name.setdefault(name, []).append(font)
+    return FontFolderIndex(fonts, by_name, unreadable, {Path(path): value for path, value in faces.items() if value})
+
+
+def folder_index(font_folder, cache=None):
+    """
+    Indeks czcionek folderu, wspólny dla wszystkich zadań z tym samym folderem. W pamięci zapamiętywany jest do
+    zmiany listy plików, ich rozmiarów lub czasów modyfikacji; po zmianie (albo po ponownym uruchomieniu programu)
+    odczytywane są tylko pliki, których nie ma jeszcze w trwałym indeksie. W pamięci trzymanych jest najwyżej
+    MAX_CACHED_FOLDERS ostatnio używanych folderów.
+    """
+    folder = Path(font_folder)
+    try:
+        with os.scandir(folder) as entries:
+            files = sorted(
+                (entry.path, entry.stat().st_size, entry.stat().st_mtime_ns) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in FONT_SUFFIXES
+            )
+    except OSError:
+        return FontFolderIndex([], {}, [], {})
+    state = tuple(files)
+    with _index_lock:
+        folder_lock = _folder_locks.setdefault(str(folder), threading.Lock())
+    # Równoległe zadania z tym samym folderem czekają na jedno indeksowanie zamiast powtarzać je każde osobno
+    with folder_lock:
+        with _index_lock:
+            cached = _index_cache.get(str(folder))
+            if cached:
+                _index_cache.move_to_end(str(folder))
+        if cached and cached[0] == state:
+            return cached[1]
+        index = _build_index(folder, files, cache or get_font_cache())
+        with _index_lock:
+            _index_cache[str(folder)] = (state, index)
+            _index_cache.move_to_end(str(folder))
+            while len(_index_cache) > MAX_CACHED_FOLDERS:
+                evicted, _ = _index_cache.popitem(last=False)
+                # Blokada zajęta przez trwające indeksowanie zostaje - zwolni ją jej właściciel
+                evicted_lock = _folder_locks.get(evicted)
+                if evicted_lock is not None and not evicted_lock.locked():
+                    del _folder_locks[evicted]
+    return index
+
+
+def select_fonts(subtitle_file, font_folder):
+    """
+    Zwraca (pliki czcionek do dołączenia, brakujące nazwy czcionek).
+    Dołączane są czcionki o nazwach użytych w napisach oraz te, których nazw nie udało się odczytać (na wszelki wypadek).
+    Jeśli nie wiadomo, jakich czcionek potrzebują napisy, dołączany jest cały folder - jak dawniej.
+    """
+    index = folder_index(font_folder)
+    used = referenced_fonts(subtitle_file) if subtitle_file else None
+    if used is None:
+        return list(index.fonts), []
+    selected, missing = set(index.unreadable), []
+    for name, display_name in sorted(used.items()):
+        matches = index.by_name.get(name)
+        if matches:
+            selected.update(matches)
+        else:
+            missing.append(display_name)
+    return sorted(selected), missing
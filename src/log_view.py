@@ -0,0 +1,151 @@
+# log_view.py
+from collections import deque
+from PyQt6.QtWidgets import QPlainTextEdit
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtCore import QTimer
+
+class LogView(QPlainTextEdit):
+    """
+    Okno logu przetwarzania o stałej maksymalnej liczbie linii.
+    Dane trafiają najpierw do bufora pierścieniowego, a widżet jest odświeżany zbiorczo
+    co UI_TICK_MS, więc koszt jednego dopisania nie rośnie wraz z długością kodowania.
+    Linie postępu kończone znakiem \\r są aktualizowane w miejscu, a identyczne
+    powtórzenia kolejnych linii zwijane są do licznika.
+    """
+    UI_TICK_MS = 100
+
+    def __init__(self, parent=None, max_lines=5000):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.max_lines = max_lines
+        self.setMaximumBlockCount(max_lines)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.UI_TICK_MS)
+        self._flush_timer.timeout.connect(self._flush)
+        self._reset_buffer()
+
+    def _reset_buffer(self):
+        self._lines = deque(maxlen=self.max_lines) # Elementy: [tekst, liczba powtórzeń]
+        self._first_id = 0       # Numer bezwzględny linii self._lines[0]
+        self._rendered_next = 0  # Numer pierwszej linii, której jeszcze nie ma w widżecie
+        self._dirty = set()      # Wyrenderowane już linie, które zmieniły treść
+        self._partial = {}       # Kanał -> niezakończony fragment linii
+        self._live = {}          # Kanał -> numer linii aktualizowanej w miejscu
+
+    # --- API zgodne z QTextEdit używane przez resztę programu ---
+    def append(self, text):
+        for line in str(text).split("\n"):
+            self._add_line(line)
+        self._schedule_flush()
+
+    def clear(self):
+        self._flush_timer.stop()
+        self._reset_buffer()
+        super().clear()
+
+    def write(self, text, channel=None):
+        """Dopisuje surowy strumień procesu; kanał odróżnia równoległe zadania."""
+        prefix = f"[{channel}] " if channel else ""
+        segments = (self._partial.pop(channel, "") + text).split("\n")
+        for segment in segments[:-1]:
+            self._finish_line(channel, prefix + self._visible_part(segment))
+        rest = segments[-1]
+        if rest:
+            # Niedokończona linia (np. postęp zakończony \r) jest pokazywana od razu i nadpisywana w miejscu
+            if "\r" in rest:
+                visible, rest = self._visible_part(rest), rest.rsplit("\r", 1)[1]
+            else:
+                visible = rest
+            self._partial[channel] = rest
+            if visible:
+                self._set_live(channel, prefix + visible)
+        self._schedule_flush()
+
+    @staticmethod
+    def _visible_part(segment):
+        # Z sekwencji nadpisań \r widoczny zostaje ostatni niepusty fragment
+        pieces = [piece for piece in segment.split("\r") if piece]
+        return pieces[-1] if pieces else ""
+
+    # --- Bufor pierścieniowy ---
+    def _next_id(self):
+        return self._first_id + len(self._lines)
+
+    def _add_line(self, text):
+        live_ids = set(self._live.values())
+        last_id = self._next_id() - 1
+        if self._lines and self._lines[-1][0] == text and last_id not in live_ids:
+            self._lines[-1][1] += 1
+            self._mark_dirty(last_id)
+            return last_id
+        if len(self._lines) == self.max_lines:
+            self._first_id += 1
+        self._lines.append([text, 1])
+        return self._next_id() - 1
+
+    def _update_line(self, line_id, text):
+        if line_id is None or line_id < self._first_id:
+            return False
+        self._lines[line_id - self._first_id] = [text, 1]
+        self._mark_dirty(line_id)
+        return True
+
+    def _set_live(self, channel, text):
+        if not self._update_line(self._live.get(channel), text):
+            if len(self._lines) == self.max_lines:
+                self._first_id += 1
+            self._lines.append([text, 1])
+            self._live[channel] = self._next_id() - 1
+
+    def _finish_line(self, channel, text):
+        if not self._update_line(self._live.pop(channel, None), text):
+            self._add_line(text)
+
+    def _mark_dirty(self, line_id):
+        if line_id < self._rendered_next:
+            self._dirty.add(line_id)
+
+    @staticmethod
+    def _format(entry):
+        text, count = entry
+        return f"{text} (×{count})" if count > 1 else text
+
+    # --- Odświeżanie widżetu ---
+    def _schedule_flush(self):
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush(self):
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        document = self.document()
+
+        if self._rendered_next < self._first_id:
+            # Od ostatniego odświeżenia przybyło więcej linii niż mieści bufor - prościej zbudować całość
+            self.setPlainText("\n".join(self._format(entry) for entry in self._lines))
+        else:
+            cursor = QTextCursor(document)
+            cursor.beginEditBlock()
+            is_empty = document.isEmpty()
+            rendered_first = self._rendered_next - (0 if is_empty else document.blockCount())
+            for line_id in sorted(self._dirty):
+                if line_id < max(rendered_first, self._first_id):
+                    continue
+                block = document.findBlockByNumber(line_id - rendered_first)
+                cursor.setPosition(block.position())
+                cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock, QTextCursor.MoveMode.KeepAnchor)
+                cursor.insertText(self._format(self._lines[line_id - self._first_id]))
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            for line_id in range(self._rendered_next, self._next_id()):
+                if not is_empty:
+                    cursor.insertBlock()
+                cursor.insertText(self._format(self._lines[line_id - self._first_id]))
+                is_empty = False
+            cursor.endEditBlock()
+
+        self._rendered_next = self._next_id()
+        self._dirty.clear()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
@@ -6,17 +6,25 @@ import platform
 if platform.system() == "Windows":
     import ctypes
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QPushButton, QTextEdit, QVBoxLayout, QHBoxLayout,
-    QWidget, QListWidget, QAbstractItemView, QMessageBox, QDialog,
-    QGroupBox, QSplitter, QStyleFactory, QLabel, QSystemTrayIcon, QCheckBox
+    QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout,
+    QWidget, QListView, QAbstractItemView, QMessageBox, QDialog,
+    QGroupBox, QSplitter, QStyleFactory, QLabel, QSystemTrayIcon, QCheckBox, QMenu, QFileDialog
 )
 from PyQt6.QtCore import QProcess, Qt, QSettings, QTimer, QUrl
 from PyQt6.QtGui import QIcon, QAction, QActionGroup, QGuiApplication, QDesktopServices, QPalette, QColor
 
 # Importy lokalnych modułów
-from process_manager import ProcessManager
+from app_paths import set_application_name
+from process_manager import ProcessManager, DEFAULT_RESOURCE_BUDGETS
+from log_view import LogView
 from component_selection_dialog import ComponentSelectionDialog
 from task_manager import TaskManager
+from task_queue import PRIORITY_LABELS
+from queue_journal import QueueJournal
+from task_file import batch_task_kwargs, batch_task_groups
+from task_manifest import write_manifest
+from control_server import ControlServer
+from watch_folder import WatchFolderService, load_watch_folders
 from theme_manager import get_dark_theme_qss, get_light_theme_qss, get_professional_light_theme_qss
 from version_checker import VersionChecker
 
@@ -75,14 +83,34 @@ class MainWindow(QMainWindow):
         self.process_manager = ProcessManager(self.task_manager, self.output_window, self.rpc_manager, debug_mode=False)
         self.task_manager.process_manager = self.process_manager
         self.rpc_manager.task_manager = self.task_manager
+        self.control_server = None
+        self.watch_folders = WatchFolderService(self.settings, lambda mkv_path: any(task.mkv_file == mkv_path for task in self.task_manager.tasks), self)
+        self.watch_folders.tasks_ready.connect(self.add_watch_folder_tasks)
+        self.watch_folders.message.connect(lambda text: self.output_window.append(f">>> {text}"))
         self.process_manager.eta_updated.connect(self.update_eta_display)
         self.tray_icon = QSystemTrayIcon(QIcon("icon/icon.svg"), self)
         self.process_manager.queue_finished.connect(self.show_queue_finished_notification)
 
         self.create_menu_bar()
         self.load_settings()
+        self.restore_queue()
         self.check_for_updates()
 
+    def restore_queue(self):
+        result = self.task_manager.attach_journal(QueueJournal(parent=self))
+        if result is None:
+            self.output_window.append(">>> Dziennik kolejki jest używany przez inną instancję programu - ta kolejka nie będzie zapisywana.")
+            return
+        restored, interrupted = result
+        if not restored:
+            return
+        message = f">>> Przywrócono {restored} zadań z poprzedniej sesji."
+        if interrupted:
+            message += f" Przerwane zadania ({interrupted}) zostaną wykonane ponownie."
+        # Start zadania czyści log, więc komunikat dopisywany jest dopiero po nim
+        self.process_manager.process_next_task()
+        self.output_window.append(message)
+
     def check_for_updates(self):
         if self.settings.value("update_check/enabled", True, type=bool):
             self.version_checker = VersionChecker(self)
@@ -138,9 +166,8 @@ class MainWindow(QMainWindow):
         self.button = QPushButton("Otwórz okno wyboru komponentów", self)
         self.refresh_button = QPushButton("Odśwież", self)
         self.refresh_button.setMaximumWidth(100)
-        self.output_window = QTextEdit(self)
-        self.output_window.setReadOnly(True)
-        self.task_list = QListWidget(self)
+        self.output_window = LogView(self, max_lines=self.settings.value("log/max_lines", 5000, type=int))
+        self.task_list = QListView(self)
         self.task_list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.cancel_button = QPushButton("Anuluj wybrane zadanie", self)
         self.eta_label = QLabel("Czas do końca: -")
@@ -175,6 +202,8 @@ class MainWindow(QMainWindow):
         self.button.clicked.connect(self.open_component_selection_dialog)
         self.refresh_button.clicked.connect(self.refresh_program)
         self.cancel_button.clicked.connect(self.show_cancel_confirmation)
+        self.task_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.task_list.customContextMenuRequested.connect(self.show_task_context_menu)
 
     def create_menu_bar(self):
         menu_bar = self.menuBar()
@@ -183,6 +212,9 @@ class MainWindow(QMainWindow):
         settings_action = QAction("Ustawienia...", self)
         settings_action.triggered.connect(self.open_settings_window)
         options_menu.addAction(settings_action)
+        export_action = QAction("Eksportuj kolejkę do pliku...", self)
+        export_action.triggered.connect(self.export_queue)
+        options_menu.addAction(export_action)
         options_menu.addSeparator()
 
         theme_menu = options_menu.addMenu("Motyw")
@@ -227,6 +259,22 @@ class MainWindow(QMainWindow):
         about_action.triggered.connect(self.show_about_dialog)
         menu_bar.addAction(about_action)
 
+    def export_queue(self):
+        """Zapisuje kolejkę jako manifest JSON, który można później wczytać przez import zadań."""
+        if not self.task_manager.has_tasks():
+            QMessageBox.information(self, "Eksport kolejki", "Kolejka zadań jest pusta.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Eksportuj kolejkę", self.settings.value("last_used_directory", ""),
+                                              "Manifest JSON (*.json);;JSON Lines (*.jsonl)")
+        if not path:
+            return
+        try:
+            count = write_manifest(path, self.task_manager.tasks)
+        except OSError as e:
+            QMessageBox.critical(self, "Błąd", f"Nie udało się zapisać pliku: {e}")
+            return
+        self.output_window.append(f">>> Zapisano {count} zadań do pliku {path}.")
+
     def open_settings_window(self, open_to_tab=None):
         dialog = SettingsWindow(self.settings, self.plugin_manager, self.output_window, self, version=self.app_version, is_flatpak=self.is_flatpak)
         if open_to_tab is not None:
@@ -256,6 +304,35 @@ class MainWindow(QMainWindow):
         rpc_enabled = self.settings.value("discord_rpc_enabled", False, type=bool)
         self.discord_rpc_action.setChecked(rpc_enabled)
 
+        max_parallel_jobs = self.settings.value("processing/max_parallel_jobs", 1, type=int)
+        self.process_manager.single_pass_remux_hardsub = self.settings.value("processing/single_pass_remux_hardsub", False, type=bool)
+        self.process_manager.segment_count = self.settings.value("processing/segment_count", 1, type=int)
+        self.process_manager.skip_up_to_date = self.settings.value("processing/skip_up_to_date", True, type=bool)
+        self.process_manager.attach_used_fonts_only = self.settings.value("processing/attach_used_fonts_only", True, type=bool)
+        self.process_manager.set_max_parallel_jobs(max_parallel_jobs)
+        self.process_manager.set_resource_budgets({
+            resource_class: self.settings.value(f"processing/budget_{resource_class}", default, type=int)
+            for resource_class, default in DEFAULT_RESOURCE_BUDGETS.items()
+        })
+        self.set_control_server_enabled(self.settings.value("control/enabled", False, type=bool))
+        self.watch_folders.set_folders(load_watch_folders(self.settings))
+
+    def add_watch_folder_tasks(self, batch, folder):
+        self.task_manager.add_tasks(batch)
+        self.process_manager.process_next_task()
+        self.output_window.append(f">>> Obserwowany folder {folder}: dodano zadania ({len(batch)}).")
+
+    def set_control_server_enabled(self, enabled):
+        if not enabled:
+            if self.control_server:
+                self.control_server.stop()
+            return
+        if self.control_server is None:
+            self.control_server = ControlServer(self.task_manager, self.process_manager, self)
+        error = self.control_server.start()
+        if error:
+            self.output_window.append(f">>> Nie udało się uruchomić lokalnego API sterowania: {error}")
+
     def open_component_selection_dialog(self):
         use_per_option_paths = self.use_per_option_paths_action.isChecked()
         dialog = ComponentSelectionDialog(use_per_option_paths, self)
@@ -266,18 +343,9 @@ class MainWindow(QMainWindow):
             if dialog.batch_tasks:
                 # Dla zadań wsadowych podsumowanie jest niepraktyczne, dodajemy bezpośrednio
                 default_subtitle_name = self.settings.value("remux/subtitle_track_name", "")
-                for task_data in dialog.batch_tasks:
-                    (mkv_file, subtitle_file, font_folder, selected_script,
-                     selected_ffmpeg_script, gpu_bitrate, debug_mode,
-                     intro_file, output_path) = task_data
-                    
-                    self.task_manager.add_task(
-                        mkv_file, subtitle_file, font_folder,
-                        selected_script, selected_ffmpeg_script,
-                        gpu_bitrate, debug_mode, intro_file, output_path,
-                        subtitle_track_name=default_subtitle_name,
-                        movie_name=""
-                    )
+                # Cała paczka trafia do modelu jednym wstawieniem na każdy priorytet podany w manifeście
+                for priority, group in batch_task_groups(dialog.batch_tasks):
+                    self.task_manager.add_tasks([batch_task_kwargs(task_data, default_subtitle_name) for task_data in group], priority)
             # --- Logika dla pojedynczego zadania ---
             else:
                 task_details = {
@@ -305,8 +373,7 @@ class MainWindow(QMainWindow):
                 if do_add_task:
                     self.task_manager.add_task(**task_details)
 
-            if not self.process_manager.is_running():
-                self.process_manager.process_next_task()
+            self.process_manager.process_next_task()
 
     def apply_theme(self, theme_name, save=True):
         app = QApplication.instance()
@@ -387,6 +454,12 @@ class MainWindow(QMainWindow):
                 event.ignore()
                 return
         self.process_manager.kill_process()
+        self.process_manager.shutdown()
+        if self.control_server:
+            self.control_server.stop()
+        self.watch_folders.stop()
+        if self.task_manager.journal:
+            self.task_manager.journal.close()
         self.rpc_manager.stop()
         super().closeEvent(event)
 
@@ -398,15 +471,43 @@ class MainWindow(QMainWindow):
             self.eta_label.setText(f"Czas do końca: {h:02d}:{m:02d}:{s:02d}")
             self.eta_label.setVisible(True)
 
+    def show_task_context_menu(self, position):
+        index = self.task_list.indexAt(position)
+        task = self.task_manager.task_at_row(index.row())
+        if not task:
+            return
+        self.task_list.setCurrentIndex(index)
+        task_id = task.task_id
+        menu = QMenu(self)
+        is_pending = self.task_manager.queue.is_pending(task_id)
+        front_action = menu.addAction("Przenieś na początek kolejki")
+        front_action.triggered.connect(lambda: self.task_manager.move_to_front(task_id))
+        back_action = menu.addAction("Przenieś na koniec kolejki")
+        back_action.triggered.connect(lambda: self.task_manager.move_to_back(task_id))
+        priority_menu = menu.addMenu("Priorytet")
+        for priority, label in PRIORITY_LABELS.items():
+            action = priority_menu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(task.priority == priority)
+            action.triggered.connect(lambda checked, p=priority: self.task_manager.set_priority(task_id, p))
+        # Kolejność i priorytet mają znaczenie tylko dla zadań, które jeszcze nie wystartowały
+        for item in (front_action, back_action, priority_menu.menuAction()):
+            item.setEnabled(is_pending)
+        menu.addSeparator()
+        menu.addAction("Anuluj zadanie", self.show_cancel_confirmation)
+        menu.exec(self.task_list.viewport().mapToGlobal(position))
+
     def show_cancel_confirmation(self):
-        selected_row = self.task_list.currentRow()
+        selected_row = self.task_list.currentIndex().row()
         if selected_row == -1:
             QMessageBox.warning(self, "Uwaga", "Najpierw zaznacz zadanie na liście.")
             return
-        task = self.task_manager.get_task(selected_row)
+        task = self.task_manager.task_at_row(selected_row)
         if not task:
             return
-        is_active = selected_row == 0 and self.process_manager.is_running()
+        # Od tego miejsca zadanie jest wskazywane po ID - wiersz mógł się przesunąć, gdy okno było otwarte
+        task_id = task.task_id
+        is_active = self.process_manager.is_task_running(task)
         
         msg_box = QMessageBox(self)
         msg_box.setIcon(QMessageBox.Icon.Question)
@@ -420,11 +521,7 @@ class MainWindow(QMainWindow):
         if msg_box.clickedButton() == no_button:
             return
 
-        self.task_manager.remove_task(selected_row)
-        if is_active:
-            self.process_manager.kill_process_and_advance()
-        elif not self.process_manager.is_running():
-            self.process_manager.process_next_task()
+        self.process_manager.cancel_task(task_id)
 
     def show_queue_finished_notification(self):
         self.tray_icon.show()
@@ -453,8 +550,9 @@ class MainWindow(QMainWindow):
         QMessageBox.about(self, "O programie", f"Automatyzer by kacper12gry\nVersion {self.app_version}\n\nInteligentny automatyzer przepływów pracy wideo.\nZaprojektowany, by przyspieszyć i ułatwić zadania takie jak remux kontenerów MKV, wypalanie napisów oraz dodawanie wstawek.\n\nDziała na: {platform_name}")
 
     def refresh_program(self):
-        self.close()
-        QProcess.startDetached(sys.executable, sys.argv)
+        # Zamknięcie może zostać anulowane w closeEvent - wtedy nie uruchamiamy drugiej instancji
+        if self.close():
+            QProcess.startDetached(sys.executable, sys.argv)
 
 if __name__ == "__main__":
     QGuiApplication.setDesktopFileName('pl.com.github.kacper12gry.automatyzer')
@@ -462,6 +560,7 @@ if __name__ == "__main__":
         myappid = 'com.github.kacper12gry.automatyzer'
         ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
     app = QApplication(sys.argv)
+    set_application_name()
     original_style_name, original_stylesheet = app.style().objectName(), app.styleSheet()
     window = MainWindow(original_style_name, original_stylesheet)
     window.show()
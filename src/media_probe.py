@@ -0,0 +1,219 @@
+# media_probe.py
+import json
+import os
+import platform
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+from probe_cache import ProbeCache
+
+@dataclass
+class ProbeResult:
+    """Wynik pojedynczego wywołania ffprobe (format + ścieżki) dla jednego pliku."""
+    path: Path
+    format: dict = field(default_factory=dict)
+    streams: list = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def duration(self):
+        try:
+            return float(self.format.get('duration', 0))
+        except (ValueError, TypeError):
+            return 0.0
+
+    @property
+    def video_framerate(self):
+        video = next((s for s in self.streams if s.get('codec_type') == 'video'), None)
+        return video.get('r_frame_rate') if video else None
+
+    @property
+    def start_time(self):
+        try:
+            return float(self.format.get('start_time', 0))
+        except (ValueError, TypeError):
+            return 0.0
+
+    @property
+    def track_count(self):
+        return sum(1 for s in self.streams if s.get('codec_type') != 'attachment')
+
+
+def run_ffprobe(path):
+    """Blokujące wywołanie ffprobe - używane wyłącznie w wątkach roboczych."""
+    command = ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_streams", "-show_format", str(path)]
+    try:
+        if platform.system() == "Windows":
+            # Ukryj okno konsoli w systemie Windows
+            result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8', timeout=60, creationflags=subprocess.CREATE_NO_WINDOW)
+        else:
+            result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8', timeout=60)
+        data = json.loads(result.stdout)
+        return ProbeResult(Path(path), data.get('format', {}), data.get('streams', []))
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return ProbeResult(Path(path), error="Nie można uruchomić ffprobe.")
+    except Exception as e:
+        return ProbeResult(Path(path), error=str(e))
+
+
+def find_keyframes(path, times, start_time=0.0):
+    """
+    Dla każdego czasu zwraca najbliższą wcześniejszą klatkę kluczową ścieżki wideo (sekundy od początku pliku).
+    ffprobe przeskakuje do każdego punktu (-read_intervals) i czyta jeden pakiet, więc plik nie jest skanowany w całości.
+    """
+    if not times:
+        return []
+    intervals = ",".join(f"{start_time + t:.3f}%+#1" for t in times)
+    command = ["ffprobe", "-v", "quiet", "-select_streams", "v:0", "-read_intervals", intervals,
+               "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(path)]
+    try:
+        if platform.system() == "Windows":
+            result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8', timeout=120, creationflags=subprocess.CREATE_NO_WINDOW)
+        else:
+            result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8', timeout=120)
+    except Exception:
+        return []
+    keyframes = set()
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.strip().partition(",")
+        if "K" not in flags:
+            continue
+        try:
+            keyframes.add(round(float(pts_time) - start_time, 6))
+        except ValueError:
+            continue
+    return sorted(keyframes)
+
+
+def probe_with_cache(path, cache):
+    """Zwraca wynik z trwałej pamięci podręcznej, a ffprobe uruchamia tylko dla nowych lub zmienionych plików."""
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        return ProbeResult(Path(path), error=str(e))
+    data = cache.get(path, stat.st_size, stat.st_mtime_ns)
+    if data is not None:
+        return ProbeResult(Path(path), data.get('format', {}), data.get('streams', []))
+    result = run_ffprobe(path)
+    if result.ok:
+        cache.put(path, stat.st_size, stat.st_mtime_ns, {'format': result.format, 'streams': result.streams})
+    return result
+
+
+class MediaProbeService(QObject):
+    """
+    Wspólna usługa odczytu informacji o plikach wideo.
+    Każdy plik jest badany jednym wywołaniem ffprobe w puli wątków, a wynik jest zapamiętywany
+    w pamięci i w trwałej bazie (ProbeCache), więc zadanie może zlecić odczyt przy dodaniu do kolejki i nie czekać na niego przy starcie.
+    Wynik w pamięci obowiązuje tylko dla tego samego rozmiaru i czasu modyfikacji pliku; pamiętanych jest najwyżej MAX_REMEMBERED plików.
+    """
+    _result_ready = pyqtSignal(object, object)
+    MAX_REMEMBERED = 1024
+
+    def __init__(self, max_workers=4, cache=None):
+        super().__init__()
+        self.cache = cache or ProbeCache()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ffprobe")
+        # ścieżka -> ((rozmiar, mtime_ns), future), od najdawniej używanej
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        # Połączenie kolejkowane: wywołania zwrotne zawsze trafiają do wątku GUI
+        self._result_ready.connect(self._deliver)
+
+    def prefetch(self, path):
+        if not path:
+            return None
+        key = str(path)
+        signature = self._signature(path)
+        with self._lock:
+            entry = self._futures.get(key)
+            is_new = entry is None or entry[0] != signature
+            if is_new:
+                # Plik podmieniony lub dopisany od poprzedniego odczytu - stary wynik już go nie opisuje
+                future = self._executor.submit(probe_with_cache, path, self.cache)
+                self._futures[key] = (signature, future)
+                while len(self._futures) > self.MAX_REMEMBERED:
+                    self._futures.popitem(last=False)
+            else:
+                future = entry[1]
+            self._futures.move_to_end(key)
+        if is_new:
+            # Poza blokadą: zakończone już zadanie wywołuje callback natychmiast, w tym wątku
+            future.add_done_callback(lambda f: self._forget_failed(key, f))
+        return future
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _forget_failed(self, key, future):
+        # Nieudany odczyt (np. plik jeszcze się kopiuje) nie może zostać zapamiętany na stałe
+        if future.result().ok:
+            return
+        with self._lock:
+            entry = self._futures.get(key)
+            if entry is not None and entry[1] is future:
+                del self._futures[key]
+
+    def probe(self, path):
+        """Blokujący odczyt dla wątków roboczych; współdzieli wyniki i trwające odczyty z prefetch()."""
+        return self.prefetch(path).result()
+
+    def cached(self, path):
+        """Zwraca gotowy wynik bez czekania albo None, jeśli odczyt jeszcze trwa."""
+        if not path:
+            return None
+        signature = self._signature(path)
+        with self._lock:
+            entry = self._futures.get(str(path))
+        if entry is not None and entry[0] == signature and entry[1].done():
+            return entry[1].result()
+        return None
+
+    def request(self, path, callback):
+        """Wywołuje callback(ProbeResult) w wątku GUI, gdy wynik będzie gotowy."""
+        self.prefetch(path).add_done_callback(lambda f: self._result_ready.emit(callback, f.result()))
+
+    def request_keyframes(self, path, times, callback, start_time=0.0):
+        """Wyszukuje klatki kluczowe w puli wątków i wywołuje callback(lista) w wątku GUI."""
+        future = self._executor.submit(find_keyframes, path, times, start_time)
+        future.add_done_callback(lambda f: self._result_ready.emit(callback, f.result()))
+
+    def request_call(self, function, callback, *args):
+        """Wykonuje function(*args) w puli wątków i wywołuje callback(wynik) w wątku GUI."""
+        future = self._executor.submit(function, *args)
+        future.add_done_callback(lambda f: self._result_ready.emit(callback, f.result()))
+
+    def invalidate(self, path):
+        with self._lock:
+            self._futures.pop(str(path), None)
+
+    @pyqtSlot(object, object)
+    def _deliver(self, callback, result):
+        callback(result)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.cache.close()
+
+
+_probe_service = None
+
+def get_probe_service():
+    """Zwraca wspólną instancję usługi. Pierwsze wywołanie musi nastąpić w wątku GUI."""
+    global _probe_service
+    if _probe_service is None:
+        _probe_service = MediaProbeService()
+    return _probe_service
@@ -1,7 +1,6 @@
-import json
-import subprocess
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QPushButton, QApplication, QScrollArea)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from media_probe import get_probe_service
 
 class MkvInfoWorker(QThread):
     """Wątek do odczytywania informacji o pliku MKV w tle."""
@@ -10,6 +9,8 @@ class MkvInfoWorker(QThread):
     def __init__(self, mkv_path):
         super().__init__()
         self.mkv_path = mkv_path
+        # Pobierane w wątku GUI - usługa współdzieli wyniki z kolejką zadań
+        self.probe_service = get_probe_service()
 
     def _format_bitrate(self, bitrate_str):
         """Inteligentnie formatuje bitrate do kbps lub Mbps."""
@@ -28,16 +29,14 @@ class MkvInfoWorker(QThread):
 
     def run(self):
         try:
-            command = [
-                "ffprobe", "-v", "quiet", "-print_format", "json",
-                "-show_streams", "-show_format", str(self.mkv_path)
-            ]
-            result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8')
-            data = json.loads(result.stdout)
+            probe = self.probe_service.probe(self.mkv_path)
+            if not probe.ok:
+                self.info_ready.emit(f"<b>Błąd:</b> {probe.error}")
+                return
 
             output_lines = [f"<h3>{self.mkv_path.name}</h3>"]
 
-            format_info = data.get('format', {})
+            format_info = probe.format
             duration_sec = float(format_info.get('duration', 0))
             size_mb = float(format_info.get('size', 0)) / (1024 * 1024)
             total_bitrate = self._format_bitrate(format_info.get('bit_rate'))
@@ -51,7 +50,7 @@ class MkvInfoWorker(QThread):
             output_lines.append("<hr>")
 
             output_lines.append("<b>Ścieżki w pliku:</b>")
-            for stream in data.get('streams', []):
+            for stream in probe.streams:
                 codec_type = stream.get('codec_type', 'nieznany')
 
                 # --- KLUCZOWA POPRAWKA: IGNORUJEMY ZAŁĄCZNIKI ---
@@ -88,8 +87,6 @@ class MkvInfoWorker(QThread):
 
             self.info_ready.emit("<br>".join(output_lines))
 
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            self.info_ready.emit("<b>Błąd:</b> Nie można uruchomić ffprobe.")
         except Exception as e:
             self.info_ready.emit(f"<b>Błąd odczytu informacji:</b><br>{e}")
 
@@ -0,0 +1,59 @@
+# presets.py
+# Odczyt presetów zapisanych w settings.ini (grupa "presets/<nazwa>") bez zależności od okien dialogowych
+from pathlib import Path
+
+PRESET_DEFAULTS = {
+    "selected_script": 3,
+    "selected_ffmpeg_script": 1,
+    "gpu_bitrate": 8,
+    "subtitle_track_name": "",
+    "movie_name": "",
+    "keep_movie_name": False,
+    "debug_mode": False,
+    "custom_output": False,
+    "output_dir": "",
+}
+
+def preset_names(settings):
+    settings.beginGroup("presets")
+    names = settings.childGroups()
+    settings.endGroup()
+    return sorted(names)
+
+
+def load_preset(settings, name):
+    """Zwraca słownik wartości presetu albo None, jeśli presetu nie ma."""
+    if name not in preset_names(settings):
+        return None
+    settings.beginGroup(f"presets/{name}")
+    preset = {key: settings.value(key, default, type=type(default)) for key, default in PRESET_DEFAULTS.items()}
+    settings.endGroup()
+    return preset
+
+
+def default_output_name(mkv_file, selected_script):
+    extension = ".mp4" if selected_script in [1, 4] else ".mkv"
+    return f"{Path(mkv_file).stem}{extension}"
+
+
+def preset_task_kwargs(preset, mkv_file, subtitle_file=None, font_folder=None, intro_file=None):
+    """Argumenty TaskManager.add_tasks dla pliku przetwarzanego według presetu (jak po wybraniu go w oknie zadania)."""
+    selected_script = preset["selected_script"]
+    output_path = None
+    # Skrypt 2 nigdy nie używa niestandardowej ścieżki wyjściowej
+    if preset["custom_output"] and preset["output_dir"] and selected_script != 2:
+        output_path = Path(preset["output_dir"]) / default_output_name(mkv_file, selected_script)
+    return {
+        "mkv_file": mkv_file,
+        "subtitle_file": subtitle_file,
+        "font_folder": font_folder,
+        "selected_script": selected_script,
+        "selected_ffmpeg_script": preset["selected_ffmpeg_script"],
+        "gpu_bitrate": preset["gpu_bitrate"],
+        "debug_mode": preset["debug_mode"],
+        "intro_file": intro_file if selected_script == 4 else None,
+        "output_path": output_path,
+        "subtitle_track_name": preset["subtitle_track_name"],
+        # Spacja oznacza zachowanie oryginalnego tytułu (tak samo jak w oknie wyboru komponentów)
+        "movie_name": " " if preset["keep_movie_name"] else preset["movie_name"],
+    }
@@ -0,0 +1,78 @@
+# probe_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from PyQt6.QtCore import QStandardPaths
+
+class ProbeCache:
+    """
+    Trwała pamięć podręczna wyników ffprobe w bazie SQLite.
+    Kluczem jest (ścieżka, rozmiar, mtime_ns), więc podmieniony plik nigdy nie trafi na stary wpis.
+    Po przekroczeniu limitu usuwane są najdawniej używane wpisy (LRU).
+    """
+    def __init__(self, db_path=None, max_entries=5000):
+        if db_path is None:
+            data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppLocalDataLocation)
+            db_path = os.path.join(data_dir, "probe_cache.sqlite")
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir)
+            # Dostęp z wielu wątków puli ffprobe jest serializowany blokadą
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " data TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS probes_last_used ON probes(last_used)")
+        return self._connection
+
+    def get(self, path, size, mtime_ns):
+        try:
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT data FROM probes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                    (str(path), size, mtime_ns)
+                ).fetchone()
+                if row is None:
+                    return None
+                connection.execute("UPDATE probes SET last_used = ? WHERE path = ?", (time.time(), str(path)))
+                connection.commit()
+            return json.loads(row[0])
+        except (sqlite3.Error, OSError, ValueError):
+            return None
+
+    def put(self, path, size, mtime_ns, data):
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO probes (path, size, mtime_ns, data, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (str(path), size, mtime_ns, json.dumps(data), time.time())
+                )
+                connection.execute(
+                    "DELETE FROM probes WHERE path IN ("
+                    " SELECT path FROM probes ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                connection.commit()
+        except (sqlite3.Error, OSError):
+            # Pamięć podręczna jest tylko przyspieszeniem - błąd zapisu nie może przerwać zadania
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
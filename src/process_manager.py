@@ -1,367 +1,602 @@
 # process_manager.py
 import os
-import re
+import shutil
+import threading
 from pathlib import Path
-from datetime import datetime
-from PyQt6.QtCore import QObject, QProcess, pyqtSignal, QStandardPaths
+from PyQt6.QtCore import QObject, QProcess, pyqtSignal, QStandardPaths, QTimer
 import platform
-import subprocess
+from task_manager import RESOURCE_IO, RESOURCE_CPU, RESOURCE_GPU
+from media_probe import get_probe_service
+from progress_parser import ProcessProgress
+from debug_log import DebugLogWriter
+from segmented_encode import target_cut_times, plan_segments, segment_threads, write_concat_list
+from stage_registry import StageRegistry, stage_key
+from command_builder import (CPU_VIDEO_OPTIONS, REMUX_STREAM_MAPS, subtitle_filter, remux_output_path, hardsub_output_path,
+                             intro_output_path, mkvmerge_args, ffmpeg_hardsub_args, ffmpeg_intro_args)
+from font_index import get_font_cache, select_fonts
+from recipe import task_recipe, tool_versions, is_up_to_date, write_sidecar, remove_sidecar
+
+DEFAULT_RESOURCE_BUDGETS = {RESOURCE_IO: 3, RESOURCE_CPU: 1, RESOURCE_GPU: 1}
+
+class ProcessSlot:
+    """Jedno miejsce w puli zadań: własne procesy, stan ETA i strumień logu."""
+    def __init__(self, slot_id, task):
+        self.slot_id = slot_id
+        self.task = task
+        self.debug_mode = task.debug_mode
+        self.processes = [] # Procesy bieżącego etapu; etap kończy się, gdy zakończą się wszystkie
+        self.stage_success = True
+        self.has_started = False
+        self.is_preparing = False # Proces zostanie uruchomiony po zakończeniu odczytu w tle (np. klatek kluczowych)
+        self.chained_command_info = None
+        self.total_duration_seconds = 0
+        self.progress = {} # Postęp każdego procesu bieżącego etapu
+        self.temp_paths = [] # Pliki tymczasowe usuwane po zakończeniu zadania
+        self.recipe = None # (plik wyjściowy, odcisk przepisu) zapisywany obok wyniku po sukcesie
+        self.fonts = None # Czcionki dołączane przez mkvmerge; None oznacza cały folder czcionek
+        self.log_stream = DebugLogWriter.stream_name(Path(task.mkv_file).stem if task.mkv_file else f"slot{slot_id}")
+
+    @property
+    def label(self):
+        return f"#{self.slot_id}"
+
+    @property
+    def eta_seconds(self):
+        # Procesy etapu biegną równolegle, więc etap kończy się razem z najwolniejszym
+        etas = [p.eta_seconds for p in self.progress.values() if p.eta_seconds is not None]
+        return max(etas) if etas else -1
+
+    @property
+    def fraction(self):
+        # Jak przy ETA: postęp etapu wyznacza najwolniejszy z równoległych procesów
+        fractions = [p.fraction for p in self.progress.values()]
+        return min(fractions) if fractions else 0.0
+
+    @property
+    def current_ffmpeg_speed(self):
+        speeds = [p.snapshot.get("speed") for p in self.progress.values() if p.snapshot.get("speed")]
+        return f"{speeds[0]:g}x" if speeds else None
+
+    def is_running(self):
+        return any(process.state() == QProcess.ProcessState.Running for process in self.processes)
+
 
 class ProcessManager(QObject):
     eta_updated = pyqtSignal(int)
     log_message = pyqtSignal(str)
     queue_finished = pyqtSignal()
+    task_started = pyqtSignal(object)
+    task_progress = pyqtSignal(object, float, int) # zadanie, postęp bieżącego etapu 0..1, ETA w sekundach (-1 = nieznane)
+    task_finished = pyqtSignal(object, bool)
 
-    def __init__(self, task_manager, output_window, rpc_manager, debug_mode=False):
+    def __init__(self, task_manager, output_window, rpc_manager, debug_mode=False, max_parallel_jobs=1):
         super().__init__()
         self.task_manager = task_manager
         self.output_window = output_window
         self.rpc_manager = rpc_manager
-        self.process = None
-        self.debug_mode = False # Domyślnie, ustawiane per zadanie
+        self.slots = [] # Aktywne miejsca w puli, każde obsługuje jedno zadanie
+        self.max_parallel_jobs = max(1, max_parallel_jobs)
+        self.resource_budgets = dict(DEFAULT_RESOURCE_BUDGETS)
+        self.single_pass_remux_hardsub = False
+        self.segment_count = 1 # Więcej niż 1 włącza kodowanie CPU jednego pliku w równoległych segmentach
+        self.skip_up_to_date = True
+        self.attach_used_fonts_only = True
         log_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppLocalDataLocation)
-        self.log_file_path = os.path.join(log_dir, "debug_log.txt")
-        self.current_task = None
+        self.debug_log = DebugLogWriter(os.path.join(log_dir, "debug_logs"))
         self.is_windows = platform.system() == "Windows"
-        self.chained_command_info = None
-        self.total_duration_seconds = 0
-        self.start_time = None
-        self.current_ffmpeg_speed = None
+        self.probe_service = get_probe_service()
+        self.stage_registry = StageRegistry()
+        # Wersje narzędzi wchodzą do odcisku przepisu; odczyt w tle, żeby start pierwszego zadania nie czekał
+        threading.Thread(target=tool_versions, daemon=True).start()
+
+    def set_max_parallel_jobs(self, count):
+        self.max_parallel_jobs = max(1, int(count))
+        # Zwiększenie puli od razu uruchamia kolejne oczekujące zadania
+        self.process_next_task()
 
-    def _start_process(self, program, arguments):
-        if self.process is None:
-            self.output_window.clear()
-        self.process = QProcess()
-        self.process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
-        self.process.readyRead.connect(self.update_output)
-        self.process.finished.connect(self._on_process_finished)
-        self.process.start(program, arguments)
-        self.task_manager.update_list_widget()
-        return self.process
-
-    def _run_ffprobe_command(self, command):
-        try:
-            if self.is_windows:
-                # Ukryj okno konsoli w systemie Windows
-                result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=10, creationflags=subprocess.CREATE_NO_WINDOW)
-            else:
-                result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=10)
-            return result.stdout.strip()
-        except Exception as e:
-            self.log_debug(f"Błąd ffprobe: {e}")
-            return None
-
-    # --- KRYTYCZNA POPRAWKA ---
-    def _get_video_duration(self, video_path):
-        if not video_path:
-            return 0.0
-        command = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', str(video_path)]
-        duration_str = self._run_ffprobe_command(command)
+    def set_resource_budgets(self, budgets):
+        for resource_class, limit in budgets.items():
+            self.resource_budgets[resource_class] = max(1, int(limit))
+        self.process_next_task()
 
-        try:
-            return float(duration_str)
-        except (ValueError, TypeError):
-            self.log_message.emit(f"OSTRZEŻENIE: Nie udało się odczytać czasu trwania z pliku '{video_path.name}'. Może być uszkodzony.")
-            return 0.0
-
-    def _get_video_framerate(self, video_path):
-        if not video_path:
-            return None
-        command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=r_frame_rate', '-of', 'default=noprint_wrappers=1:nokey=1', str(video_path)]
-        return self._run_ffprobe_command(command)
-
-    def _parse_ffmpeg_time(self, output):
-        speed_match = re.search(r"speed=\s*([\d.]+)x", output)
-        if speed_match:
-            self.current_ffmpeg_speed = f"{speed_match.group(1)}x"
-        if not self.total_duration_seconds or not self.start_time:
+    def _can_admit(self, task):
+        resource_class = task.resource_class
+        in_use = sum(1 for slot in self.slots if slot.task.resource_class == resource_class)
+        return in_use < self.resource_budgets.get(resource_class, 1)
+
+    @property
+    def current_ffmpeg_speed(self):
+        speeds = [slot.current_ffmpeg_speed for slot in self.slots if slot.current_ffmpeg_speed]
+        return speeds[0] if speeds else None
+
+    def running_tasks(self):
+        return [slot.task for slot in self.slots]
+
+    def is_task_running(self, task):
+        return self._find_slot(task) is not None
+
+    def _find_slot(self, task):
+        return next((slot for slot in self.slots if slot.task is task), None)
+
+    def _next_slot_id(self):
+        used_ids = {slot.slot_id for slot in self.slots}
+        slot_id = 1
+        while slot_id in used_ids:
+            slot_id += 1
+        return slot_id
+
+    def _start_process(self, slot, program, arguments, duration=None):
+        slot.has_started = True
+        slot.is_preparing = False
+        process = QProcess()
+        slot.progress[process] = ProcessProgress(duration)
+        if program == "ffmpeg":
+            # Postęp w formacie key=value trafia na osobny potok (stdout); czytelny stderr służy już tylko do logu.
+            # -nostdin: FFmpeg nigdy nie czeka na odpowiedź z otwartego potoku wejścia (np. pytanie o nadpisanie pliku)
+            arguments = ["-nostdin", "-progress", "pipe:1", *arguments]
+            process.setProcessChannelMode(QProcess.ProcessChannelMode.SeparateChannels)
+            process.readyReadStandardOutput.connect(lambda s=slot, p=process: self._on_ffmpeg_progress(s, p))
+            process.readyReadStandardError.connect(lambda s=slot, p=process: self.update_output(s, p))
+        elif program == "mkvmerge":
+            # Tryb GUI wypisuje postęp jako "#GUI#progress N%", co pozwala liczyć ETA także dla remuxu
+            arguments = ["--gui-mode", *arguments]
+            process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+            process.readyRead.connect(lambda s=slot, p=process: self._on_mkvmerge_output(s, p))
+        else:
+            process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+            process.readyRead.connect(lambda s=slot, p=process: self.update_output(s, p))
+        process.finished.connect(lambda exit_code, exit_status, s=slot, p=process: self._on_process_finished(s, p, exit_code, exit_status))
+        process.errorOccurred.connect(lambda error, s=slot, p=process: self._on_process_error(s, p, error))
+        slot.processes.append(process)
+        process.start(program, arguments)
+        self.task_manager.refresh_task(slot.task)
+        return process
+
+    def _apply_probe_result(self, slot, result):
+        if not result.ok or result.duration <= 0:
+            self.log_debug(f"Błąd ffprobe: {result.error}", slot)
+            self.log_message.emit(f"OSTRZEŻENIE: Nie udało się odczytać czasu trwania z pliku '{result.path.name}'. Może być uszkodzony.")
+            return
+        slot.total_duration_seconds = result.duration
+        if slot.task.selected_script == 4:
+            # Wstawka jest doklejana na początku, więc wydłuża całe kodowanie
+            intro_probe = self.probe_service.cached(slot.task.intro_file)
+            if intro_probe and intro_probe.ok:
+                slot.total_duration_seconds += intro_probe.duration
+
+    def _on_ffmpeg_progress(self, slot, process):
+        progress = slot.progress.get(process)
+        if progress is None:
             return
-        time_match = re.search(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})", output)
-        if time_match:
-            h, m, s, _ = map(int, time_match.groups())
-            processed_seconds = h * 3600 + m * 60 + s
-            if processed_seconds > 0:
-                elapsed_time = (datetime.now() - self.start_time).total_seconds()
-                processing_speed = processed_seconds / elapsed_time
-                if processing_speed > 0:
-                    eta_seconds = int((self.total_duration_seconds - processed_seconds) / processing_speed)
-                    self.eta_updated.emit(eta_seconds)
+        data = bytes(process.readAllStandardOutput()).decode('utf-8', errors='ignore')
+        if progress.feed_ffmpeg(data, slot.total_duration_seconds):
+            self._emit_progress(slot)
+            self._emit_eta()
+
+    def _on_mkvmerge_output(self, slot, process):
+        progress = slot.progress.get(process)
+        if progress is None:
+            return
+        data = bytes(process.readAll()).decode('utf-8', errors='ignore')
+        updated, log_text = progress.feed_mkvmerge(data)
+        if log_text:
+            self._write_output(slot, log_text)
+        if updated:
+            self._emit_progress(slot)
+            self._emit_eta()
+
+    def _emit_progress(self, slot):
+        self.task_progress.emit(slot.task, slot.fraction, slot.eta_seconds)
+
+    def _emit_eta(self):
+        # Zadania biegną równolegle, więc pula kończy pracę razem z najdłuższym z nich
+        etas = [slot.eta_seconds for slot in self.slots if slot.eta_seconds >= 0]
+        self.eta_updated.emit(max(etas) if etas else -1)
 
     def process_next_task(self):
-        if not self.task_manager.has_tasks() or self.is_running():
+        while len(self.slots) < self.max_parallel_jobs:
+            task = self.task_manager.take_next_pending_task(self._can_admit)
+            if not task:
+                return
+            self._start_task(task)
+
+    def _start_task(self, task):
+        # Log czyszczony jest przy starcie zadania, a nie procesu, więc komunikaty z przygotowania zadania zostają widoczne
+        if not self.is_running():
+            self.output_window.clear()
+        slot = ProcessSlot(self._next_slot_id(), task)
+        self.slots.append(slot)
+        self.log_terminal("process_next_task called.", slot)
+
+        self.log_terminal(f"Slot {slot.label} task script ID: {task.selected_script}", slot)
+        self.log_terminal(f"Slot {slot.label} task encoder ID: {task.selected_ffmpeg_script}", slot)
+
+        self.task_manager.mark_as_processing(task, "Przygotowywanie...")
+        self.task_started.emit(task)
+
+        # Informacje o pliku zwykle są już odczytane w tle od momentu dodania zadania do kolejki
+        probe = self.probe_service.cached(task.mkv_file)
+        if probe:
+            self._apply_probe_result(slot, probe)
+        elif task.mkv_file:
+            if task.selected_script == 4:
+                # Polecenie z wstawką potrzebuje klatkażu źródła, więc start czeka na wynik (bez blokowania GUI)
+                self.probe_service.request(task.mkv_file, lambda result, s=slot: self._on_deferred_probe(s, result))
+                return
+            self.probe_service.request(task.mkv_file, lambda result, s=slot: self._apply_probe_result(s, result) if s in self.slots else None)
+
+        self._run_script(slot)
+
+    def _on_deferred_probe(self, slot, result):
+        if slot not in self.slots:
             return
-
-        self.current_task = self.task_manager.get_task(0)
-        if not self.current_task:
+        self._apply_probe_result(slot, result)
+        self._run_script(slot)
+
+    def _run_script(self, slot):
+        # Wybór czcionek (indeks folderu, odczyt napisów), wersje narzędzi i odcisk przepisu wymagają odczytu plików,
+        # więc liczone są w puli wątków - pierwszy odczyt dużego folderu czcionek nie blokuje GUI
+        probe = self.probe_service.cached(slot.task.mkv_file)
+        slot.is_preparing = True
+        self.probe_service.request_call(
+            self._prepare_task, lambda prepared, s=slot: self._on_task_prepared(s, prepared),
+            slot.task, probe.video_framerate if probe else None, self.attach_used_fonts_only, self.single_pass_remux_hardsub,
+            self.segment_count
+        )
+
+    @staticmethod
+    def _prepare_task(task, framerate, used_fonts_only, single_pass, segment_count):
+        """Wykonywane w puli wątków: (czcionki, brakujące czcionki, plik wyjściowy, odcisk, czy wynik jest aktualny)."""
+        try:
+            fonts, missing = None, []
+            if used_fonts_only and task.selected_script in [2, 3] and task.subtitle_file and task.font_folder:
+                fonts, missing = select_fonts(task.subtitle_file, task.font_folder)
+            output_file, fingerprint = task_recipe(task, framerate, fonts, single_pass, segment_count)
+            return fonts, missing, output_file, fingerprint, bool(output_file) and is_up_to_date(output_file, fingerprint)
+        except Exception:
+            # Bez wyniku przygotowania zadanie i tak ruszy (z całym folderem czcionek, bez sprawdzania aktualności)
+            return None, [], None, None, False
+
+    def _on_task_prepared(self, slot, prepared):
+        if slot not in self.slots:
             return
-
-        self.debug_mode = self.current_task.debug_mode
-        self.log_terminal("process_next_task called.")
-
-        self.log_terminal(f"Current task script ID: {self.current_task.selected_script}")
-        self.log_terminal(f"Current task encoder ID: {self.current_task.selected_ffmpeg_script}")
-
-        self.total_duration_seconds = self._get_video_duration(self.current_task.mkv_file)
-        self.start_time = datetime.now()
-        self.task_manager.mark_current_as_processing("Przygotowywanie...")
-
+        slot.is_preparing = False
+        task = slot.task
+        slot.fonts, missing, output_file, fingerprint, up_to_date = prepared
+        if self._is_up_to_date(slot, output_file, fingerprint, up_to_date):
+            return
+        if slot.fonts is not None:
+            self.log_debug(f"Attaching {len(slot.fonts)} font(s) used by {task.subtitle_file}", slot)
+        if missing:
+            self.output_window.append(f">>> Brak czcionek użytych w napisach {Path(task.subtitle_file).name}: {', '.join(missing)}")
         script_map = {
-            1: lambda task: self.run_ffmpeg(task.mkv_file),
-            2: lambda task: self.run_mkvmerge_ffmpeg(task.mkv_file, task.subtitle_file, task.font_folder),
-            3: lambda task: self.run_mkvmerge(task.mkv_file, task.subtitle_file, task.font_folder),
-            4: lambda task: self.run_ffmpeg_with_intro(task.mkv_file, task.intro_file)
+            1: lambda task: self.run_ffmpeg(slot, task.mkv_file),
+            2: lambda task: self.run_mkvmerge_ffmpeg(slot, task.mkv_file, task.subtitle_file, task.font_folder),
+            3: lambda task: self.run_mkvmerge(slot, task.mkv_file, task.subtitle_file, task.font_folder),
+            4: lambda task: self.run_ffmpeg_with_intro(slot, task.mkv_file, task.intro_file)
         }
-        action = script_map.get(self.current_task.selected_script)
+        action = script_map.get(task.selected_script)
         if action:
-            self.log_terminal("Action found, executing...")
-            action(self.current_task)
+            self.log_terminal("Action found, executing...", slot)
+            action(task)
         else:
-            self.log_terminal(f"No action found for script ID: {self.current_task.selected_script}")
-
-    def _on_process_finished(self, exit_code, exit_status):
+            self.log_terminal(f"No action found for script ID: {task.selected_script}", slot)
+
+        # Zadanie, które nie uruchomiło żadnego procesu, nie może blokować miejsca w puli
+        if not slot.has_started and not slot.is_preparing and slot in self.slots:
+            self.task_manager.mark_as_error(task, "Błąd: nie uruchomiono procesu")
+            self.task_completed(slot, success=False)
+
+    def _is_up_to_date(self, slot, output_file, fingerprint, up_to_date):
+        if not output_file:
+            return False
+        if self.skip_up_to_date and up_to_date:
+            self.output_window.append(f">>> Plik {output_file.name} jest aktualny (te same wejścia, polecenia i wersje narzędzi) - pomijam zadanie.")
+            # Zakończenie w następnym obiegu pętli zdarzeń - długa seria aktualnych zadań nie zagnieżdża wywołań
+            QTimer.singleShot(0, lambda: self.task_completed(slot, success=True) if slot in self.slots else None)
+            return True
+        # Wynik zostanie nadpisany, więc stary odcisk nie może go już opisywać
+        remove_sidecar(output_file)
+        slot.recipe = (output_file, fingerprint)
+        return False
+
+    def _on_process_finished(self, slot, process, exit_code, exit_status):
+        if process in slot.processes:
+            slot.processes.remove(process)
+        slot.progress.pop(process, None)
         is_success = exit_code == 0 and exit_status == QProcess.ExitStatus.NormalExit
-        if self.chained_command_info and is_success:
-            next_function, next_args = self.chained_command_info['function'], self.chained_command_info['args']
-            self.chained_command_info = None
-            next_function(*next_args)
-        elif self.current_task:
-            if not is_success:
-                self.task_manager.mark_current_as_error("Błąd procesu")
-            self.task_completed(success=is_success)
+        if not is_success:
+            slot.stage_success = False
+            # Etap i tak zakończy się błędem, więc nie ma sensu czekać na pozostałe procesy
+            self._kill_processes(slot)
+        if slot.processes:
+            return
+
+        is_success, slot.stage_success = slot.stage_success, True
+        if slot.chained_command_info and is_success:
+            next_function, next_args = slot.chained_command_info['function'], slot.chained_command_info['args']
+            slot.chained_command_info = None
+            next_function(slot, *next_args)
         else:
-            self.output_window.append(">>> Proces zakończony.")
-            self.process = None
-
-    def task_completed(self, success=True):
-        self.eta_updated.emit(-1)
-        self.current_ffmpeg_speed = None
-        if self.current_task:
-            self.task_manager.complete_current_task()
-        self.current_task = None
-        self.process = None
-        
+            if not is_success:
+                self.task_manager.mark_as_error(slot.task, "Błąd procesu")
+            self.task_completed(slot, success=is_success)
+
+    def _on_process_error(self, slot, process, error):
+        # QProcess nie emituje finished, gdy programu nie da się uruchomić - bez tego miejsce w puli wisiałoby na zawsze
+        if error == QProcess.ProcessError.FailedToStart and slot in self.slots:
+            self.output_window.append(f">>> Nie udało się uruchomić procesu: {process.program()}")
+            slot.chained_command_info = None
+            self._on_process_finished(slot, process, -1, QProcess.ExitStatus.CrashExit)
+
+    def task_completed(self, slot, success=True):
+        if slot in self.slots:
+            self.slots.remove(slot)
+        slot.processes = []
+        self._close_debug_log(slot)
+        self._remove_temp_paths(slot)
+        if success and slot.recipe:
+            write_sidecar(*slot.recipe)
+        self._emit_eta()
+        self.task_manager.complete_task(slot.task)
+        self.task_finished.emit(slot.task, success)
+
         # Sprawdź, czy są kolejne zadania, jeśli nie, zakończono kolejkę
-        if not self.task_manager.has_tasks():
+        if not self.task_manager.has_tasks() and not self.slots:
             self.queue_finished.emit()
         else:
             self.process_next_task()
 
-    def kill_process(self):
-        self.eta_updated.emit(-1)
-        self.current_ffmpeg_speed = None
-        if self.is_running():
-            self.process.finished.disconnect()
-            self.process.kill()
-            self.process.waitForFinished(-1)
-        self.process = None
-        self.current_task = None
-
-    def kill_process_and_advance(self):
-        self.kill_process()
-        self.process_next_task()
+    def _kill_processes(self, slot):
+        slot.progress.clear()
+        for process in slot.processes:
+            process.finished.disconnect()
+            process.errorOccurred.disconnect()
+            if process.state() != QProcess.ProcessState.NotRunning:
+                process.kill()
+                process.waitForFinished(-1)
+        slot.processes = []
+
+    def _kill_slot(self, slot):
+        self._kill_processes(slot)
+        self._close_debug_log(slot)
+        self._remove_temp_paths(slot)
+        if slot in self.slots:
+            self.slots.remove(slot)
 
+    def kill_process(self):
+        for slot in list(self.slots):
+            self._kill_slot(slot)
+        self._emit_eta()
+
+    def shutdown(self):
+        """Zamyka usługi działające w tle; wywoływane przy wyjściu z programu, po zatrzymaniu zadań."""
+        self.probe_service.shutdown()
+        self.debug_log.shutdown()
+        self.stage_registry.close()
+        get_font_cache().close()
+
+    def cancel_task(self, task_id):
+        """Usuwa zadanie z kolejki; jeśli jest przetwarzane, przerywa je i uruchamia kolejne. Zwraca False, gdy zadania nie ma."""
+        task = self.task_manager.get_task(task_id)
+        if not task:
+            return False
+        is_active = self.is_task_running(task)
+        self.task_manager.remove_task(task_id)
+        if is_active:
+            self.kill_task_and_advance(task)
+        else:
+            self.process_next_task()
+        return True
 
+    def kill_task_and_advance(self, task):
+        slot = self._find_slot(task)
+        if slot:
+            self._kill_slot(slot)
+            self._emit_eta()
+        self.process_next_task()
 
-    def run_mkvmerge(self, mkv_file, subtitle_file, font_folder):
-        mkv_path, _, font_path = Path(mkv_file), Path(subtitle_file), Path(font_folder)
 
-        # Integracja niestandardowej ścieżki
-        if self.current_task and self.current_task.output_path:
-            output_file = self.current_task.output_path
-        else:
-            output_file = mkv_path.with_name(f"{mkv_path.stem}_remux.mkv")
 
+    def run_mkvmerge(self, slot, mkv_file, subtitle_file, font_folder):
+        output_file = remux_output_path(slot.task, mkv_file)
         program = "mkvmerge"
-        # --- TWOJA POPRAWNA LOGIKA ---
-        track_name = self.current_task.subtitle_track_name.strip() or ""
-        movie_name = self.current_task.movie_name
-        args = ["-o", str(output_file), "--audio-tracks", "1", "--no-subtitles",
-                "--no-track-tags", "--no-chapters", "--no-attachments", str(mkv_file),
-                "--language", "0:pol", "--track-name", f"0:{track_name}", str(subtitle_file)]
-        if movie_name == " ":
-            pass
-        elif movie_name:
-            args.extend(["--title", movie_name])
-        else:
-            args.extend(["--title", ""])
-        # -----------------------------
-
-        if font_path.is_dir():
-            for font in font_path.iterdir():
-                if font.suffix.lower() in ['.ttf', '.otf', '.woff', '.woff2']:
-                    args.extend(["--attach-file", str(font)])
-        if self.debug_mode:
-            self.log_debug(f"Running command: {program} {' '.join(args)}")
-        self.task_manager.mark_current_as_processing("Uruchomiono mkvmerge")
-        self._start_process(program, args)
-
-    def run_mkvmerge_ffmpeg(self, mkv_file, subtitle_file, font_folder):
-        output_file_remux = Path(mkv_file).with_name(f"{Path(mkv_file).stem}_remux.mkv")
-        self.chained_command_info = {'function': self.run_ffmpeg, 'args': (output_file_remux, True)}
-
-        _, _, font_path = Path(mkv_file), Path(subtitle_file), Path(font_folder)
+        args, _ = mkvmerge_args(slot.task, mkv_file, subtitle_file, font_folder, output_file, slot.fonts)
+        if slot.debug_mode:
+            self.log_debug(f"Running command: {program} {' '.join(args)}", slot)
+        self.task_manager.mark_as_processing(slot.task, "Uruchomiono mkvmerge")
+        self._start_process(slot, program, args)
+
+    def run_mkvmerge_ffmpeg(self, slot, mkv_file, subtitle_file, font_folder):
+        output_file_remux = remux_output_path(slot.task, mkv_file, is_final=False)
         program = "mkvmerge"
-        # --- TWOJA POPRAWNA LOGIKA ---
-        track_name = self.current_task.subtitle_track_name.strip() or ""
-        movie_name = self.current_task.movie_name
-        # --- MAŁA KOREKTA ZMIENNEJ ---
-        args = ["-o", str(output_file_remux), "--audio-tracks", "1", "--no-subtitles",
-                "--no-track-tags", "--no-chapters", "--no-attachments", str(mkv_file),
-                "--language", "0:pol", "--track-name", f"0:{track_name}", str(subtitle_file)]
-        if movie_name == " ":
-            pass
-        elif movie_name:
-            args.extend(["--title", movie_name])
-        else:
-            args.extend(["--title", ""])
-        # -----------------------------
-
-        if font_path.is_dir():
-            for font in font_path.iterdir():
-                if font.suffix.lower() in ['.ttf', '.otf', '.woff', '.woff2']:
-                    args.extend(["--attach-file", str(font)])
-        if self.debug_mode:
-            self.log_debug(f"Running command: {program} {' '.join(args)}")
-        self.task_manager.mark_current_as_processing("Krok 1/2: Uruchomiono mkvmerge")
-        self._start_process(program, args)
+        args, inputs = mkvmerge_args(slot.task, mkv_file, subtitle_file, font_folder, output_file_remux, slot.fonts)
+        if slot.debug_mode:
+            self.log_debug(f"Running command: {program} {' '.join(args)}", slot)
+        if self.single_pass_remux_hardsub:
+            # Tryb jednoprzebiegowy: FFmpeg wypala napisy wprost ze źródła, równolegle z mkvmerge,
+            # więc pośredni plik _remux.mkv nie jest ponownie czytany
+            self.task_manager.mark_as_processing(slot.task, "Uruchomiono mkvmerge i FFmpeg równolegle")
+            self._start_process(slot, program, args)
+            # Wynik nazywany jest jak w łańcuchu (od pliku _remux.mkv), tak samo jak w odcisku przepisu
+            self.run_ffmpeg(slot, mkv_file, True, subtitle_file=subtitle_file, font_folder=font_folder, stream_maps=REMUX_STREAM_MAPS,
+                            output_file=hardsub_output_path(slot.task, output_file_remux, is_final=True))
+            return
 
+        # Ponowione zadanie nie powtarza remuxu, jeśli jego wynik jest kompletny i powstał z tych samych wejść
+        key = stage_key(inputs, args)
+        if self.stage_registry.is_complete(output_file_remux, key):
+            self.output_window.append(f">>> Plik {output_file_remux.name} jest już kompletny - pomijam remux.")
+            self.log_debug(f"Skipping mkvmerge, {output_file_remux} is up to date", slot)
+            self.run_ffmpeg(slot, output_file_remux, True)
+            return
+        self.stage_registry.forget(output_file_remux)
+        slot.chained_command_info = {'function': self._on_remux_finished, 'args': (Path(mkv_file), output_file_remux, key)}
+        self.task_manager.mark_as_processing(slot.task, "Krok 1/2: Uruchomiono mkvmerge")
+        self._start_process(slot, program, args)
+
+    def _on_remux_finished(self, slot, mkv_path, remux_path, key):
+        # Plik się zmienił, więc wcześniejszy wynik ffprobe dla tej ścieżki jest nieaktualny
+        self.probe_service.invalidate(remux_path)
+        self.probe_service.request(remux_path, lambda probe: self._record_remux(mkv_path, remux_path, key, probe))
+        self.run_ffmpeg(slot, remux_path, True)
+
+    def _record_remux(self, mkv_path, remux_path, key, probe):
+        source = self.probe_service.cached(mkv_path)
+        if not probe.ok or probe.duration <= 0 or probe.track_count < 2:
+            return
+        # Remux nie zmienia długości materiału - większa różnica oznacza niekompletny plik
+        if source and source.ok and abs(probe.duration - source.duration) > max(1.0, source.duration * 0.01):
+            return
+        self.stage_registry.record(remux_path, key, probe.duration, probe.track_count)
 
     def is_running(self):
-        return self.process is not None and self.process.state() == QProcess.ProcessState.Running
-
-    def _get_safe_path_for_ffmpeg(self, file_path):
-        if not self.is_windows:
-            return str(file_path)
-        return str(file_path).replace('\\', '\\\\').replace(':', '\\:')
-
-    def update_output(self):
-        if self.process:
-            output = bytes(self.process.readAll()).decode('utf-8', errors='ignore')
-            self.output_window.append(output)
-            self._parse_ffmpeg_time(output)
-            if self.debug_mode:
-                self.log_debug(output)
-
-    def run_ffmpeg(self, mkv_file, is_final=False):
-        mkv_path = Path(mkv_file)
-        subtitle_path = self._get_safe_path_for_ffmpeg(mkv_path)
-
-        # Integracja niestandardowej ścieżki
-        if is_final and self.current_task and self.current_task.output_path:
-            output_file = self.current_task.output_path
-        else:
-            output_file = mkv_path.with_name(mkv_path.name.replace("_remux.mkv" if is_final else ".mkv", "_hardsub.mp4"))
-
-        subtitle_path = self._get_safe_path_for_ffmpeg(mkv_path)
+        return any(slot.is_running() for slot in self.slots)
 
+    def update_output(self, slot, process):
+        if process in slot.processes:
+            if process.processChannelMode() == QProcess.ProcessChannelMode.SeparateChannels:
+                output = bytes(process.readAllStandardError()).decode('utf-8', errors='ignore')
+            else:
+                output = bytes(process.readAll()).decode('utf-8', errors='ignore')
+            self._write_output(slot, output)
+
+    def _write_output(self, slot, output):
+        # Przy kilku zadaniach naraz każda linia dostaje znacznik swojego miejsca w puli;
+        # kanał rozdziela też linie postępu (\r) nadpisywane w miejscu
+        channel = slot.label if self.max_parallel_jobs > 1 else None
+        self.output_window.write(output, channel)
+        if slot.debug_mode:
+            self.log_debug(output, slot)
+
+    def run_ffmpeg(self, slot, mkv_file, is_final=False, subtitle_file=None, font_folder=None, stream_maps=(), output_file=None):
+        mkv_path = Path(mkv_file)
+        output_file = output_file or hardsub_output_path(slot.task, mkv_path, is_final)
+        video_subtitle_filter = subtitle_filter(subtitle_file or mkv_path, font_folder)
         program = "ffmpeg"
-        if self.current_task.selected_ffmpeg_script == 1: # CPU
-            args = ["-i", str(mkv_path), "-vf", f"format=yuv420p,subtitles='{subtitle_path}'", "-map_metadata", "-1", "-movflags", "+faststart", "-c:v", "libx264", "-profile:v", "main", "-level:v", "4.0", "-preset", "veryfast", "-crf", "16", "-maxrate", "20M", "-bufsize", "25M", "-x264-params", "colormatrix=bt709", "-c:a", "copy", str(output_file)]
-        elif self.current_task.selected_ffmpeg_script == 2: # GPU (CUDA)
-            args = ["-y", "-vsync", "0", "-hwaccel", "cuda", "-i", str(mkv_path), "-vf", f"subtitles='{subtitle_path}'", "-c:a", "copy", "-c:v", "h264_nvenc", "-preset", "p2", "-tune", "1", "-b:v", f"{self.current_task.gpu_bitrate}M", "-bufsize", "15M", "-maxrate", "15M", "-qmin", "0", "-g", "250", "-bf", "3", "-b_ref_mode", "middle", "-temporal-aq", "1", "-rc-lookahead", "20", "-i_qfactor", "0.75", "-b_qfactor", "1.1", str(output_file)]
-        elif self.current_task.selected_ffmpeg_script == 3: # GPU (VA-API)
-            args = ["-hwaccel", "vaapi", "-hwaccel_output_format", "vaapi", "-i", str(mkv_path), "-vf", f"subtitles='{subtitle_path}',format=nv12,hwupload", "-c:a", "copy", "-c:v", "h264_vaapi", "-b:v", f"{self.current_task.gpu_bitrate}M", str(output_file)]
-
-        if self.debug_mode:
-            self.log_debug(f"Running command: {program} {' '.join(args)}")
+        args = ffmpeg_hardsub_args(slot.task, mkv_path, output_file, video_subtitle_filter, stream_maps)
+
         status = "Krok 2/2: Uruchomiono FFmpeg" if is_final else "Uruchomiono FFmpeg"
-        self.task_manager.mark_current_as_processing(status)
-        self._start_process(program, args)
+        # Etap jednoprzebiegowy (z plikiem napisów) biegnie obok mkvmerge, więc nie jest dzielony na segmenty
+        if self.segment_count > 1 and slot.task.selected_ffmpeg_script == 1 and not subtitle_file:
+            job = {'mkv_path': mkv_path, 'output_file': output_file, 'subtitle_filter': video_subtitle_filter, 'fallback_args': args, 'status': status}
+            self.task_manager.mark_as_processing(slot.task, "Wyznaczanie segmentów...")
+            slot.is_preparing = True
+            self.probe_service.request(mkv_path, lambda probe, s=slot: self._on_segment_probe(s, job, probe))
+            return
 
-    def run_ffmpeg_with_intro(self, mkv_file, intro_file):
-        self.log_terminal("run_ffmpeg_with_intro called.")
-        mkv_path, intro_path = Path(mkv_file), Path(intro_file)
+        if slot.debug_mode:
+            self.log_debug(f"Running command: {program} {' '.join(args)}", slot)
+        if not subtitle_file:
+            self.task_manager.mark_as_processing(slot.task, status)
+        self._start_process(slot, program, args)
+
+    def _run_unsegmented(self, slot, job, reason):
+        self.output_window.append(f">>> Kodowanie w segmentach niemożliwe ({reason}) - kodowanie w jednym procesie.")
+        if slot.debug_mode:
+            self.log_debug(f"Running command: ffmpeg {' '.join(job['fallback_args'])}", slot)
+        self.task_manager.mark_as_processing(slot.task, job['status'])
+        self._start_process(slot, "ffmpeg", job['fallback_args'])
+
+    def _on_segment_probe(self, slot, job, probe):
+        if slot not in self.slots:
+            return
+        if not probe.ok or probe.duration <= 0:
+            self._run_unsegmented(slot, job, "nieznana długość pliku")
+            return
+        times = target_cut_times(probe.duration, self.segment_count)
+        self.probe_service.request_keyframes(
+            job['mkv_path'], times, lambda keyframes, s=slot: self._on_segment_keyframes(s, job, probe, keyframes), probe.start_time
+        )
 
-        if self.current_task and self.current_task.output_path:
-            output_file = self.current_task.output_path
-        else:
-            output_file = mkv_path.with_name(f"{mkv_path.stem}_HARD.mp4")
+    def _on_segment_keyframes(self, slot, job, probe, keyframes):
+        if slot not in self.slots:
+            return
+        segments = plan_segments(probe.duration, keyframes)
+        if len(segments) < 2:
+            self._run_unsegmented(slot, job, "brak odpowiednich klatek kluczowych")
+            return
 
+        output_file = job['output_file']
+        segment_dir = output_file.with_name(f".{output_file.stem}_segments")
+        try:
+            segment_dir.mkdir(exist_ok=True)
+        except OSError as e:
+            self._run_unsegmented(slot, job, str(e))
+            return
+        slot.temp_paths.append(segment_dir)
+
+        threads = str(segment_threads(len(segments)))
+        segment_paths = []
+        self.task_manager.mark_as_processing(slot.task, f"Kodowanie segmentów ({len(segments)})")
+        for index, (start, length) in enumerate(segments):
+            segment_path = segment_dir / f"segment_{index:03d}.mkv"
+            segment_paths.append(segment_path)
+            # Wejście przewijane przez -ss zaczyna się od zera; setpts przywraca czas źródła na czas filtra napisów,
+            # a drugi setpts wraca do zera, żeby segmenty dało się bezstratnie skleić
+            video_filter = f"setpts=PTS+{start:.6f}/TB,format=yuv420p,{job['subtitle_filter']},setpts=PTS-STARTPTS"
+            args = ["-y", "-ss", f"{start:.6f}", "-i", str(job['mkv_path'])]
+            if length is not None:
+                args += ["-t", f"{length:.6f}"]
+            args += ["-map", "0:v:0", "-vf", video_filter, "-an", "-sn", "-map_metadata", "-1", *CPU_VIDEO_OPTIONS, "-threads", threads, str(segment_path)]
+            if slot.debug_mode:
+                self.log_debug(f"Running command: ffmpeg {' '.join(args)}", slot)
+            self._start_process(slot, "ffmpeg", args, duration=length if length is not None else probe.duration - start)
+        slot.chained_command_info = {'function': self._concat_segments, 'args': (job, segment_dir, segment_paths)}
+
+    def _concat_segments(self, slot, job, segment_dir, segment_paths):
+        list_path = segment_dir / "segments.txt"
+        try:
+            write_concat_list(segment_paths, list_path)
+        except OSError as e:
+            self.output_window.append(f">>> Nie można zapisać listy segmentów: {e}")
+            self.task_manager.mark_as_error(slot.task, "Błąd łączenia segmentów")
+            self.task_completed(slot, success=False)
+            return
+        # Wideo łączone bez ponownego kodowania, dźwięk kopiowany ze źródła jak w zwykłym poleceniu
+        args = ["-y", "-f", "concat", "-safe", "0", "-i", str(list_path), "-i", str(job['mkv_path']), "-map", "0:v:0", "-map", "1:a:0?", "-map_metadata", "-1", "-movflags", "+faststart", "-c", "copy", str(job['output_file'])]
+        if slot.debug_mode:
+            self.log_debug(f"Running command: ffmpeg {' '.join(args)}", slot)
+        self.task_manager.mark_as_processing(slot.task, "Łączenie segmentów")
+        self._start_process(slot, "ffmpeg", args)
+
+    def run_ffmpeg_with_intro(self, slot, mkv_file, intro_file):
+        self.log_terminal("run_ffmpeg_with_intro called.", slot)
+        output_file = intro_output_path(slot.task, mkv_file)
         program = "ffmpeg"
-        subtitle_path = self._get_safe_path_for_ffmpeg(mkv_path)
-        bitrate = self.current_task.gpu_bitrate
-        framerate = self._get_video_framerate(mkv_path)
-        framerate_arg = ["-r:v", framerate] if framerate else []
-
-        audio_filter = "[0:a:0]loudnorm=I=-20:LRA=10:tp=-1.8[a_intro_norm];[1:a:0]loudnorm=I=-20:LRA=10:tp=-1.8[a_main_norm];[a_intro_norm][a_main_norm]concat=n=2:v=0:a=1[a_out]"
-
-        # Skrypt dla CPU
-        if self.current_task.selected_ffmpeg_script == 1:
-            self.log_terminal("Using CPU path for intro script.")
-            filter_complex_cpu = (
-                f"[1:v]subtitles='{subtitle_path}'[v_subs];"
-                f"[0:v][v_subs]concat=n=2:v=1[v_out];{audio_filter}"
-            )
-            x264_params = (
-                "deblock=-2:-1:me=umh:rc-lookahead=250:qcomp=0.60:aq-mode=3:aq-strength=0.80:"
-                "merange=32:ipratio=1.30:no-dct-decimate=1:vbv-bufsize=78125:vbv-maxrate=62500:"
-                "coder=default:chromaoffset=0:udu_sei=false:mbtree=1:b-pyramid=2:direct=auto:"
-                "trellis=1:colormatrix=bt709"
-            )
-            args = [
-                "-i", str(intro_path), "-i", str(mkv_path),
-                "-filter_complex", filter_complex_cpu,
-                "-map", "[v_out]", "-map", "[a_out]",
-                "-c:v", "libx264", "-b:v", f"{bitrate}M",
-                "-bufsize", "15M", "-maxrate", "15M", "-preset", "medium",
-                "-c:a", "aac", "-b:a", "128k",
-                "-profile:v", "high", "-level:v", "4.1", "-tune", "animation",
-                "-x264-params", x264_params, *framerate_arg, "-sar", "1:1",
-                "-pix_fmt", "yuv420p", "-sn", "-movflags", "faststart", "-y", str(output_file)
-            ]
-
-        # Skrypty dla GPU (CUDA lub VA-API)
-        elif self.current_task.selected_ffmpeg_script in [2, 3]:
-            self.log_terminal("Using GPU path for intro script.")
-            video_filter_cpu = f"[1:v]subtitles='{subtitle_path}'[v_subs];[0:v][v_subs]concat=n=2:v=1:a=0[v_cpu]"
-            
-            if self.current_task.selected_ffmpeg_script == 2:
-                self.log_terminal("Using CUDA path.")
-                hw_accel_args = ["-hwaccel", "cuda"]
-                filter_complex = f"{video_filter_cpu};[v_cpu]hwupload_cuda[v_out];{audio_filter}"
-                video_codec_args = ["-c:v", "h264_nvenc", "-preset", "p2"]
-
-            else: # selected_ffmpeg_script == 3
-                self.log_terminal("Using VA-API path.")
-                hw_accel_args = ["-hwaccel", "vaapi"]
-                filter_complex = f"{video_filter_cpu};[v_cpu]format=nv12,hwupload[v_out];{audio_filter}"
-                video_codec_args = ["-c:v", "h264_vaapi", "-profile:v", "high"]
-
-            args = [
-                *hw_accel_args,
-                "-i", str(intro_path), "-i", str(mkv_path),
-                "-filter_complex", filter_complex,
-                "-map", "[v_out]", "-map", "[a_out]",
-                *video_codec_args,
-                "-b:v", f"{bitrate}M", "-bufsize", "15M", "-maxrate", "15M",
-                *framerate_arg,
-                "-c:a", "aac", "-b:a", "128k",
-                "-movflags", "+faststart", "-y", str(output_file)
-            ]
-        
+        probe = self.probe_service.cached(mkv_file)
+        framerate = probe.video_framerate if probe else None
+        self.log_terminal(f"Using {'CPU' if slot.task.selected_ffmpeg_script == 1 else 'GPU'} path for intro script.", slot)
+        args = ffmpeg_intro_args(slot.task, mkv_file, intro_file, output_file, framerate)
+
         if not args:
-            self.log_terminal("ERROR - args list is empty. No path taken.")
+            self.log_terminal("ERROR - args list is empty. No path taken.", slot)
             return
 
-        self.log_terminal("Args constructed. About to start process.")
-        self.log_terminal(f"Final args list: {args}")
+        self.log_terminal("Args constructed. About to start process.", slot)
+        self.log_terminal(f"Final args list: {args}", slot)
 
-        if self.debug_mode:
-            self.log_debug(f"Running command: {program} {' '.join(args)}")
-        self.task_manager.mark_current_as_processing("Uruchomiono FFmpeg z wstawką")
-        self._start_process(program, args)
+        if slot.debug_mode:
+            self.log_debug(f"Running command: {program} {' '.join(args)}", slot)
+        self.task_manager.mark_as_processing(slot.task, "Uruchomiono FFmpeg z wstawką")
+        self._start_process(slot, program, args)
 
-    def log_debug(self, message):
-        if not self.debug_mode:
+    def log_debug(self, message, slot=None):
+        if not (slot and slot.debug_mode):
             return
-        # Poprawka zapewniająca tworzenie katalogu logów
-        log_dir = os.path.dirname(self.log_file_path)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        with open(self.log_file_path, "a", encoding='utf-8') as log_file:
-            log_file.write(f"{datetime.now()}: {message}\n")
-
-    def log_terminal(self, message):
-        if self.debug_mode:
+        # Zapis odbywa się w wątku logu; tu wiadomość trafia tylko do kolejki
+        self.debug_log.write(slot.log_stream, message)
+
+    def _close_debug_log(self, slot):
+        if slot.debug_mode:
+            self.debug_log.close_stream(slot.log_stream)
+
+    def _remove_temp_paths(self, slot):
+        for path in slot.temp_paths:
+            shutil.rmtree(path, ignore_errors=True)
+        slot.temp_paths = []
+
+    def log_terminal(self, message, slot=None):
+        if slot and slot.debug_mode:
             print(f"DEBUG: {message}")
 
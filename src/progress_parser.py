@@ -0,0 +1,151 @@
+# progress_parser.py
+import time
+
+class FfmpegProgressParser:
+    """
+    Strumieniowy parser wyjścia `ffmpeg -progress`.
+    Bloki key=value kończą się linią `progress=continue|end`; fragmenty linii rozcięte
+    między kolejnymi porcjami danych są buforowane do czasu nadejścia reszty.
+    """
+    def __init__(self):
+        self._buffer = ""
+        self._block = {}
+
+    def feed(self, text):
+        """Przyjmuje kolejną porcję danych i zwraca listę kompletnych bloków postępu."""
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        snapshots = []
+        for line in lines:
+            key, sep, value = line.strip().partition("=")
+            if not sep:
+                continue
+            self._block[key] = value.strip()
+            if key == "progress":
+                snapshots.append(self._parse_block(self._block))
+                self._block = {}
+        return snapshots
+
+    @staticmethod
+    def _parse_block(block):
+        def number(key, cast=float, suffix=""):
+            value = block.get(key, "").removesuffix(suffix)
+            try:
+                return cast(value)
+            except ValueError:
+                return None
+
+        # out_time_us bywa "N/A" na początku kodowania; starsze wersje FFmpeg podają out_time_ms w mikrosekundach
+        out_time_us = number("out_time_us", int)
+        if out_time_us is None:
+            out_time_us = number("out_time_ms", int)
+        return {
+            "out_time": out_time_us / 1_000_000 if out_time_us is not None and out_time_us >= 0 else None,
+            "frame": number("frame", int),
+            "fps": number("fps"),
+            "bitrate": block.get("bitrate"),
+            "total_size": number("total_size", int),
+            "speed": number("speed", suffix="x"),
+            "finished": block.get("progress") == "end",
+        }
+
+
+class MkvmergeProgressParser:
+    """
+    Parser wyjścia `mkvmerge --gui-mode`: linie `#GUI#progress 42%` zamieniane są na postęp,
+    a pozostałe linie (bez prefiksu #GUI#) zwracane do logu.
+    """
+    PREFIX = "#GUI#"
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text):
+        """Zwraca krotkę (lista ułamków postępu 0..1, tekst do logu)."""
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        fractions, log_lines = [], []
+        for line in lines:
+            line = line.rstrip("\r")
+            if line.startswith(self.PREFIX + "progress"):
+                value = line[len(self.PREFIX + "progress"):].strip().rstrip("%")
+                try:
+                    fractions.append(int(value) / 100)
+                except ValueError:
+                    pass
+            elif line.startswith(self.PREFIX):
+                log_lines.append(line[len(self.PREFIX):])
+            else:
+                log_lines.append(line)
+        return fractions, "\n".join(log_lines)
+
+
+class EtaEstimator:
+    """
+    Wygładzony szacunek czasu do końca na podstawie postępu w zakresie 0..1.
+    Tempo liczone jest z przyrostów postępu (średnia wykładnicza), a nie z czasu od startu,
+    więc wolny początek (np. odczyt z NAS) nie zawyża ETA do końca zadania.
+    """
+    def __init__(self, smoothing=0.15, min_interval=0.5):
+        self.smoothing = smoothing
+        self.min_interval = min_interval
+        self._rate = None
+        self._last_fraction = None
+        self._last_time = None
+
+    def update(self, fraction, now=None):
+        now = time.monotonic() if now is None else now
+        fraction = min(max(fraction, 0.0), 1.0)
+        if self._last_time is None:
+            self._last_fraction, self._last_time = fraction, now
+            return None
+        elapsed = now - self._last_time
+        if elapsed < self.min_interval:
+            return self.eta(fraction)
+        rate = (fraction - self._last_fraction) / elapsed
+        if rate >= 0:
+            self._rate = rate if self._rate is None else self.smoothing * rate + (1 - self.smoothing) * self._rate
+        self._last_fraction, self._last_time = fraction, now
+        return self.eta(fraction)
+
+    def eta(self, fraction):
+        if not self._rate or self._rate <= 0:
+            return None
+        return int((1.0 - fraction) / self._rate)
+
+
+class ProcessProgress:
+    """Stan postępu jednego procesu: parser, estymator ETA i ostatnie odczytane wartości."""
+    def __init__(self, duration=None):
+        self.duration = duration
+        self.parser = FfmpegProgressParser()
+        self.mkvmerge_parser = MkvmergeProgressParser()
+        self.estimator = EtaEstimator()
+        self.snapshot = {}
+        self.fraction = 0.0
+        self.eta_seconds = None
+
+    def feed_ffmpeg(self, text, total_duration):
+        duration = self.duration or total_duration
+        updated = False
+        for snapshot in self.parser.feed(text):
+            self.snapshot = snapshot
+            updated = True
+            if snapshot["finished"]:
+                self.fraction, self.eta_seconds = 1.0, 0
+            elif duration and snapshot["out_time"] is not None:
+                self.set_fraction(snapshot["out_time"] / duration)
+        return updated
+
+    def feed_mkvmerge(self, text):
+        """Zwraca krotkę (czy zmienił się postęp, tekst do logu)."""
+        fractions, log_text = self.mkvmerge_parser.feed(text)
+        for fraction in fractions:
+            self.set_fraction(fraction)
+        if fractions and fractions[-1] >= 1.0:
+            self.eta_seconds = 0
+        return bool(fractions), log_text
+
+    def set_fraction(self, fraction):
+        self.fraction = min(max(fraction, 0.0), 1.0)
+        self.eta_seconds = self.estimator.update(self.fraction)
@@ -0,0 +1,149 @@
+# queue_journal.py
+import json
+import os
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, QTimer, QStandardPaths, QLockFile
+from task_manifest import task_to_record
+
+
+class QueueJournal(QObject):
+    """
+    Dziennik kolejki zadań dopisywany w formacie JSON Lines.
+    Każda zmiana (dodanie, usunięcie, status, priorytet, kolejność) to jedna linia; zapisy są zbierane
+    i utrwalane (fsync) najwyżej co FLUSH_INTERVAL_MS, więc awaria traci co najwyżej ostatnią chwilę pracy.
+    Przy starcie dziennik jest odtwarzany, a następnie przepisywany do postaci zawierającej tylko bieżące zadania;
+    tak samo po COMPACT_AFTER_LINES dopisanych liniach i po opróżnieniu kolejki.
+    Plik blokady sprawia, że dziennika używa tylko jedna instancja programu naraz.
+    """
+    FLUSH_INTERVAL_MS = 250
+    COMPACT_AFTER_LINES = 2000
+
+    def __init__(self, path=None, parent=None):
+        super().__init__(parent)
+        if path is None:
+            data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppLocalDataLocation)
+            path = os.path.join(data_dir, "queue_journal.jsonl")
+        self.path = path
+        self._pending = []
+        self._file = None
+        self._appended_lines = 0
+        self._lock_file = QLockFile(self.path + ".lock")
+        # Blokada trwa całą sesję - za nieaktualną uznajemy ją tylko, gdy proces, który ją założył, już nie działa
+        self._lock_file.setStaleLockTime(0)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def try_lock(self):
+        """Zakłada blokadę dziennika; False, gdy używa go już inna działająca instancja programu."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        return self._lock_file.tryLock(0)
+
+    @property
+    def needs_compaction(self):
+        return self._appended_lines >= self.COMPACT_AFTER_LINES
+
+    # --- Odczyt ---
+    def load(self):
+        """Odtwarza stan kolejki; zwraca listę słowników (pola zadania + status, priority) w kolejności kolejki."""
+        tasks = OrderedDict()
+        try:
+            with open(self.path, encoding='utf-8') as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Ostatnia linia mogła zostać urwana przez awarię - pomijamy ją
+                        continue
+                    self._apply(tasks, entry)
+        except OSError:
+            return []
+        return list(tasks.values())
+
+    @staticmethod
+    def _apply(tasks, entry):
+        op, task_id = entry.get("op"), entry.get("id")
+        if op == "add":
+            tasks[task_id] = dict(entry.get("task", {}), status="Oczekuje", priority=entry.get("priority", 1), retry=entry.get("retry", False))
+        elif task_id not in tasks:
+            return
+        elif op == "remove":
+            del tasks[task_id]
+        elif op == "status":
+            tasks[task_id]["status"] = entry.get("status", "Oczekuje")
+        elif op == "priority":
+            # Zmiana priorytetu przenosi zadanie na koniec nowej grupy, tak jak w TaskQueue
+            tasks[task_id]["priority"] = entry.get("priority", 1)
+            tasks.move_to_end(task_id)
+        elif op == "move":
+            tasks.move_to_end(task_id, last=entry.get("position") != "front")
+
+    def rewrite(self, tasks):
+        """Zastępuje dziennik zwięzłym zapisem bieżącej kolejki (atomowo, przez plik tymczasowy)."""
+        self._close_file()
+        lines = []
+        for task in tasks:
+            lines.append(json.dumps({"op": "add", "id": task.task_id, "priority": task.priority, "retry": task.retry, "task": task_to_record(task)}, ensure_ascii=False) + "\n")
+            # Zadanie w trakcie przetwarzania musi po awarii wrócić jako przerwane
+            if task.status != "Oczekuje":
+                lines.append(json.dumps({"op": "status", "id": task.task_id, "status": task.status}, ensure_ascii=False) + "\n")
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding='utf-8') as journal_file:
+                journal_file.writelines(lines)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            os.replace(temp_path, self.path)
+            self._appended_lines = 0
+        except OSError as e:
+            print(f"Nie można przepisać dziennika kolejki: {e}")
+
+    # --- Zapis ---
+    def record_add(self, task):
+        self._append({"op": "add", "id": task.task_id, "priority": task.priority, "task": task_to_record(task)})
+
+    def record_remove(self, task_id):
+        self._append({"op": "remove", "id": task_id})
+
+    def record_status(self, task_id, status):
+        self._append({"op": "status", "id": task_id, "status": status})
+
+    def record_priority(self, task_id, priority):
+        self._append({"op": "priority", "id": task_id, "priority": priority})
+
+    def record_move(self, task_id, position):
+        self._append({"op": "move", "id": task_id, "position": position})
+
+    def _append(self, entry):
+        self._pending.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._appended_lines += 1
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        lines, self._pending = self._pending, []
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", encoding='utf-8')
+            self._file.writelines(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            # Dziennik tylko zabezpiecza kolejkę - błąd zapisu nie może przerwać przetwarzania
+            print(f"Błąd zapisu dziennika kolejki: {e}")
+
+    def _close_file(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        self._close_file()
+        self._lock_file.unlock()
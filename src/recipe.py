@@ -0,0 +1,123 @@
+# recipe.py
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import threading
+from pathlib import Path
+from command_builder import (REMUX_STREAM_MAPS, subtitle_filter, remux_output_path, hardsub_output_path, intro_output_path,
+                             mkvmerge_args, ffmpeg_hardsub_args, ffmpeg_intro_args)
+from stage_registry import file_identity
+
+RECIPE_VERSION = 1
+
+_tool_versions = None
+_tool_versions_lock = threading.Lock()
+
+def _tool_version(command):
+    try:
+        if platform.system() == "Windows":
+            result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8', timeout=15, creationflags=subprocess.CREATE_NO_WINDOW)
+        else:
+            result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8', timeout=15)
+        return (result.stdout.splitlines() or [""])[0].strip()
+    except Exception:
+        return ""
+
+
+def tool_versions():
+    """Pierwsze linie `ffmpeg -version` i `mkvmerge --version`, odczytywane raz na uruchomienie programu."""
+    global _tool_versions
+    with _tool_versions_lock:
+        if _tool_versions is None:
+            _tool_versions = {"ffmpeg": _tool_version(["ffmpeg", "-version"]), "mkvmerge": _tool_version(["mkvmerge", "--version"])}
+        return _tool_versions
+
+
+def task_recipe(task, framerate=None, fonts=None, single_pass=False, segment_count=1):
+    """
+    Zwraca (plik wyjściowy, odcisk przepisu) dla zadania albo (None, None), gdy nie da się go ustalić.
+    Odcisk obejmuje tożsamość plików wejściowych, pełne polecenia całego łańcucha i wersje narzędzi,
+    a polecenia pochodzą z tych samych funkcji, z których korzysta ProcessManager.
+    fonts to czcionki dołączane przez mkvmerge (None - cały folder), a single_pass odpowiada trybowi jednoprzebiegowemu.
+    segment_count to liczba segmentów kodowania CPU (1 - bez podziału); liczy się tylko tam, gdzie ProcessManager dzieli kodowanie.
+    """
+    if not task.mkv_file:
+        return None, None
+    mkv_path = Path(task.mkv_file)
+    commands, inputs = [], [mkv_path]
+    if task.selected_script == 1:
+        output_file = hardsub_output_path(task, mkv_path)
+        commands.append(["ffmpeg", *ffmpeg_hardsub_args(task, mkv_path, output_file, subtitle_filter(mkv_path))])
+    elif task.selected_script in [2, 3]:
+        if not task.subtitle_file:
+            return None, None
+        is_final = task.selected_script == 3
+        remux_file = remux_output_path(task, mkv_path, is_final=is_final)
+        args, inputs = mkvmerge_args(task, mkv_path, task.subtitle_file, task.font_folder, remux_file, fonts)
+        commands.append(["mkvmerge", *args])
+        output_file = remux_file
+        if task.selected_script == 2:
+            output_file = hardsub_output_path(task, remux_file, is_final=True)
+            if single_pass:
+                # FFmpeg czyta wtedy źródło i osobny plik napisów, więc jego polecenie (a z nim odcisk) jest inne
+                # niż w łańcuchu - zmiana trybu wymusza ponowne przetworzenie
+                source_filter = subtitle_filter(task.subtitle_file, task.font_folder)
+                commands.append(["ffmpeg", *ffmpeg_hardsub_args(task, mkv_path, output_file, source_filter, REMUX_STREAM_MAPS)])
+            else:
+                commands.append(["ffmpeg", *ffmpeg_hardsub_args(task, remux_file, output_file, subtitle_filter(remux_file))])
+    elif task.selected_script == 4:
+        if not task.intro_file:
+            return None, None
+        output_file = intro_output_path(task, mkv_path)
+        inputs.append(Path(task.intro_file))
+        commands.append(["ffmpeg", *ffmpeg_intro_args(task, mkv_path, task.intro_file, output_file, framerate)])
+    else:
+        return None, None
+
+    recipe = {
+        "version": RECIPE_VERSION,
+        "inputs": [file_identity(path) for path in inputs],
+        "commands": [[str(arg) for arg in command] for command in commands],
+        "tools": tool_versions(),
+    }
+    # Kodowanie w segmentach (tylko CPU, bez etapu jednoprzebiegowego) daje inny plik niż kodowanie w jednym procesie.
+    # Klucz pojawia się tylko wtedy, więc odciski zadań bez podziału pozostają takie jak wcześniej
+    segmented = task.selected_ffmpeg_script == 1 and (task.selected_script == 1 or (task.selected_script == 2 and not single_pass))
+    if segmented and segment_count > 1:
+        recipe["segments"] = segment_count
+    payload = json.dumps(recipe, ensure_ascii=False)
+    return output_file, hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def sidecar_path(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(f".{output_file.name}.recipe.json")
+
+
+def is_up_to_date(output_file, fingerprint):
+    """Plik wyjściowy jest aktualny, gdy istnieje, a zapisany obok odcisk i jego rozmiar/mtime się zgadzają."""
+    try:
+        stat = os.stat(output_file)
+        with open(sidecar_path(output_file), encoding='utf-8') as sidecar:
+            data = json.load(sidecar)
+    except (OSError, ValueError):
+        return False
+    return data.get("fingerprint") == fingerprint and data.get("size") == stat.st_size and data.get("mtime_ns") == stat.st_mtime_ns
+
+
+def write_sidecar(output_file, fingerprint):
+    try:
+        stat = os.stat(output_file)
+        with open(sidecar_path(output_file), "w", encoding='utf-8') as sidecar:
+            json.dump({"fingerprint": fingerprint, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}, sidecar)
+    except OSError:
+        pass
+
+
+def remove_sidecar(output_file):
+    try:
+        os.remove(sidecar_path(output_file))
+    except OSError:
+        pass
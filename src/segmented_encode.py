@@ -0,0 +1,46 @@
+# segmented_encode.py
+import os
+from pathlib import Path
+
+MIN_SEGMENT_SECONDS = 30
+
+def target_cut_times(duration, segment_count):
+    """Równo rozłożone, przybliżone punkty podziału (bez zera i końca pliku)."""
+    if segment_count < 2 or duration <= 0:
+        return []
+    step = duration / segment_count
+    return [step * index for index in range(1, segment_count)]
+
+
+def plan_segments(duration, keyframes, min_length=MIN_SEGMENT_SECONDS):
+    """
+    Zamienia znalezione klatki kluczowe na listę zakresów (start, długość).
+    Ostatni segment ma długość None, czyli biegnie do końca pliku. Cięcia leżące zbyt blisko
+    siebie lub brzegów pliku są pomijane, więc wynik może mieć mniej segmentów niż zamówiono.
+    """
+    cuts = []
+    for keyframe in sorted(keyframes):
+        previous = cuts[-1] if cuts else 0.0
+        if keyframe - previous >= min_length and duration - keyframe >= min_length:
+            cuts.append(keyframe)
+    starts = [0.0] + cuts
+    segments = []
+    for index, start in enumerate(starts):
+        length = starts[index + 1] - start if index + 1 < len(starts) else None
+        segments.append((start, length))
+    return segments
+
+
+def segment_threads(segment_count):
+    """Wątki kodera na jeden segment - wszystkie segmenty razem mają zająć cały procesor."""
+    return max(1, (os.cpu_count() or 1) // max(1, segment_count))
+
+
+def write_concat_list(segment_paths, list_path):
+    # Format demultipleksera concat; apostrofy w ścieżkach muszą zostać zamienione na '\''
+    lines = []
+    for path in segment_paths:
+        escaped = str(Path(path).resolve()).replace("'", "'\\''")
+        lines.append(f"file '{escaped}'\n")
+    with open(list_path, "w", encoding='utf-8') as list_file:
+        list_file.writelines(lines)
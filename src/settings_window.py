@@ -1,3 +1,4 @@
+import os
 import platform
 import shutil
 import subprocess
@@ -9,6 +10,9 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QTabWidget, QWidget, QGroupBo
 from PyQt6.QtGui import QIcon, QPixmap
 import urllib.request
 from PyQt6.QtCore import QSettings, Qt, QProcess, QEvent, QThread, pyqtSignal
+from process_manager import DEFAULT_RESOURCE_BUDGETS
+from presets import preset_names
+from watch_folder import load_watch_folders, save_watch_folders
 
 # --- Nowa klasa do pobierania obrazka w tle ---
 class ImageDownloader(QThread):
@@ -82,6 +86,7 @@ class SettingsWindow(QDialog):
         self.presets_tab = QWidget() # NOWA ZAKŁADKA
         self.processing_tab = QWidget()
         self.diagnostics_tab = QWidget()
+        self.watch_tab = QWidget()
         self.about_tab = QWidget()
 
         self.tabs.addTab(self.general_tab, "Ogólne")
@@ -89,6 +94,7 @@ class SettingsWindow(QDialog):
         self.tabs.addTab(self.presets_tab, "Presety") # NOWA ZAKŁADKA
         self.tabs.addTab(self.processing_tab, "Przetwarzanie")
         self.tabs.addTab(self.diagnostics_tab, "Diagnostyka")
+        self.tabs.addTab(self.watch_tab, "Obserwowane foldery")
         self.tabs.addTab(self.about_tab, "O Programie")
 
         self._create_general_tab()
@@ -96,6 +102,7 @@ class SettingsWindow(QDialog):
         self._create_presets_tab() # NOWA METODA
         self._create_processing_tab()
         self._create_diagnostics_tab()
+        self._create_watch_tab()
         self._create_about_tab()
 
         # Przyciski OK, Anuluj
@@ -462,6 +469,56 @@ class SettingsWindow(QDialog):
             self.settings.endGroup()
             self._load_presets_list()
 
+    def _create_watch_tab(self):
+        layout = QVBoxLayout(self.watch_tab)
+        info_label = QLabel("Odcinki (MKV, a dla skryptów z remuxem także napisy ASS i folder <i>fonts</i>) wrzucone do "
+                            "obserwowanego folderu są dodawane do kolejki automatycznie, według wybranego presetu, "
+                            "gdy tylko pliki przestaną się zmieniać.")
+        info_label.setWordWrap(True)
+        layout.addWidget(info_label)
+
+        self.watch_list_widget = QListWidget()
+        layout.addWidget(self.watch_list_widget)
+
+        buttons_layout = QHBoxLayout()
+        add_button = QPushButton("Dodaj folder...")
+        remove_button = QPushButton("Usuń")
+        add_button.clicked.connect(self._add_watch_folder)
+        remove_button.clicked.connect(self._remove_watch_folder)
+        buttons_layout.addWidget(add_button)
+        buttons_layout.addWidget(remove_button)
+        buttons_layout.addStretch()
+        layout.addLayout(buttons_layout)
+
+    def _refresh_watch_list(self):
+        self.watch_list_widget.clear()
+        for path, preset in self.watch_folders:
+            item = QListWidgetItem(f"{path}  →  {preset}")
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            self.watch_list_widget.addItem(item)
+
+    def _add_watch_folder(self):
+        presets = preset_names(self.settings)
+        if not presets:
+            QMessageBox.warning(self, "Brak presetów", "Najpierw utwórz preset w zakładce 'Presety' - określa on, jak przetwarzać pliki z folderu.")
+            return
+        directory = QFileDialog.getExistingDirectory(self, "Wybierz obserwowany folder")
+        if not directory:
+            return
+        preset, ok = QInputDialog.getItem(self, "Preset folderu", "Preset dla plików z tego folderu:", presets, 0, False)
+        if not ok:
+            return
+        self.watch_folders = [(path, p) for path, p in self.watch_folders if path != directory] + [(directory, preset)]
+        self._refresh_watch_list()
+
+    def _remove_watch_folder(self):
+        item = self.watch_list_widget.currentItem()
+        if not item:
+            return
+        path = item.data(Qt.ItemDataRole.UserRole)
+        self.watch_folders = [(p, preset) for p, preset in self.watch_folders if p != path]
+        self._refresh_watch_list()
+
     def _create_processing_tab(self):
         layout = QFormLayout(self.processing_tab)
         layout.setFieldGrowthPolicy(QFormLayout.FieldGrowthPolicy.ExpandingFieldsGrow)
@@ -474,6 +531,45 @@ class SettingsWindow(QDialog):
         self.subtitle_track_name_edit = QLineEdit()
         layout.addRow("Domyślna nazwa ścieżki napisów:", self.subtitle_track_name_edit)
 
+        self.max_parallel_jobs_spin = QSpinBox()
+        self.max_parallel_jobs_spin.setRange(1, max(1, os.cpu_count() or 1))
+        self.max_parallel_jobs_spin.setToolTip("Liczba zadań z kolejki przetwarzanych jednocześnie")
+        layout.addRow("Maksymalna liczba równoległych zadań:", self.max_parallel_jobs_spin)
+
+        # Osobne budżety pozwalają remuksom (dysk) biec obok kodowania (procesor/karta graficzna)
+        self.budget_spins = {}
+        budget_labels = {
+            "io": "Równoległe remuxy (mkvmerge):",
+            "cpu": "Równoległe kodowania CPU:",
+            "gpu": "Równoległe kodowania GPU:"
+        }
+        for resource_class, text in budget_labels.items():
+            spin = QSpinBox()
+            spin.setRange(1, 16)
+            layout.addRow(text, spin)
+            self.budget_spins[resource_class] = spin
+
+        self.single_pass_checkbox = QCheckBox("Remux + Hardsub jednoprzebiegowo (mkvmerge i FFmpeg równolegle)")
+        self.single_pass_checkbox.setToolTip("FFmpeg wypala napisy bezpośrednio z pliku źródłowego, bez ponownego czytania pliku _remux.mkv")
+        layout.addRow(self.single_pass_checkbox)
+
+        self.segment_count_spin = QSpinBox()
+        self.segment_count_spin.setRange(1, max(1, os.cpu_count() or 1))
+        self.segment_count_spin.setToolTip("Dzieli plik w klatkach kluczowych na kilka części kodowanych równolegle (tylko FFmpeg CPU). 1 = wyłączone")
+        layout.addRow("Segmenty kodowania CPU jednego pliku:", self.segment_count_spin)
+
+        self.skip_up_to_date_checkbox = QCheckBox("Pomijaj zadania, których wynik jest aktualny")
+        self.skip_up_to_date_checkbox.setToolTip("Zadanie jest pomijane, gdy plik wyjściowy powstał z tych samych plików, poleceń i wersji narzędzi")
+        layout.addRow(self.skip_up_to_date_checkbox)
+
+        self.used_fonts_only_checkbox = QCheckBox("Dołączaj tylko czcionki używane w napisach")
+        self.used_fonts_only_checkbox.setToolTip("mkvmerge dołącza tylko czcionki z linii Style: i znaczników \\fn; brakujące czcionki są wypisywane w logu")
+        layout.addRow(self.used_fonts_only_checkbox)
+
+        self.control_enabled_checkbox = QCheckBox("Lokalne API sterowania kolejką (gniazdo \"automatyzer-control\")")
+        self.control_enabled_checkbox.setToolTip("Pozwala innym programom tego użytkownika dodawać i anulować zadania oraz śledzić postęp (JSON Lines)")
+        layout.addRow(self.control_enabled_checkbox)
+
         self.gpu_info_label = QLabel("Wczytywanie...")
         layout.addRow("Karta graficzna:", self.gpu_info_label)
 
@@ -587,6 +683,16 @@ class SettingsWindow(QDialog):
 
         self.gpu_bitrate_spin.setValue(self.settings.value("processing/default_gpu_bitrate", 8, type=int))
         self.subtitle_track_name_edit.setText(self.settings.value("remux/subtitle_track_name", ""))
+        self.max_parallel_jobs_spin.setValue(self.settings.value("processing/max_parallel_jobs", 1, type=int))
+        self.single_pass_checkbox.setChecked(self.settings.value("processing/single_pass_remux_hardsub", False, type=bool))
+        self.segment_count_spin.setValue(self.settings.value("processing/segment_count", 1, type=int))
+        self.skip_up_to_date_checkbox.setChecked(self.settings.value("processing/skip_up_to_date", True, type=bool))
+        self.used_fonts_only_checkbox.setChecked(self.settings.value("processing/attach_used_fonts_only", True, type=bool))
+        self.control_enabled_checkbox.setChecked(self.settings.value("control/enabled", False, type=bool))
+        self.watch_folders = load_watch_folders(self.settings)
+        self._refresh_watch_list()
+        for resource_class, spin in self.budget_spins.items():
+            spin.setValue(self.settings.value(f"processing/budget_{resource_class}", DEFAULT_RESOURCE_BUDGETS[resource_class], type=int))
 
         self._update_style_engine_visibility(self.theme_combo.currentText())
 
@@ -609,6 +715,15 @@ class SettingsWindow(QDialog):
 
         self.settings.setValue("processing/default_gpu_bitrate", self.gpu_bitrate_spin.value())
         self.settings.setValue("remux/subtitle_track_name", self.subtitle_track_name_edit.text())
+        self.settings.setValue("processing/max_parallel_jobs", self.max_parallel_jobs_spin.value())
+        self.settings.setValue("processing/single_pass_remux_hardsub", self.single_pass_checkbox.isChecked())
+        self.settings.setValue("processing/segment_count", self.segment_count_spin.value())
+        self.settings.setValue("processing/skip_up_to_date", self.skip_up_to_date_checkbox.isChecked())
+        self.settings.setValue("processing/attach_used_fonts_only", self.used_fonts_only_checkbox.isChecked())
+        self.settings.setValue("control/enabled", self.control_enabled_checkbox.isChecked())
+        save_watch_folders(self.settings, self.watch_folders)
+        for resource_class, spin in self.budget_spins.items():
+            self.settings.setValue(f"processing/budget_{resource_class}", spin.value())
 
         if self.parent() and hasattr(self.parent(), 'settings_changed'):
             self.parent().settings_changed = True
@@ -0,0 +1,91 @@
+# stage_registry.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from PyQt6.QtCore import QStandardPaths
+
+def file_identity(path):
+    """(ścieżka, rozmiar, mtime_ns) pliku albo (ścieżka, None, None), jeśli pliku nie ma."""
+    try:
+        stat = os.stat(path)
+        return [str(path), stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        return [str(path), None, None]
+
+
+def stage_key(input_paths, args):
+    """Skrót opisujący wejścia etapu (wraz z ich rozmiarem i czasem modyfikacji) oraz jego argumenty."""
+    payload = json.dumps({"inputs": [file_identity(p) for p in input_paths], "args": [str(a) for a in args]}, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class StageRegistry:
+    """
+    Rejestr ukończonych plików pośrednich (np. _remux.mkv).
+    Plik jest zapisywany dopiero po sprawdzeniu (długość i liczba ścieżek z ffprobe), a uznawany za aktualny,
+    gdy zgadza się klucz etapu oraz rozmiar i mtime pliku - przerwany zapis nigdy nie przejdzie tej kontroli.
+    """
+    def __init__(self, db_path=None):
+        if db_path is None:
+            data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppLocalDataLocation)
+            db_path = os.path.join(data_dir, "stage_outputs.sqlite")
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS stage_outputs ("
+                " path TEXT PRIMARY KEY, stage_key TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " duration REAL, track_count INTEGER, recorded_at REAL NOT NULL)"
+            )
+        return self._connection
+
+    def record(self, path, key, duration, track_count):
+        try:
+            stat = os.stat(path)
+            with self._lock:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO stage_outputs (path, stage_key, size, mtime_ns, duration, track_count, recorded_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (str(path), key, stat.st_size, stat.st_mtime_ns, duration, track_count, time.time())
+                )
+                connection.commit()
+            return True
+        except (sqlite3.Error, OSError):
+            return False
+
+    def is_complete(self, path, key):
+        try:
+            stat = os.stat(path)
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT stage_key, size, mtime_ns FROM stage_outputs WHERE path = ?", (str(path),)
+                ).fetchone()
+        except (sqlite3.Error, OSError):
+            return False
+        return row is not None and tuple(row) == (key, stat.st_size, stat.st_mtime_ns)
+
+    def forget(self, path):
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute("DELETE FROM stage_outputs WHERE path = ?", (str(path),))
+                connection.commit()
+        except sqlite3.Error:
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,175 @@
+# task_file.py
+# Parser pliku TXT z zadaniami - bez zależności od Qt, wspólny dla importu w GUI i trybu wiersza poleceń
+import os
+import stat
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from task_queue import PRIORITY_NORMAL
+
+FIELD_COUNT = 8
+
+class PathChecker:
+    """
+    is_file/is_dir z zapamiętanym wynikiem os.stat dla każdej ścieżki - bezpieczne dla wielu wątków.
+    Ten sam folder czcionek podany w setkach linii jest sprawdzany raz, a równoległe zapytania o tę samą ścieżkę
+    czekają na pierwsze z nich zamiast ponownie odpytywać udział sieciowy.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._modes = {}
+
+    def _mode(self, path):
+        key = str(path)
+        with self._lock:
+            future = self._modes.get(key)
+            owner = future is None
+            if owner:
+                future = self._modes[key] = Future()
+        if owner:
+            try:
+                future.set_result(os.stat(key).st_mode)
+            except (OSError, ValueError):
+                future.set_result(None)
+        return future.result()
+
+    def is_file(self, path):
+        mode = self._mode(path)
+        return mode is not None and stat.S_ISREG(mode)
+
+    def is_dir(self, path):
+        mode = self._mode(path)
+        return mode is not None and stat.S_ISDIR(mode)
+
+
+def parse_task_lines(lines, validate=True, checker=None):
+    """
+    Zwraca krotkę (zadania, błędy krytyczne).
+    Zadanie to krotka (mkv, napisy, czcionki, skrypt, enkoder, bitrate, debug, wstawka, wyjście, opcje, ostrzeżenia);
+    opcje (słownik: subtitle_track_name, movie_name, priority) podaje tylko manifest - plik TXT nie ma na nie pól.
+    Przy validate=False ostrzeżenia dotyczą tylko treści linii - istnienie plików sprawdza potem wywołujący (task_warnings).
+    """
+    fatal_errors = []
+    tasks_to_process = list(iter_task_lines(lines, fatal_errors, validate, checker))
+    return tasks_to_process, fatal_errors
+
+
+def iter_task_lines(lines, fatal_errors, validate=True, checker=None):
+    """
+    Generator zadań z kolejnych linii (np. wprost z otwartego pliku) - linie są czytane dopiero przy pobieraniu zadań.
+    Linie z błędami krytycznymi są pomijane, a opisy błędów dopisywane do listy fatal_errors.
+    """
+    checker = checker or PathChecker()
+    # Ten sam folder czcionek czy wstawka powtarza się w wielu liniach, a tworzenie Path jest droższe od reszty parsowania
+    paths = {}
+    def to_path(text):
+        if not text:
+            return None
+        path = paths.get(text)
+        if path is None:
+            path = paths[text] = Path(text)
+        return path
+
+    for i, line in enumerate(lines):
+        line_num, line_content = i + 1, line.strip()
+        if not line_content or line_content.startswith('#'):
+            continue
+
+        parts = [p.strip() for p in line_content.split(';')]
+        while len(parts) < FIELD_COUNT:
+            parts.append("")
+
+        if len(parts) > FIELD_COUNT:
+            fatal_errors.append(f"Linia {line_num}: Zbyt wiele pól (oczekiwano {FIELD_COUNT}, otrzymano {len(parts)}).")
+            continue
+
+        mkv_path_str, sub_path_str, font_path_str, script_str, ffmpeg_str, bitrate_str, debug_str, intro_path_str = parts
+
+        try:
+            script_type = int(script_str) if script_str else 0
+            ffmpeg_type = int(ffmpeg_str) if ffmpeg_str else 0
+            bitrate = int(bitrate_str) if bitrate_str else 0
+            debug = debug_str.lower() in ['true', '1', 'tak']
+        except ValueError:
+            fatal_errors.append(f"Linia {line_num}: Błędny format danych (liczby).")
+            continue
+
+        mkv_path, subtitle_path = to_path(mkv_path_str), to_path(sub_path_str)
+        font_folder, intro_path = to_path(font_path_str), to_path(intro_path_str)
+        warnings = task_warnings(mkv_path, subtitle_path, font_folder, script_type, intro_path, checker) if validate else []
+
+        if script_type not in [1, 2, 3, 4]:
+            warnings.append(f"Nieznany typ skryptu: {script_type}. Ustawiono domyślny (3).")
+            script_type = 3
+
+        if script_type == 3:
+            ffmpeg_type = 0
+            bitrate = 0
+
+        yield (mkv_path, subtitle_path, font_folder, script_type, ffmpeg_type, bitrate, debug, intro_path, None, None, warnings)
+
+
+def read_lines(file, fatal_errors):
+    """
+    Linie otwartego pliku tekstowego; plik jest zamykany po przeczytaniu ostatniej linii.
+    Błąd odczytu w dalszej części pliku (np. zerwane połączenie z udziałem) kończy listę i trafia do fatal_errors.
+    """
+    with file:
+        try:
+            yield from file
+        except (OSError, UnicodeDecodeError) as e:
+            fatal_errors.append(f"Błąd odczytu pliku: {e}")
+
+
+def task_warnings(mkv_path, subtitle_path, font_folder, script_type, intro_path, checker=None):
+    """Ostrzeżenia o brakujących plikach wymaganych przez wybrany skrypt (wyświetlane w oknie edycji importu)."""
+    checker = checker or PathChecker()
+    warnings = []
+    if not mkv_path:
+        warnings.append("Brak ścieżki do pliku MKV.")
+    elif not checker.is_file(mkv_path):
+        warnings.append(f"Plik MKV nie istnieje: {mkv_path}")
+
+    if script_type in [1, 2, 3]:
+        if not subtitle_path:
+            warnings.append("Brak ścieżki do napisów.")
+        elif not checker.is_file(subtitle_path):
+            warnings.append(f"Plik napisów nie istnieje: {subtitle_path}")
+        if not font_folder:
+            warnings.append("Brak folderu czcionek.")
+        elif not checker.is_dir(font_folder):
+            warnings.append(f"Folder czcionek nie istnieje: {font_folder}")
+
+    if script_type == 4:
+        if not intro_path:
+            warnings.append("Brak ścieżki do wstawki.")
+        elif not checker.is_file(intro_path):
+            warnings.append(f"Plik wstawki nie istnieje: {intro_path}")
+    return warnings
+
+
+def batch_task_kwargs(task_data, subtitle_track_name=""):
+    """
+    Zamienia krotkę zadania z importu (bez ostrzeżeń) na argumenty TaskManager.add_tasks.
+    subtitle_track_name to wartość domyślna - nazwa podana w manifeście ma pierwszeństwo.
+    """
+    (mkv_file, subtitle_file, font_folder, selected_script,
+     selected_ffmpeg_script, gpu_bitrate, debug_mode,
+     intro_file, output_path, options) = task_data
+    options = options or {}
+    return {
+        "mkv_file": mkv_file, "subtitle_file": subtitle_file, "font_folder": font_folder,
+        "selected_script": selected_script, "selected_ffmpeg_script": selected_ffmpeg_script,
+        "gpu_bitrate": gpu_bitrate, "debug_mode": debug_mode, "intro_file": intro_file,
+        "output_path": output_path, "subtitle_track_name": options.get("subtitle_track_name", subtitle_track_name),
+        "movie_name": options.get("movie_name", "")
+    }
+
+
+def batch_task_groups(tasks_data):
+    """Dzieli zadania z importu według priorytetu z manifestu: [(priorytet, zadania)] - jedno add_tasks na grupę."""
+    groups = {}
+    for task_data in tasks_data:
+        priority = (task_data[9] or {}).get("priority", PRIORITY_NORMAL)
+        groups.setdefault(priority, []).append(task_data)
+    return list(groups.items())
@@ -0,0 +1,133 @@
+# task_list_model.py
+import itertools
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+class TaskListModel(QAbstractListModel):
+    """
+    Model kolejki zadań dla QListView.
+    Opisy są liczone dopiero przy wyświetlaniu wiersza, a zmiana statusu odświeża tylko jeden wiersz,
+    więc koszt operacji na kolejce nie zależy od jej długości.
+    """
+    COLOR_PROCESSING = QColor("#E67E22")
+    COLOR_ERROR = QColor("#F44336")
+    MIN_EDITS_BEFORE_REBUILD = 64
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks = [] # Kolejność wyświetlania; o kolejności przetwarzania decyduje TaskQueue
+        # ID zadania -> (wiersz, liczba zmian układu uwzględnionych w tym wierszu). Zmiany układu trafiają do
+        # dziennika _edits i są nanoszone na wpis dopiero przy jego odczycie, więc wstawienie, usunięcie
+        # czy przesunięcie wiersza nie przelicza całej mapy
+        self._rows = {}
+        self._edits = []
+        self.detailed_view = False
+        self.is_task_running = lambda task: False # Podmieniane przez TaskManager po utworzeniu ProcessManagera
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tasks)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.tasks):
+            return None
+        task = self.tasks[index.row()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            text = task.get_description(detailed=self.detailed_view)
+            if self.is_task_running(task):
+                text = ("► Przetwarzanie:\n" if self.detailed_view else "► ") + text
+            return text
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if "Przetwarzanie" in task.status or "Przygotowywanie" in task.status or "Krok" in task.status:
+                return self.COLOR_PROCESSING
+            if "Błąd" in task.status:
+                return self.COLOR_ERROR
+        if role == Qt.ItemDataRole.UserRole:
+            return task
+        return None
+
+    def row_of(self, task_id):
+        entry = self._rows.get(task_id)
+        if entry is None:
+            return -1
+        row, version = entry
+        if version < len(self._edits):
+            for edit in itertools.islice(self._edits, version, None):
+                row = self._replay(row, edit)
+            self._rows[task_id] = (row, len(self._edits))
+        if not 0 <= row < len(self.tasks) or self.tasks[row].task_id != task_id:
+            # Nie powinno się zdarzyć; na wszelki wypadek mapa jest budowana od nowa
+            self._rebuild_rows()
+            return self._rows.get(task_id, (-1, 0))[0]
+        return row
+
+    @staticmethod
+    def _replay(row, edit):
+        kind, first, second = edit
+        if kind == "insert":
+            return row + second if row >= first else row
+        if kind == "remove":
+            return row - 1 if row > first else row
+        # Przesunięcie wiersza first na pozycję second
+        if row == first:
+            return second
+        if first < row <= second:
+            return row - 1
+        if second <= row < first:
+            return row + 1
+        return row
+
+    def _record_edit(self, edit):
+        self._edits.append(edit)
+        # Dziennik dłuższy niż lista zadań - taniej zbudować mapę od nowa (koszt rozłożony na wszystkie zmiany)
+        if len(self._edits) > max(len(self.tasks), self.MIN_EDITS_BEFORE_REBUILD):
+            self._rebuild_rows()
+
+    def _rebuild_rows(self):
+        self._rows = {task.task_id: (row, 0) for row, task in enumerate(self.tasks)}
+        self._edits = []
+
+    def insert_tasks(self, row, tasks):
+        """Wstawia całą paczkę zadań jednym powiadomieniem widoku."""
+        if not tasks:
+            return
+        self.beginInsertRows(QModelIndex(), row, row + len(tasks) - 1)
+        self.tasks[row:row] = tasks
+        self._record_edit(("insert", row, len(tasks)))
+        for offset, task in enumerate(tasks):
+            self._rows[task.task_id] = (row + offset, len(self._edits))
+        self.endInsertRows()
+
+    def remove_row(self, row):
+        if not 0 <= row < len(self.tasks):
+            return None
+        self.beginRemoveRows(QModelIndex(), row, row)
+        task = self.tasks.pop(row)
+        self._rows.pop(task.task_id, None)
+        self._record_edit(("remove", row, 1))
+        self.endRemoveRows()
+        return task
+
+    def move_row(self, source, target):
+        """Przenosi wiersz tak, aby po zmianie znalazł się na pozycji target."""
+        if source == target or not 0 <= source < len(self.tasks) or not 0 <= target < len(self.tasks):
+            return
+        # beginMoveRows oczekuje pozycji docelowej liczonej przed usunięciem wiersza źródłowego
+        destination = target + 1 if target > source else target
+        self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), destination)
+        task = self.tasks.pop(source)
+        self.tasks.insert(target, task)
+        self._record_edit(("move", source, target))
+        self._rows[task.task_id] = (target, len(self._edits))
+        self.endMoveRows()
+
+    def refresh_row(self, row):
+        if 0 <= row < len(self.tasks):
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ForegroundRole])
+
+    def set_detailed_view(self, enabled):
+        self.detailed_view = enabled
+        # Zmienia się wysokość wszystkich wierszy, więc widok musi przeliczyć cały układ
+        self.layoutAboutToBeChanged.emit()
+        self.layoutChanged.emit()
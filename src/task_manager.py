@@ -1,9 +1,16 @@
 # task_manager.py (Wersja z obsługą konfigurowalnej nazwy ścieżki napisów)
 
-from PyQt6.QtWidgets import QListWidgetItem
-from PyQt6.QtGui import QColor
 from pathlib import Path
 from dataclasses import dataclass, field # Dodano import 'field'
+from media_probe import get_probe_service
+from task_list_model import TaskListModel
+from task_queue import TaskQueue, PRIORITY_NORMAL, PRIORITY_LABELS
+from task_manifest import TASK_FIELDS
+
+# Klasy zasobów, według których planista dopuszcza zadania do równoległego przetwarzania
+RESOURCE_IO = "io"    # remux mkvmerge - ograniczony przez dysk
+RESOURCE_CPU = "cpu"  # kodowanie libx264
+RESOURCE_GPU = "gpu"  # kodowanie NVENC / VA-API
 
 @dataclass
 class Task:
@@ -21,6 +28,16 @@ class Task:
     keep_original_movie_name: bool = field(default=False) # Dodajemy to pole
 
     status: str = "Oczekuje"
+    task_id: int = 0 # Nadawane przez TaskQueue; stałe przez cały czas życia zadania
+    priority: int = PRIORITY_NORMAL
+    retry: bool = False # Zadanie przerwane zamknięciem lub awarią programu, przywrócone z dziennika
+
+    @property
+    def resource_class(self):
+        # Skrypt 3 to czysty remux; pozostałe kodują wideo, a o zasobie decyduje wybrany enkoder
+        if self.selected_script == 3:
+            return RESOURCE_IO
+        return RESOURCE_GPU if self.selected_ffmpeg_script in [2, 3] else RESOURCE_CPU
 
     def get_description(self, detailed: bool = False):
         if not self.mkv_file:
@@ -73,6 +90,10 @@ class Task:
 
             if self.output_path:
                 details.append(f"  > Wyjście: {path_repr_detailed(self.output_path)}")
+            if self.priority != PRIORITY_NORMAL:
+                details.append(f"  > Priorytet: {PRIORITY_LABELS[self.priority]}")
+            if self.retry:
+                details.append("  > Ponowienie po przerwaniu")
             if self.status != "Oczekuje":
                 details.append(f"  > Status: {self.status}")
 
@@ -98,6 +119,10 @@ class Task:
                 details.append(f"Typ: FFmpeg + Wstawka | Bitrate: {self.gpu_bitrate} Mbps")
                 details.append(f"Wstawka: {path_repr_simple(self.intro_file)}")
 
+            if self.priority != PRIORITY_NORMAL:
+                details.append(f"Priorytet: {PRIORITY_LABELS[self.priority]}")
+            if self.retry:
+                details.append("Ponowienie po przerwaniu")
             if self.status != "Oczekuje":
                 details.append(f"Status: {self.status}")
 
@@ -105,39 +130,69 @@ class Task:
 
 
 class TaskManager:
-    def __init__(self, task_list_widget, process_manager, rpc_manager):
-        self.tasks = []
-        self.task_list_widget = task_list_widget
+    def __init__(self, task_list_view, process_manager, rpc_manager):
+        self.queue = TaskQueue()
+        self.model = TaskListModel()
+        # Bez widoku (tryb wiersza poleceń) model działa tak samo, tylko nikt go nie wyświetla
+        self.task_list_view = task_list_view
+        if self.task_list_view is not None:
+            self.task_list_view.setModel(self.model)
+            # Wiersze w widoku skróconym mają stałą wysokość - widok nie musi mierzyć każdego z nich
+            self.task_list_view.setUniformItemSizes(True)
         self.process_manager = process_manager
         self.rpc_manager = rpc_manager
         self.detailed_view = False
+        self.probe_service = get_probe_service()
+        self.journal = None
+        self.model.is_task_running = lambda task: bool(self.process_manager) and self.process_manager.is_task_running(task)
 
-    def update_list_widget(self):
-        self.task_list_widget.clear()
-        is_running = self.process_manager and self.process_manager.is_running()
+    def attach_journal(self, journal):
+        """Odtwarza kolejkę z dziennika i od tej pory zapisuje w nim każdą zmianę.
 
-        for i, task in enumerate(self.tasks):
-            description = task.get_description(detailed=self.detailed_view)
-            item = QListWidgetItem(description)
+        Zadania, które były w trakcie przetwarzania, wracają na początek swojej grupy priorytetu
+        z oznaczeniem ponowienia. Zwraca krotkę (liczba przywróconych, liczba przerwanych),
+        a None, gdy dziennik jest zablokowany przez inną instancję programu."""
+        if not journal.try_lock():
+            return None
+        records = journal.load()
+        interrupted = 0
+        tasks = []
+        # Przerwane zadania idą pierwsze; sortowanie jest stabilne, więc reszta zachowuje kolejność
+        for record in sorted(records, key=lambda r: r.get("status", "Oczekuje") == "Oczekuje"):
+            fields = {name: record.get(name) for name in TASK_FIELDS}
+            fields["subtitle_track_name"] = fields["subtitle_track_name"] or ""
+            fields["movie_name"] = fields["movie_name"] or ""
+            try:
+                task = self._create_task(**fields)
+            except (TypeError, ValueError):
+                continue
+            was_running = record.get("status", "Oczekuje") != "Oczekuje"
+            task.priority = record.get("priority", PRIORITY_NORMAL)
+            task.retry = was_running or record.get("retry", False)
+            interrupted += was_running
+            tasks.append(task)
+        for task in tasks:
+            self.queue.add(task)
+        # Widok pokazuje kolejność kolejki, a nie kolejność z dziennika
+        self.model.insert_tasks(0, list(self.queue.iter_pending()))
+        journal.rewrite(self.model.tasks)
+        self.journal = journal
+        return len(tasks), interrupted
 
-            if i == 0 and is_running:
-                if self.detailed_view:
-                    item.setText("► Przetwarzanie:\n" + item.text())
-                else:
-                    item.setText("► " + item.text())
+    @property
+    def tasks(self):
+        return self.model.tasks
 
-            if "Przetwarzanie" in task.status or "Przygotowywanie" in task.status or "Krok" in task.status:
-                item.setForeground(QColor("#E67E22"))
-            elif "Błąd" in task.status:
-                item.setForeground(QColor("#F44336"))
-            self.task_list_widget.addItem(item)
+    def refresh_task(self, task):
+        self.model.refresh_row(self.model.row_of(task.task_id))
 
     def set_detailed_view(self, enabled: bool):
         self.detailed_view = enabled
-        self.update_list_widget()
+        if self.task_list_view is not None:
+            self.task_list_view.setUniformItemSizes(not enabled)
+        self.model.set_detailed_view(enabled)
 
-    # --- ZMIANA 3: Zaktualizowana sygnatura metody ---
-    def add_task(self, mkv_file, subtitle_file, font_folder, selected_script, selected_ffmpeg_script, gpu_bitrate, debug_mode, intro_file, output_path=None, subtitle_track_name="", movie_name=""):
+    def _create_task(self, mkv_file, subtitle_file, font_folder, selected_script, selected_ffmpeg_script, gpu_bitrate, debug_mode, intro_file, output_path=None, subtitle_track_name="", movie_name=""):
         task = Task(
             mkv_file=Path(mkv_file) if mkv_file else None,
             subtitle_file=Path(subtitle_file) if subtitle_file else None,
@@ -151,32 +206,106 @@ class TaskManager:
             subtitle_track_name=subtitle_track_name,
             movie_name=movie_name
         )
-        self.tasks.append(task)
-        self.update_list_widget()
-    # ----------------------------------------------------
+        # Odczyt informacji o plikach startuje od razu, więc start zadania nie czeka na ffprobe
+        self.probe_service.prefetch(task.mkv_file)
+        self.probe_service.prefetch(task.intro_file)
+        return task
+
+    def add_task(self, mkv_file, subtitle_file, font_folder, selected_script, selected_ffmpeg_script, gpu_bitrate, debug_mode, intro_file, output_path=None, subtitle_track_name="", movie_name=""):
+        task = self._create_task(mkv_file, subtitle_file, font_folder, selected_script, selected_ffmpeg_script, gpu_bitrate, debug_mode, intro_file, output_path, subtitle_track_name, movie_name)
+        self._enqueue([task])
+        return task
+
+    def add_tasks(self, task_kwargs_list, priority=PRIORITY_NORMAL):
+        """Dodaje wiele zadań naraz (lista słowników z argumentami add_task) jednym wstawieniem do modelu."""
+        tasks = [self._create_task(**task_kwargs) for task_kwargs in task_kwargs_list]
+        self._enqueue(tasks, priority)
+        return tasks
+
+    def _enqueue(self, tasks, priority=PRIORITY_NORMAL):
+        if not tasks:
+            return
+        if priority not in PRIORITY_LABELS:
+            priority = PRIORITY_NORMAL
+        # Nowe zadania mają ten sam priorytet, więc w widoku tworzą jeden ciągły blok na końcu swojej grupy
+        row = self.queue.group_end_row(priority)
+        for task in tasks:
+            task.priority = priority
+            self.queue.add(task)
+            if self.journal:
+                self.journal.record_add(task)
+        self.model.insert_tasks(row, tasks)
 
-    def remove_task(self, index: int):
-        if 0 <= index < len(self.tasks):
-            self.tasks.pop(index)
-            self.update_list_widget()
+    def remove_task(self, task_id):
+        if self.queue.remove(task_id) is not None:
+            self.model.remove_row(self.model.row_of(task_id))
+            if self.journal:
+                self.journal.record_remove(task_id)
+                if not self.has_tasks():
+                    self.journal.rewrite([])
 
-    def get_task(self, index: int):
-        return self.tasks[index] if 0 <= index < len(self.tasks) else None
+    def get_task(self, task_id):
+        return self.queue.get(task_id)
+
+    def task_at_row(self, row):
+        return self.tasks[row] if 0 <= row < len(self.tasks) else None
 
     def has_tasks(self):
-        return len(self.tasks) > 0
-
-    def complete_current_task(self):
-        if self.tasks:
-            self.tasks.pop(0)
-            self.update_list_widget()
-
-    def mark_current_as_processing(self, status="Przetwarzanie..."):
-        if self.tasks:
-            self.tasks[0].status = status
-            self.update_list_widget()
-
-    def mark_current_as_error(self, status="Błąd"):
-        if self.tasks and hasattr(self.tasks[0], 'status'):
-            self.tasks[0].status = status
-            self.update_list_widget()
+        return len(self.queue) > 0
+
+    def pending_count(self):
+        return self.queue.pending_count()
+
+    def take_next_pending_task(self, can_admit=None):
+        """Zdejmuje z kolejki pierwsze oczekujące zadanie (według priorytetu) i przenosi je do aktywnych.
+
+        Opcjonalny `can_admit` pozwala pominąć zadania, dla których brakuje wolnego budżetu zasobów,
+        dzięki czemu remuxy mogą wyprzedzić czekające w kolejce kodowanie."""
+        task = self.queue.next_pending(can_admit)
+        if task is None:
+            return None
+        source = self.model.row_of(task.task_id)
+        self.queue.activate(task.task_id)
+        self.model.move_row(source, self.queue.active_count() - 1)
+        return task
+
+    def set_priority(self, task_id, priority):
+        if self.queue.set_priority(task_id, priority):
+            self._move_pending_row(task_id)
+            if self.journal:
+                self.journal.record_priority(task_id, priority)
+
+    def move_to_front(self, task_id):
+        if self.queue.move_to_front(task_id):
+            self._move_pending_row(task_id)
+            if self.journal:
+                self.journal.record_move(task_id, "front")
+
+    def move_to_back(self, task_id):
+        if self.queue.move_to_back(task_id):
+            self._move_pending_row(task_id)
+            if self.journal:
+                self.journal.record_move(task_id, "back")
+
+    def _move_pending_row(self, task_id):
+        source = self.model.row_of(task_id)
+        self.model.move_row(source, self.queue.pending_row(task_id))
+        self.model.refresh_row(self.model.row_of(task_id))
+
+    def complete_task(self, task):
+        self.remove_task(task.task_id)
+
+    def mark_as_processing(self, task, status="Przetwarzanie..."):
+        self._set_status(task, status)
+
+    def mark_as_error(self, task, status="Błąd"):
+        self._set_status(task, status)
+
+    def _set_status(self, task, status):
+        if task.task_id in self.queue:
+            task.status = status
+            self.refresh_task(task)
+            if self.journal:
+                self.journal.record_status(task.task_id, status)
+                if self.journal.needs_compaction:
+                    self.journal.rewrite(self.model.tasks)
@@ -0,0 +1,228 @@
+# task_manifest.py
+# Manifest zadań w formacie JSON / JSON Lines / TOML - bez zależności od Qt, wspólny dla GUI, trybu wiersza poleceń i eksportu kolejki
+import json
+import tomllib
+from pathlib import Path
+from presets import preset_task_kwargs
+from task_file import PathChecker, task_warnings
+from task_queue import PRIORITY_LABELS
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIXES = {".json", ".jsonl", ".toml"}
+
+# Pola zadania - te same, które przyjmuje TaskManager.add_task (zapisywane też w dzienniku kolejki)
+TASK_FIELDS = (
+    "mkv_file", "subtitle_file", "font_folder", "selected_script", "selected_ffmpeg_script",
+    "gpu_bitrate", "debug_mode", "intro_file", "output_path", "subtitle_track_name", "movie_name"
+)
+
+# Domyślne wartości pól zadania, których nie trzeba podawać
+TASK_DEFAULTS = {
+    "subtitle_file": None, "font_folder": None, "selected_ffmpeg_script": 1, "gpu_bitrate": 8,
+    "debug_mode": False, "intro_file": None, "output_path": None, "subtitle_track_name": "", "movie_name": ""
+}
+
+PATH_FIELDS = {"mkv_file", "subtitle_file", "font_folder", "intro_file", "output_path"}
+
+# Typy i dozwolone wartości pól manifestu; oprócz pól zadania: preset, priorytet i zachowanie tytułu filmu
+FIELD_TYPES = {
+    **{name: str for name in PATH_FIELDS},
+    "selected_script": int, "selected_ffmpeg_script": int, "gpu_bitrate": int, "debug_mode": bool,
+    "subtitle_track_name": str, "movie_name": str, "keep_movie_name": bool, "preset": str, "priority": int,
+}
+FIELD_CHOICES = {
+    "selected_script": {1, 2, 3, 4},
+    "selected_ffmpeg_script": {1, 2, 3},
+    "gpu_bitrate": set(range(0, 101)),
+    "priority": set(PRIORITY_LABELS),
+}
+
+class ManifestError(Exception):
+    pass
+
+
+def task_to_record(task):
+    record = {}
+    for name in TASK_FIELDS:
+        value = getattr(task, name)
+        record[name] = str(value) if isinstance(value, Path) else value
+    return record
+
+
+def manifest_record(task):
+    """Zadanie z kolejki jako wpis manifestu (eksport kolejki); wczytany ponownie daje to samo zadanie."""
+    record = {name: value for name, value in task_to_record(task).items() if value is not None}
+    # Spacja w nazwie filmu oznacza zachowanie oryginalnego tytułu - w manifeście zapisana wprost
+    if record.get("movie_name") == " ":
+        del record["movie_name"]
+        record["keep_movie_name"] = True
+    record["priority"] = task.priority
+    return record
+
+
+def write_manifest(path, tasks):
+    """Zapisuje zadania jako manifest JSON albo JSON Lines (według rozszerzenia); zwraca liczbę zadań."""
+    records = [manifest_record(task) for task in tasks]
+    with open(path, "w", encoding='utf-8') as manifest_file:
+        if Path(path).suffix.lower() == ".jsonl":
+            manifest_file.write(json.dumps({"version": MANIFEST_VERSION}) + "\n")
+            manifest_file.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        else:
+            json.dump({"version": MANIFEST_VERSION, "tasks": records}, manifest_file, ensure_ascii=False, indent=2)
+    return len(records)
+
+
+def _check_fields(label, entry, allowed):
+    if not isinstance(entry, dict):
+        raise ManifestError(f"{label}: oczekiwano obiektu.")
+    unknown = set(entry) - allowed
+    if unknown:
+        raise ManifestError(f"{label}: nieznane pola: {', '.join(sorted(unknown))}")
+    for name, value in entry.items():
+        expected = FIELD_TYPES[name]
+        if value is None and name in PATH_FIELDS - {"mkv_file"}:
+            continue
+        # bool jest podklasą int - true nie może zostać przyjęte jako numer skryptu
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ManifestError(f"{label}: pole '{name}' musi być typu {expected.__name__}.")
+        if name in FIELD_CHOICES and value not in FIELD_CHOICES[name]:
+            raise ManifestError(f"{label}: niedozwolona wartość pola '{name}': {value}")
+
+
+def _entries(path, fatal_errors):
+    """Generator (etykieta, wpis zadania, wartości domyślne) z pliku manifestu."""
+    suffix = path.suffix.lower()
+    if suffix == ".jsonl":
+        # JSON Lines czytany jest linia po linii; linia z "defaults" (bez mkv_file) ustawia wartości dla kolejnych zadań
+        defaults = {}
+        try:
+            manifest_file = open(path, encoding='utf-8')
+        except OSError as e:
+            fatal_errors.append(f"Nie udało się otworzyć pliku: {e}")
+            return
+        with manifest_file:
+            try:
+                for line_num, line in enumerate(manifest_file, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError as e:
+                        fatal_errors.append(f"Linia {line_num}: niepoprawny JSON ({e}).")
+                        continue
+                    if isinstance(entry, dict) and "mkv_file" not in entry and ("defaults" in entry or "version" in entry):
+                        defaults = _header_defaults(f"Linia {line_num}", entry, fatal_errors, defaults)
+                        continue
+                    yield f"Linia {line_num}", entry, defaults
+            except (OSError, UnicodeDecodeError) as e:
+                fatal_errors.append(f"Błąd odczytu pliku: {e}")
+        return
+
+    try:
+        if suffix == ".toml":
+            with open(path, "rb") as manifest_file:
+                document = tomllib.load(manifest_file)
+        else:
+            with open(path, encoding='utf-8') as manifest_file:
+                document = json.load(manifest_file)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        # tomllib.TOMLDecodeError i json.JSONDecodeError dziedziczą po ValueError
+        fatal_errors.append(f"Nie udało się wczytać manifestu: {e}")
+        return
+
+    if isinstance(document, list):
+        document = {"tasks": document}
+    if not isinstance(document, dict) or not isinstance(document.get("tasks"), list):
+        fatal_errors.append("Manifest musi zawierać listę zadań 'tasks'.")
+        return
+    defaults = _header_defaults("Nagłówek", document, fatal_errors, {}, ignore={"tasks"})
+    for index, entry in enumerate(document["tasks"], 1):
+        yield f"Zadanie {index}", entry, defaults
+
+
+def _header_defaults(label, header, fatal_errors, previous, ignore=()):
+    unknown = set(header) - {"version", "defaults", *ignore}
+    if unknown:
+        fatal_errors.append(f"{label}: nieznane pola: {', '.join(sorted(unknown))}")
+    version = header.get("version", MANIFEST_VERSION)
+    if version != MANIFEST_VERSION:
+        fatal_errors.append(f"{label}: nieobsługiwana wersja manifestu: {version}")
+    defaults = header.get("defaults", {})
+    try:
+        _check_fields(f"{label} (defaults)", defaults, set(FIELD_TYPES) - {"mkv_file"})
+    except ManifestError as e:
+        fatal_errors.append(str(e))
+        return previous
+    return defaults
+
+
+def resolve_task(label, entry, defaults, resolve_preset=None, base_dir=None):
+    """
+    Zwraca (argumenty TaskManager.add_task, opcje zadania).
+    Pierwszeństwo mają pola zadania, potem pola "defaults", a na końcu preset (presetu z "defaults" nie używa
+    zadanie, które podaje własny). Warstwy nakładane są więc w kolejności: TASK_DEFAULTS, preset, pola "defaults",
+    pola zadania.
+    W opcjach są tylko wartości podane jawnie (nazwa ścieżki napisów, nazwa filmu, priorytet) - pozostałe uzupełnia wywołujący.
+    """
+    _check_fields(label, entry, set(FIELD_TYPES))
+    mkv_file = entry.get("mkv_file")
+    if not mkv_file:
+        raise ManifestError(f"{label}: brak pola 'mkv_file'.")
+
+    kwargs = dict(TASK_DEFAULTS)
+    options = {}
+    preset_name = entry.get("preset", defaults.get("preset"))
+    if preset_name is not None:
+        preset = resolve_preset(preset_name) if resolve_preset else None
+        if preset is None:
+            raise ManifestError(f"{label}: preset '{preset_name}' nie istnieje.")
+        preset_kwargs = preset_task_kwargs(preset, Path(mkv_file))
+        kwargs.update({name: value for name, value in preset_kwargs.items() if name not in PATH_FIELDS or value is not None})
+        options.update(subtitle_track_name=preset_kwargs["subtitle_track_name"], movie_name=preset_kwargs["movie_name"])
+    for layer in (defaults, entry):
+        layer = {name: value for name, value in layer.items() if name != "preset"}
+        if layer.pop("keep_movie_name", False):
+            layer["movie_name"] = " "
+        if "priority" in layer:
+            options["priority"] = layer.pop("priority")
+        kwargs.update(layer)
+        options.update({name: layer[name] for name in ("subtitle_track_name", "movie_name") if name in layer})
+
+    if kwargs.get("selected_script") not in FIELD_CHOICES["selected_script"]:
+        raise ManifestError(f"{label}: brak pola 'selected_script' (ani w presecie).")
+    for name in PATH_FIELDS:
+        if kwargs[name] is not None:
+            # Ścieżki względne liczone są od folderu manifestu, więc manifest można przenosić razem z plikami
+            kwargs[name] = Path(base_dir, kwargs[name]) if base_dir else Path(kwargs[name])
+    if kwargs["selected_script"] == 3:
+        kwargs["selected_ffmpeg_script"] = 0
+        kwargs["gpu_bitrate"] = 0
+    if kwargs["selected_script"] == 2:
+        # Skrypt 2 nigdy nie używa niestandardowej ścieżki wyjściowej
+        kwargs["output_path"] = None
+    return kwargs, options
+
+
+def iter_manifest_tasks(path, fatal_errors, resolve_preset=None, validate=True, checker=None):
+    """
+    Generator zadań z manifestu w tym samym układzie co iter_task_lines (z opcjami zadania zamiast None).
+    JSON Lines czytany jest leniwie, linia po linii. Błędne wpisy są pomijane, a opisy błędów trafiają do fatal_errors.
+    resolve_preset(nazwa) zwraca słownik presetu albo None.
+    """
+    path = Path(path)
+    checker = checker or PathChecker()
+    for label, entry, defaults in _entries(path, fatal_errors):
+        try:
+            kwargs, options = resolve_task(label, entry, defaults, resolve_preset, path.parent)
+        except ManifestError as e:
+            fatal_errors.append(str(e))
+            continue
+        warnings = task_warnings(kwargs["mkv_file"], kwargs["subtitle_file"], kwargs["font_folder"],
+                                 kwargs["selected_script"], kwargs["intro_file"], checker) if validate else []
+        yield (kwargs["mkv_file"], kwargs["subtitle_file"], kwargs["font_folder"], kwargs["selected_script"],
+               kwargs["selected_ffmpeg_script"], kwargs["gpu_bitrate"], kwargs["debug_mode"], kwargs["intro_file"],
+               kwargs["output_path"], options, warnings)
+
+
+def is_manifest(path):
+    return Path(path).suffix.lower() in MANIFEST_SUFFIXES
@@ -0,0 +1,107 @@
+# task_queue.py
+import itertools
+from collections import OrderedDict
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_LABELS = {PRIORITY_HIGH: "Wysoki", PRIORITY_NORMAL: "Normalny", PRIORITY_LOW: "Niski"}
+
+class TaskQueue:
+    """
+    Kolejka zadań ze stałymi identyfikatorami.
+    Zadania oczekujące leżą w osobnym OrderedDict dla każdego priorytetu, a podjęte w sekcji aktywnej,
+    więc pobranie następnego zadania, usunięcie, wyszukanie po ID i zmiana kolejności są O(1).
+    Kolejność wyświetlania to: aktywne (w kolejności startu), potem oczekujące od najwyższego priorytetu.
+    """
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._tasks = {}
+        self._active = OrderedDict()
+        self._pending = {priority: OrderedDict() for priority in sorted(PRIORITY_LABELS)}
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def get(self, task_id):
+        return self._tasks.get(task_id)
+
+    def active_count(self):
+        return len(self._active)
+
+    def pending_count(self):
+        return sum(len(bucket) for bucket in self._pending.values())
+
+    def is_pending(self, task_id):
+        task = self._tasks.get(task_id)
+        return task is not None and task_id in self._pending[task.priority]
+
+    def add(self, task):
+        """Nadaje zadaniu ID i dopisuje je na koniec grupy jego priorytetu."""
+        if task.priority not in self._pending:
+            task.priority = PRIORITY_NORMAL
+        task.task_id = next(self._ids)
+        self._tasks[task.task_id] = task
+        self._pending[task.priority][task.task_id] = task
+        return task.task_id
+
+    def iter_pending(self):
+        for bucket in self._pending.values():
+            yield from bucket.values()
+
+    def next_pending(self, can_admit=None):
+        for task in self.iter_pending():
+            if can_admit is None or can_admit(task):
+                return task
+        return None
+
+    def activate(self, task_id):
+        """Przenosi zadanie z oczekujących do aktywnych (na koniec sekcji aktywnej)."""
+        task = self._tasks[task_id]
+        self._pending[task.priority].pop(task_id, None)
+        self._active[task_id] = task
+        return task
+
+    def remove(self, task_id):
+        task = self._tasks.pop(task_id, None)
+        if task is not None:
+            self._active.pop(task_id, None)
+            self._pending[task.priority].pop(task_id, None)
+        return task
+
+    def set_priority(self, task_id, priority):
+        """Zmienia priorytet oczekującego zadania; trafia ono na koniec nowej grupy."""
+        task = self._tasks[task_id]
+        if priority not in self._pending or not self.is_pending(task_id):
+            return False
+        del self._pending[task.priority][task_id]
+        task.priority = priority
+        self._pending[priority][task_id] = task
+        return True
+
+    def move_to_front(self, task_id):
+        """Przesuwa oczekujące zadanie na początek grupy jego priorytetu."""
+        if not self.is_pending(task_id):
+            return False
+        self._pending[self._tasks[task_id].priority].move_to_end(task_id, last=False)
+        return True
+
+    def move_to_back(self, task_id):
+        if not self.is_pending(task_id):
+            return False
+        self._pending[self._tasks[task_id].priority].move_to_end(task_id)
+        return True
+
+    def pending_row(self, task_id):
+        """Pozycja oczekującego zadania na liście wyświetlania, gdy leży na brzegu swojej grupy."""
+        task = self._tasks[task_id]
+        start = len(self._active) + sum(len(self._pending[p]) for p in self._pending if p < task.priority)
+        bucket = self._pending[task.priority]
+        return start if next(iter(bucket)) == task_id else start + len(bucket) - 1
+
+    def group_end_row(self, priority):
+        """Pozycja za ostatnim zadaniem danej grupy - tam wstawiane są nowe zadania."""
+        return len(self._active) + sum(len(self._pending[p]) for p in self._pending if p <= priority)
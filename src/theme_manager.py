@@ -146,7 +146,7 @@ def get_dark_theme_qss():
     }
 
     /* --- Listy i Pola Tekstowe --- */
-    QTextEdit, QListWidget {
+    QTextEdit, QPlainTextEdit, QListView {
         background-color: #212121;
         border: 1px solid #4f4f4f;
         border-radius: 5px;
@@ -156,23 +156,23 @@ def get_dark_theme_qss():
         color: #e0e0e0; /* Dodano kolor tekstu dla stanu normalnego */
     }
     /* NOWE: Style dla wyłączonych list i pól tekstowych */
-    QTextEdit:disabled, QListWidget:disabled {
+    QTextEdit:disabled, QPlainTextEdit:disabled, QListView:disabled {
         background-color: #444444;
         color: #888888;
     }
 
-    QTextEdit:focus, QListWidget:focus {
+    QTextEdit:focus, QPlainTextEdit:focus, QListView:focus {
         border: 1px solid #4f4f4f;
     }
 
-    QListWidget::item {
+    QListView::item {
         padding: 5px;
         border-radius: 4px;
     }
-    QListWidget::item:hover {
+    QListView::item:hover {
         background-color: #3c3c3c;
     }
-    QListWidget::item:selected {
+    QListView::item:selected {
         background-color: #E67E22;
         color: #ffffff;
     }
@@ -360,7 +360,7 @@ def get_professional_light_theme_qss():
     }
 
     /* --- Pola wejściowe --- */
-    QLineEdit, QSpinBox, QComboBox, QTextEdit, QListWidget {
+    QLineEdit, QSpinBox, QComboBox, QTextEdit, QPlainTextEdit, QListView {
         background-color: #FFFFFF;
         color: #111111;
         border: 1px solid #C0C0C0;
@@ -368,13 +368,13 @@ def get_professional_light_theme_qss():
         padding: 5px;
         min-height: 26px;
     }
-    QTextEdit, QListWidget {
+    QTextEdit, QPlainTextEdit, QListView {
         outline: none; /* Usuwa domyślną ramkę fokusu */
     }
     QLineEdit:focus, QSpinBox:focus, QComboBox:focus {
         border: 1px solid #0078D4; /* Pozostawia ramkę fokusu dla pól edycji */
     }
-    QLineEdit:disabled, QSpinBox:disabled, QComboBox:disabled, QTextEdit:disabled, QListWidget:disabled {
+    QLineEdit:disabled, QSpinBox:disabled, QComboBox:disabled, QTextEdit:disabled, QPlainTextEdit:disabled, QListView:disabled {
         background-color: #F0F0F0;
         color: #A0A0A0;
         border: 1px solid #E0E0E0;
@@ -413,9 +413,9 @@ def get_professional_light_theme_qss():
     QRadioButton::indicator:checked { background-color: qradialgradient(cx:0.5, cy:0.5, radius: 0.4, fx:0.5, fy:0.5, stop:0 #0078D4, stop:1 #0078D4); border: 1px solid #0078D4; }
 
     /* --- Listy i Pola Tekstowe --- */
-    QListWidget::item { padding: 5px; border-radius: 4px; }
-    QListWidget::item:hover { background-color: #E3F2FD; }
-    QListWidget::item:selected { background-color: #0078D4; color: #FFFFFF; }
+    QListView::item { padding: 5px; border-radius: 4px; }
+    QListView::item:hover { background-color: #E3F2FD; }
+    QListView::item:selected { background-color: #0078D4; color: #FFFFFF; }
 
     /* --- Zakładki (Tabs) --- */
     QTabWidget::pane {
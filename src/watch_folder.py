@@ -0,0 +1,233 @@
+# watch_folder.py
+import os
+import time
+from pathlib import Path
+from PyQt6.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+from episode_scan import FONT_DIR_NAMES, is_font_file, episode_font_dir
+from presets import load_preset, preset_task_kwargs
+
+def load_watch_folders(settings):
+    """Lista obserwowanych folderów jako [(ścieżka, nazwa presetu)]."""
+    folders = []
+    count = settings.beginReadArray("watch_folders")
+    for i in range(count):
+        settings.setArrayIndex(i)
+        path = settings.value("path", "")
+        if path:
+            folders.append((path, settings.value("preset", "")))
+    settings.endArray()
+    return folders
+
+
+def save_watch_folders(settings, folders):
+    settings.remove("watch_folders")
+    settings.beginWriteArray("watch_folders", len(folders))
+    for i, (path, preset) in enumerate(folders):
+        settings.setArrayIndex(i)
+        settings.setValue("path", path)
+        settings.setValue("preset", preset)
+    settings.endArray()
+
+
+def _file_state(entry):
+    stat = entry.stat()
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _font_dir_state(path):
+    """Stan folderu czcionek: (nazwa, rozmiar, mtime) każdej czcionki; pusta krotka, gdy czcionek jeszcze nie ma."""
+    try:
+        with os.scandir(path) as entries:
+            return tuple(sorted(
+                (entry.name, *_file_state(entry)) for entry in entries
+                if entry.is_file() and is_font_file(entry.name)
+            ))
+    except OSError:
+        return ()
+
+
+class WatchFolderService(QObject):
+    """
+    Obserwuje foldery, do których trafiają odcinki, i samodzielnie dodaje zadania według przypisanego presetu.
+    Zmiany zgłasza QFileSystemWatcher (inotify w Linuksie); dodatkowe okresowe skanowanie obejmuje udziały sieciowe,
+    na których powiadomienia nie działają. Zestaw (MKV, a dla skryptów z remuxem także ASS i czcionki - luzem obok
+    odcinków albo w podfolderze, jak przy skanowaniu drzewa katalogów)
+    trafia do kolejki dopiero wtedy, gdy rozmiary i czasy modyfikacji plików nie zmieniają się przez STABLE_SECONDS,
+    więc kopiowany jeszcze plik nie zostanie podjęty.
+    """
+    tasks_ready = pyqtSignal(list, str) # argumenty TaskManager.add_tasks, folder
+    message = pyqtSignal(str)
+
+    SCAN_DELAY_MS = 500
+    CHECK_INTERVAL_MS = 1000
+    POLL_INTERVAL_MS = 30000
+    STABLE_SECONDS = 3.0
+
+    def __init__(self, settings, is_queued=None, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.is_queued = is_queued or (lambda mkv_path: False)
+        self.folders = {} # ścieżka -> nazwa presetu
+        self._pending = {} # ścieżka MKV -> (stan zestawu, czas od którego się nie zmienia)
+        self._done = {} # ścieżka MKV -> (rozmiar, mtime) pliku dodanego w tej sesji
+        self._dirty = set() # foldery do przeskanowania
+        self._reported = set() # ostrzeżenia wyświetlone już raz
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._schedule_scan)
+        self._scan_timer = QTimer(self)
+        self._scan_timer.setSingleShot(True)
+        self._scan_timer.timeout.connect(self._scan_dirty)
+        # Co sekundę sprawdzane są tylko foldery z niegotowymi jeszcze zestawami
+        self._check_timer = QTimer(self)
+        self._check_timer.setInterval(self.CHECK_INTERVAL_MS)
+        self._check_timer.timeout.connect(self._check_pending)
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(self.POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(lambda: self._schedule_scan(*self.folders))
+
+    def set_folders(self, folders):
+        """Ustawia listę [(ścieżka, preset)]; nowe foldery są od razu skanowane (odcinki dodane, gdy program był zamknięty)."""
+        new_folders = {str(Path(path)): preset for path, preset in folders}
+        self._reported.clear()
+        removed = [path for path in self.folders if path not in new_folders]
+        if removed:
+            self._watcher.removePaths(removed)
+        self._pending = {mkv: state for mkv, state in self._pending.items() if str(Path(mkv).parent) in new_folders}
+        self._done = {mkv: state for mkv, state in self._done.items() if str(Path(mkv).parent) in new_folders}
+        added = [path for path in new_folders if path not in self.folders]
+        self.folders = new_folders
+        for path in added:
+            if not os.path.isdir(path):
+                self.message.emit(f"Obserwowany folder nie istnieje: {path}")
+            elif not self._watcher.addPath(path):
+                self.message.emit(f"Nie można obserwować folderu {path} - sprawdzany będzie co {self.POLL_INTERVAL_MS // 1000} s.")
+        if self.folders:
+            self._poll_timer.start()
+            self._schedule_scan(*added)
+        else:
+            self._poll_timer.stop()
+            self._check_timer.stop()
+
+    def stop(self):
+        self.set_folders([])
+
+    def _schedule_scan(self, *paths):
+        self._dirty.update(path for path in paths if path in self.folders)
+        # Kopiowanie pliku generuje serię powiadomień - skanowanie rusza dopiero po chwili spokoju
+        if self._dirty:
+            self._scan_timer.start(self.SCAN_DELAY_MS)
+
+    def _scan_dirty(self):
+        dirty, self._dirty = self._dirty, set()
+        for folder in dirty:
+            self._scan(folder)
+        self._update_check_timer()
+
+    def _check_pending(self):
+        for folder in {str(Path(mkv).parent) for mkv in self._pending}:
+            self._scan(folder)
+        self._update_check_timer()
+
+    def _update_check_timer(self):
+        if self._pending and not self._check_timer.isActive():
+            self._check_timer.start()
+        elif not self._pending:
+            self._check_timer.stop()
+
+    def _scan(self, folder):
+        preset_name = self.folders.get(folder)
+        if preset_name is None:
+            return
+        preset = load_preset(self.settings, preset_name)
+        if preset is None:
+            self._report(f"preset:{folder}", f"Obserwowany folder {folder}: preset '{preset_name}' nie istnieje.")
+            return
+        try:
+            with os.scandir(folder) as iterator:
+                entries = list(iterator)
+        except OSError as e:
+            self._report(f"scan:{folder}", f"Nie można odczytać obserwowanego folderu {folder}: {e}")
+            return
+
+        videos, subtitles, font_subdirs, has_loose_fonts = {}, {}, [], False
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            name = entry.name.lower()
+            if entry.is_dir():
+                if name in FONT_DIR_NAMES:
+                    font_subdirs.append(entry.path)
+            elif is_font_file(name):
+                has_loose_fonts = True
+            # Pliki pośrednie remuxu powstają w tym samym folderze i nie są nowymi odcinkami
+            elif name.endswith(".mkv") and not name.endswith("_remux.mkv"):
+                videos[Path(entry.name).stem] = entry
+            elif name.endswith(".ass"):
+                subtitles[Path(entry.name).stem] = entry
+
+        font_dir = episode_font_dir(folder, font_subdirs, has_loose_fonts)
+        needs_subtitles = preset["selected_script"] in [2, 3]
+        intro_file = self.settings.value("file_intro", "") if preset["selected_script"] == 4 else None
+        if preset["selected_script"] == 4 and not intro_file:
+            self._report(f"intro:{folder}", f"Obserwowany folder {folder}: preset '{preset_name}' wymaga pliku wstawki (Ustawienia → Ścieżki).")
+            return
+
+        ready, now = [], time.monotonic()
+        seen = {}
+        for stem, video in videos.items():
+            mkv_path = video.path
+            try:
+                video_state = _file_state(video)
+            except OSError:
+                seen[mkv_path] = None
+                continue
+            seen[mkv_path] = video_state
+            if self._done.get(mkv_path) == video_state:
+                continue
+            subtitle = None
+            state = (video_state,)
+            if needs_subtitles:
+                # Napisy mogą mieć dopisek języka, np. odcinek.pl.ass
+                subtitle = subtitles.get(stem) or next((entry for sub_stem, entry in subtitles.items() if sub_stem.startswith(stem + ".")), None)
+                fonts = _font_dir_state(font_dir) if font_dir else ()
+                if subtitle is None or not fonts:
+                    self._pending.pop(mkv_path, None)
+                    continue
+                try:
+                    state += (_file_state(subtitle), fonts)
+                except OSError:
+                    continue
+
+            previous = self._pending.get(mkv_path)
+            if previous is None or previous[0] != state:
+                self._pending[mkv_path] = (state, now)
+                continue
+            if now - previous[1] < self.STABLE_SECONDS:
+                continue
+
+            del self._pending[mkv_path]
+            self._done[mkv_path] = video_state
+            if self.is_queued(Path(mkv_path)):
+                continue
+            ready.append(preset_task_kwargs(
+                preset, Path(mkv_path),
+                subtitle_file=Path(subtitle.path) if subtitle else None,
+                font_folder=Path(font_dir) if needs_subtitles else None,
+                intro_file=Path(intro_file) if intro_file else None
+            ))
+
+        # Zestawy, których plik zniknął (przeniesiony lub usunięty w trakcie kopiowania), przestają być śledzone;
+        # zapomniane są też dodane pliki, których już nie ma albo które zostały podmienione
+        for mkv_path in [mkv for mkv in self._pending if str(Path(mkv).parent) == folder and mkv not in seen]:
+            del self._pending[mkv_path]
+        for mkv_path in [mkv for mkv, state in self._done.items() if str(Path(mkv).parent) == folder
+                         and (mkv not in seen or seen[mkv] not in (None, state))]:
+            del self._done[mkv_path]
+        if ready:
+            self.tasks_ready.emit(ready, folder)
+
+    def _report(self, key, text):
+        if key not in self._reported:
+            self._reported.add(key)
+            self.message.emit(text)
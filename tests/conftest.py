@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+import pytest
+from PyQt6.QtCore import QStandardPaths
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+@pytest.fixture
+def qt_test_paths():
+    # Bazy i logi tworzone przez ProcessManagera trafiają do katalogu testowego Qt, a nie do danych użytkownika
+    QStandardPaths.setTestModeEnabled(True)
+    yield
+    QStandardPaths.setTestModeEnabled(False)
@@ -0,0 +1,69 @@
+# Minimalne pliki czcionek do testów: tylko tabele, które czyta font_index (name, cmap, OS/2)
+import struct
+
+ENGLISH_US = 0x409
+
+
+def name_table(records):
+    """records: [(platform_id, encoding_id, language_id, name_id, tekst)]"""
+    entries, strings = b"", b""
+    for platform_id, encoding_id, language_id, name_id, text in records:
+        raw = text.encode("utf-16-be") if platform_id in (0, 3) else text.encode("mac_roman")
+        entries += struct.pack(">HHHHHH", platform_id, encoding_id, language_id, name_id, len(raw), len(strings))
+        strings += raw
+    return struct.pack(">HHH", 0, len(records), 6 + 12 * len(records)) + entries + strings
+
+
+def windows_names(family, style="Regular", full_name=None, postscript=None):
+    records = [(3, 1, ENGLISH_US, 1, family), (3, 1, ENGLISH_US, 2, style),
+               (3, 1, ENGLISH_US, 4, full_name or f"{family} {style}")]
+    if postscript:
+        records.append((3, 1, ENGLISH_US, 6, postscript))
+    return name_table(records)
+
+
+def cmap_format4(ranges):
+    segments = list(ranges) + [(0xFFFF, 0xFFFF)]
+    count = len(segments)
+    length = 16 + count * 8
+    return (struct.pack(">HHHHHHH", 4, length, 0, count * 2, 0, 0, 0)
+            + struct.pack(f">{count}H", *(end for _, end in segments)) + b"\x00\x00"
+            + struct.pack(f">{count}H", *(start for start, _ in segments))
+            + struct.pack(f">{count}H", *([0] * count)) + struct.pack(f">{count}H", *([0] * count)))
+
+
+def cmap_format12(ranges):
+    groups = b"".join(struct.pack(">III", start, end, 1) for start, end in ranges)
+    return struct.pack(">HHIII", 12, 0, 16 + len(groups), 0, len(ranges)) + groups
+
+
+def cmap_table(subtables):
+    """subtables: [(platform_id, encoding_id, dane podtabeli)]"""
+    header_size = 4 + 8 * len(subtables)
+    records, body = b"", b""
+    for platform_id, encoding_id, data in subtables:
+        records += struct.pack(">HHI", platform_id, encoding_id, header_size + len(body))
+        body += data
+    return struct.pack(">HH", 0, len(subtables)) + records + body
+
+
+def os2_table(weight=400, italic=False):
+    data = bytearray(78)
+    struct.pack_into(">H", data, 4, weight)
+    struct.pack_into(">H", data, 62, 1 if italic else 0)
+    return bytes(data)
+
+
+def sfnt(tables):
+    """Plik TTF z podanych tabel {znacznik: dane}."""
+    header_size = 12 + 16 * len(tables)
+    directory, body = b"", b""
+    for tag, data in sorted(tables.items()):
+        directory += struct.pack(">4sIII", tag, 0, header_size + len(body), len(data))
+        body += data + b"\x00" * (-len(data) % 4)
+    return struct.pack(">IHHHH", 0x00010000, len(tables), 0, 0, 0) + directory + body
+
+
+def simple_font(family, style="Regular", ranges=((0x20, 0x7E),)):
+    return sfnt({b"name": windows_names(family, style), b"cmap": cmap_table([(3, 1, cmap_format4(ranges))]),
+                 b"OS/2": os2_table()})
@@ -0,0 +1,110 @@
+import codecs
+
+import pytest
+
+import font_index
+from ass_fonts import referenced_fonts
+from font_index import select_fonts
+from font_samples import simple_font
+
+HEADER = "[Script Info]\nScriptType: v4.00+\n\n"
+STYLES = """[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, Bold, Italic
+Style: Default,Lato,48,&H00FFFFFF,0,0
+Style: Sign,@Source Han Sans,40,&H00FFFFFF,0,0
+"""
+EVENTS = """[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,{\\fnSource Code Pro\\b1}Tekst, z przecinkiem {\\i1\\fn @DejaVu Sans}
+Dialogue: 0,0:00:03.00,0:00:04.00,Default,,0,0,0,,Znacznik poza klamrami: \\fnArial
+"""
+
+
+class _MemoryCache:
+    def folder_entries(self, folder):
+        return {}
+
+    def update_folder(self, folder, entries, removed):
+        pass
+
+
+def write_subtitles(path, text, encoding="utf-8", bom=b""):
+    path.write_bytes(bom + text.encode(encoding))
+    return path
+
+
+@pytest.fixture
+def font_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(font_index, "get_font_cache", lambda: _MemoryCache())
+    folder = tmp_path / "fonts"
+    folder.mkdir()
+    (folder / "Lato-Regular.ttf").write_bytes(simple_font("Lato"))
+    (folder / "SourceCodePro.ttf").write_bytes(simple_font("Source Code Pro"))
+    (folder / "DejaVuSans.ttf").write_bytes(simple_font("DejaVu Sans"))
+    (folder / "Unused.ttf").write_bytes(simple_font("Unused Font"))
+    (folder / "broken.woff2").write_bytes(b"wOF2" + b"\x00" * 40)
+    (folder / "notes.txt").write_text("nie czcionka")
+    return folder
+
+
+def test_styles_and_override_tags(tmp_path):
+    fonts = referenced_fonts(write_subtitles(tmp_path / "a.ass", HEADER + STYLES + EVENTS))
+    assert fonts == {"lato": "Lato", "source han sans": "Source Han Sans",
+                     "source code pro": "Source Code Pro", "dejavu sans": "DejaVu Sans"}
+
+
+def test_custom_format_column_order(tmp_path):
+    text = HEADER + """[V4+ Styles]
+Format: Name, Fontsize, Bold, Fontname
+Style: Default,48,0,Lato
+
+[Events]
+Format: Start, End, Text, Style
+Dialogue: 0:00:01.00,0:00:02.00,{\\fnSource Code Pro}Tekst,Default
+"""
+    fonts = referenced_fonts(write_subtitles(tmp_path / "a.ass", text))
+    assert set(fonts) == {"lato", "source code pro"}
+
+
+def test_ssa_v4_styles_section(tmp_path):
+    text = "[V4 Styles]\nFormat: Name, Fontname, Fontsize\nStyle: Default,Lato,20\n"
+    assert referenced_fonts(write_subtitles(tmp_path / "a.ssa", text)) == {"lato": "Lato"}
+
+
+@pytest.mark.parametrize("encoding, bom", [
+    ("utf-8", codecs.BOM_UTF8),
+    ("utf-16-le", codecs.BOM_UTF16_LE),
+    ("utf-16-be", codecs.BOM_UTF16_BE),
+])
+def test_bom_and_utf16_files(tmp_path, encoding, bom):
+    text = HEADER + STYLES.replace("Lato", "Łódź Sans") + EVENTS
+    fonts = referenced_fonts(write_subtitles(tmp_path / "a.ass", text, encoding, bom))
+    assert fonts["łódź sans"] == "Łódź Sans"
+    assert "source code pro" in fonts
+
+
+def test_unknown_fonts_without_styles(tmp_path):
+    assert referenced_fonts(write_subtitles(tmp_path / "a.ass", HEADER + EVENTS)) is None
+    assert referenced_fonts(tmp_path / "brak.ass") is None
+
+
+def test_select_fonts_picks_used_and_unreadable_files(tmp_path, font_folder):
+    subtitles = write_subtitles(tmp_path / "a.ass", HEADER + STYLES + EVENTS)
+    fonts, missing = select_fonts(subtitles, font_folder)
+    assert [font.name for font in fonts] == ["DejaVuSans.ttf", "Lato-Regular.ttf", "SourceCodePro.ttf", "broken.woff2"]
+    assert missing == ["Source Han Sans"]
+
+
+def test_select_fonts_matches_names_case_insensitively(tmp_path, font_folder):
+    text = HEADER + "[V4+ Styles]\nFormat: Name, Fontname\nStyle: Default,  @LATO \n"
+    fonts, missing = select_fonts(write_subtitles(tmp_path / "a.ass", text), font_folder)
+    assert [font.name for font in fonts] == ["Lato-Regular.ttf", "broken.woff2"]
+    assert missing == []
+
+
+def test_select_fonts_without_styles_takes_whole_folder(tmp_path, font_folder):
+    subtitles = write_subtitles(tmp_path / "a.ass", HEADER + EVENTS)
+    fonts, missing = select_fonts(subtitles, font_folder)
+    assert len(fonts) == 5 and missing == []
+    fonts, missing = select_fonts(None, font_folder)
+    assert len(fonts) == 5 and missing == []
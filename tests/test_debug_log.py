@@ -0,0 +1,42 @@
+import os
+import time
+
+from debug_log import DebugLogWriter
+
+
+def make_log(folder, name, age_days=0, parts=0):
+    paths = [folder / name] + [folder / f"{name}.{index}.gz" for index in range(1, parts + 1)]
+    timestamp = time.time() - age_days * 86400
+    for path in paths:
+        path.write_text("log")
+        os.utime(path, (timestamp, timestamp))
+    return paths
+
+
+def test_keeps_only_newest_task_logs(tmp_path):
+    for day in range(1, 6):
+        make_log(tmp_path, f"2026010{day}-120000_ep0{day}.log", parts=2 if day == 1 else 0)
+    (tmp_path / "notatki.txt").write_text("nie log zadania")
+    writer = DebugLogWriter(str(tmp_path), max_logs=3)
+    writer._apply_retention()
+    assert sorted(os.listdir(tmp_path)) == [
+        "20260103-120000_ep03.log", "20260104-120000_ep04.log", "20260105-120000_ep05.log", "notatki.txt"]
+
+
+def test_removes_old_logs_with_their_rotated_parts(tmp_path):
+    make_log(tmp_path, "20250101-080000_stary.log", age_days=40, parts=2)
+    make_log(tmp_path, "20250201-080000_nowszy.log", age_days=5)
+    writer = DebugLogWriter(str(tmp_path), max_age_days=30)
+    writer._apply_retention()
+    assert os.listdir(tmp_path) == ["20250201-080000_nowszy.log"]
+
+
+def test_new_task_log_triggers_retention_but_keeps_itself(tmp_path):
+    make_log(tmp_path, "20250101-080000_stary.log", age_days=40)
+    writer = DebugLogWriter(str(tmp_path), max_logs=1, flush_interval=0.05)
+    stream = DebugLogWriter.stream_name("ep01")
+    writer.write(stream, "Running command: ffmpeg")
+    writer.close_stream(stream)
+    writer.shutdown()
+    assert os.listdir(tmp_path) == [f"{stream}.log"]
+    assert "Running command: ffmpeg" in (tmp_path / f"{stream}.log").read_text(encoding="utf-8")
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import pytest
+
+from episode_scan import ScanResult, episode_key, pair_episodes
+
+
+@pytest.mark.parametrize("stem, key", [
+    ("Show 12 HEVC 10bit", (None, 12)),
+    ("Show.01.1080p.h264", (None, 1)),
+    ("Show 01 1080p AAC2.0", (None, 1)),
+    ("Show 04 DDP5.1 H.265", (None, 4)),
+    ("Show 07 10-bit x265", (None, 7)),
+    ("Show 09 1920x1080 FLAC", (None, 9)),
+    ("[Group] Show - 05 [1080p][ABCD1234]", (None, 5)),
+    ("Show - 06 10bit", (None, 6)),
+    ("Show (2019) 03", (None, 3)),
+    ("Show 01v2", (None, 1)),
+    ("Show S02E03 1080p", (2, 3)),
+    ("Show Ep07", (None, 7)),
+    ("Show odc. 11", (None, 11)),
+    ("Show", None),
+])
+def test_episode_key(stem, key):
+    assert episode_key(stem) == key
+
+
+def _pairs(videos, subtitles):
+    scan = ScanResult(videos=[Path(v) for v in videos], subtitles=[Path(s) for s in subtitles])
+    return {match.video.name: match.subtitle.name if match.subtitle else None for match in pair_episodes(scan)}
+
+
+def test_pairs_release_names_by_episode_number():
+    videos = [f"/a/Show {n:02d} HEVC 10bit.mkv" for n in range(1, 13)]
+    subtitles = [f"/a/Show {n:02d}.ass" for n in range(1, 13)]
+    pairs = _pairs(videos, subtitles)
+    assert pairs == {f"Show {n:02d} HEVC 10bit.mkv": f"Show {n:02d}.ass" for n in range(1, 13)}
+
+
+@pytest.mark.parametrize("video, subtitle", [
+    ("Show.01.1080p.h264.mkv", "Show.01.ass"),
+    ("Show 01 1080p AAC2.0.mkv", "[Subs] Show - 01.ass"),
+    ("Show S01E02.mkv", "Show - 02.ass"),
+    ("Show 03.mkv", "Show 03.pl.ass"),
+])
+def test_pairs_single_episode(video, subtitle):
+    assert _pairs([f"/a/{video}"], [f"/a/{subtitle}"]) == {video: subtitle}
+
+
+def test_ambiguous_episode_number_is_left_unpaired():
+    # Dwa pliki napisów z tym samym numerem - żaden nie jest wybierany na ślepo
+    pairs = _pairs(["/a/Show 01 1080p.mkv"], ["/a/Show A 01.ass", "/a/Other B 01.ass"])
+    assert pairs == {"Show 01 1080p.mkv": None}
+
+
+def test_different_episode_numbers_are_not_paired_by_similarity():
+    assert _pairs(["/a/Show 01 HEVC 10bit.mkv"], ["/a/Show 10.ass"]) == {"Show 01 HEVC 10bit.mkv": None}
+
+
+def test_same_episode_in_other_directories_stays_in_its_directory():
+    videos = ["/s1/Show 01.mkv", "/s2/Show 01.mkv"]
+    subtitles = ["/s1/napisy 01.ass", "/s2/napisy 01.ass"]
+    scan = ScanResult(videos=[Path(v) for v in videos], subtitles=[Path(s) for s in subtitles])
+    assert {str(m.video): str(m.subtitle) for m in pair_episodes(scan)} == {
+        "/s1/Show 01.mkv": "/s1/napisy 01.ass", "/s2/Show 01.mkv": "/s2/napisy 01.ass"
+    }
+
+
+def test_font_dir_prefers_loose_fonts_next_to_episodes():
+    scan = ScanResult(
+        videos=[Path("/a/ep01.mkv"), Path("/b/ep01.mkv"), Path("/b/extra/ep02.mkv"), Path("/c/ep01.mkv")],
+        font_dirs=[Path("/a"), Path("/a/fonts"), Path("/b/czcionki"), Path("/b/Attachments")],
+    )
+    font_dirs = {str(match.video): match.font_dir for match in pair_episodes(scan)}
+    assert font_dirs == {
+        "/a/ep01.mkv": Path("/a"),
+        "/b/ep01.mkv": Path("/b/Attachments"),
+        "/b/extra/ep02.mkv": Path("/b/Attachments"),
+        "/c/ep01.mkv": None,
+    }
@@ -0,0 +1,143 @@
+import os
+
+import font_index
+from font_index import _parse_name_table, _cmap_coverage, _build_index, folder_index, read_font
+from font_samples import (ENGLISH_US, name_table, windows_names, cmap_format4, cmap_format12, cmap_table, os2_table,
+                          sfnt, simple_font)
+
+
+class _StubCache:
+    """Trwały indeks w pamięci; zapamiętuje, co zapisano."""
+    def __init__(self):
+        self.entries = {}
+        self.updates = []
+
+    def folder_entries(self, folder):
+        return {path: tuple(entry) for path, (entry_folder, *entry) in self.entries.items() if entry_folder == str(folder)}
+
+    def update_folder(self, folder, entries, removed):
+        self.updates.append(([path for path, _, _, _ in entries], list(removed)))
+        for path, size, mtime_ns, data in entries:
+            self.entries[path] = (str(folder), size, mtime_ns, data)
+        for path in removed:
+            self.entries.pop(path, None)
+
+
+def files_of(folder):
+    return sorted((entry.path, entry.stat().st_size, entry.stat().st_mtime_ns) for entry in os.scandir(folder))
+
+
+def test_name_table_prefers_english_windows_names():
+    data = name_table([
+        (1, 0, 0, 1, "Mac Family"),
+        (3, 1, 0x415, 1, "Rodzina"),
+        (3, 1, ENGLISH_US, 1, "Noto Sans"),
+        (3, 1, ENGLISH_US, 2, "Bold"),
+        (3, 1, ENGLISH_US, 4, "Noto Sans Bold"),
+        (3, 1, ENGLISH_US, 6, "NotoSans-Bold"),
+        (3, 1, ENGLISH_US, 16, "Noto Sans Display"),
+        (3, 1, ENGLISH_US, 5, "Version 2.0"),
+        (2, 0, 0, 1, "Unsupported encoding"),
+    ])
+    names, family, style = _parse_name_table(data)
+    assert names == {"mac family", "rodzina", "noto sans", "noto sans bold", "notosans-bold", "noto sans display"}
+    # Rodzina typograficzna (ID 16) ma pierwszeństwo przed zwykłą rodziną
+    assert family == "Noto Sans Display"
+    assert style == "Bold"
+
+
+def test_name_table_truncated_or_empty():
+    # Nagłówek zapowiada więcej rekordów, niż zmieściło się w uciętej tabeli
+    assert _parse_name_table(windows_names("Lato")[:6 + 12 + 5]) == (set(), "", "")
+    assert _parse_name_table(b"") == (set(), "", "")
+
+
+def test_cmap_format4_drops_end_marker_and_merges():
+    data = cmap_table([(3, 1, cmap_format4([(0x20, 0x7E), (0x7F, 0xFF), (0x100, 0x17F), (0x400, 0x4FF)]))])
+    assert _cmap_coverage(data) == [[0x20, 0x17F], [0x400, 0x4FF]]
+
+
+def test_cmap_prefers_full_unicode_format12():
+    data = cmap_table([
+        (3, 1, cmap_format4([(0x20, 0x7E)])),
+        (3, 10, cmap_format12([(0x1F600, 0x1F64F), (0x20, 0x7E), (0x4E00, 0x9FFF)])),
+    ])
+    assert _cmap_coverage(data) == [[0x20, 0x7E], [0x4E00, 0x9FFF], [0x1F600, 0x1F64F]]
+
+
+def test_cmap_without_unicode_subtable():
+    assert _cmap_coverage(cmap_table([(1, 0, cmap_format4([(0x20, 0x7E)]))])) == []
+    assert _cmap_coverage(b"") == []
+
+
+def test_read_font_faces(tmp_path):
+    path = tmp_path / "Lato-BoldItalic.ttf"
+    path.write_bytes(sfnt({b"name": windows_names("Lato", "Bold Italic"), b"cmap": cmap_table([(3, 1, cmap_format4([(0x41, 0x5A)]))]),
+                           b"OS/2": os2_table(weight=700, italic=True)}))
+    assert read_font(path) == [{"names": ["lato", "lato bold italic"], "family": "Lato", "style": "Bold Italic",
+                                "weight": 700, "italic": True, "coverage": [[0x41, 0x5A]]}]
+    (tmp_path / "empty.ttf").write_bytes(b"")
+    assert read_font(tmp_path / "empty.ttf") is None
+
+
+def test_build_index_reads_only_new_and_changed_files(tmp_path, monkeypatch):
+    folder = tmp_path / "fonts"
+    folder.mkdir()
+    (folder / "a.ttf").write_bytes(simple_font("Alpha"))
+    (folder / "b.ttf").write_bytes(simple_font("Beta"))
+    (folder / "c.ttf").write_bytes(b"uszkodzony")
+    cache = _StubCache()
+    read = []
+    real_read_font = font_index.read_font
+
+    def counting_read_font(path):
+        read.append(os.path.basename(path))
+        return real_read_font(path)
+
+    monkeypatch.setattr(font_index, "read_font", counting_read_font)
+    index = _build_index(folder, files_of(folder), cache)
+    assert sorted(read) == ["a.ttf", "b.ttf", "c.ttf"]
+    assert index.by_name["alpha"] == [folder / "a.ttf"]
+    assert index.unreadable == [folder / "c.ttf"]
+
+    # Bez zmian: nic nie jest czytane ani zapisywane
+    read.clear()
+    updates = len(cache.updates)
+    index = _build_index(folder, files_of(folder), cache)
+    assert read == [] and len(cache.updates) == updates
+    assert index.by_name["beta"] == [folder / "b.ttf"]
+    # Plik, którego nie dało się odczytać, też jest zapamiętany
+    assert index.unreadable == [folder / "c.ttf"]
+
+    # Zmiana jednego pliku i usunięcie drugiego
+    (folder / "b.ttf").write_bytes(simple_font("Beta Nova"))
+    os.remove(folder / "c.ttf")
+    index = _build_index(folder, files_of(folder), cache)
+    assert read == ["b.ttf"]
+    assert cache.updates[-1] == ([str(folder / "b.ttf")], [str(folder / "c.ttf")])
+    assert "beta nova" in index.by_name and "beta" not in index.by_name
+    assert index.unreadable == []
+
+
+def test_folder_index_keeps_only_recent_folders(tmp_path, monkeypatch):
+    monkeypatch.setattr(font_index, "MAX_CACHED_FOLDERS", 2)
+    monkeypatch.setattr(font_index, "_index_cache", type(font_index._index_cache)())
+    monkeypatch.setattr(font_index, "_folder_locks", {})
+    cache = _StubCache()
+    folders = []
+    for number in range(4):
+        folder = tmp_path / f"fonts{number}"
+        folder.mkdir()
+        (folder / "a.ttf").write_bytes(simple_font(f"Font {number}"))
+        folders.append(folder)
+    first = folder_index(folders[0], cache)
+    folder_index(folders[1], cache)
+    # Użycie odświeża folder, więc wypada najdawniej używany
+    assert folder_index(folders[0], cache) is first
+    folder_index(folders[2], cache)
+    assert list(font_index._index_cache) == [str(folders[0]), str(folders[2])]
+    folder_index(folders[3], cache)
+    assert list(font_index._index_cache) == [str(folders[2]), str(folders[3])]
+    assert set(font_index._folder_locks) == {str(folders[2]), str(folders[3])}
+    # Zapomniany folder wraca z trwałego indeksu
+    assert folder_index(folders[0], cache).by_name == first.by_name
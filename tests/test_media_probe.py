@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+import media_probe
+from media_probe import MediaProbeService, ProbeResult
+
+
+class _MemoryCache:
+    def get(self, path, size, mtime_ns):
+        return None
+
+    def put(self, path, size, mtime_ns, data):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def service(monkeypatch):
+    calls = []
+
+    def fake_ffprobe(path):
+        calls.append(str(path))
+        return ProbeResult(path, {"duration": str(os.path.getsize(path))}, [])
+
+    monkeypatch.setattr(media_probe, "run_ffprobe", fake_ffprobe)
+    probe_service = MediaProbeService(max_workers=1, cache=_MemoryCache())
+    probe_service.calls = calls
+    yield probe_service
+    probe_service.shutdown()
+
+
+def test_unchanged_file_is_probed_once(service, tmp_path):
+    video = tmp_path / "ep01.mkv"
+    video.write_bytes(b"x" * 10)
+    assert service.probe(video).duration == 10
+    assert service.probe(video).duration == 10
+    assert service.cached(video).duration == 10
+    assert service.calls == [str(video)]
+
+
+def test_replaced_file_is_probed_again(service, tmp_path):
+    video = tmp_path / "ep01.mkv"
+    video.write_bytes(b"x" * 10)
+    service.probe(video)
+    video.write_bytes(b"x" * 25)
+    assert service.cached(video) is None
+    assert service.probe(video).duration == 25
+    assert len(service.calls) == 2
+
+
+def test_memo_keeps_only_recent_files(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(MediaProbeService, "MAX_REMEMBERED", 3)
+    videos = []
+    for number in range(5):
+        video = tmp_path / f"ep{number:02d}.mkv"
+        video.write_bytes(b"x")
+        videos.append(video)
+        service.probe(video)
+    assert len(service._futures) == 3
+    assert service.cached(videos[0]) is None
+    assert service.cached(videos[-1]) is not None
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import pytest
+
+from process_manager import ProcessManager, ProcessSlot
+from recipe import task_recipe
+from task_manager import Task
+
+
+class _TaskManagerStub:
+    def mark_as_processing(self, task, status="Przetwarzanie..."):
+        pass
+
+    def refresh_task(self, task):
+        pass
+
+
+@pytest.fixture
+def manager(qt_test_paths, monkeypatch):
+    process_manager = ProcessManager(_TaskManagerStub(), output_window=None, rpc_manager=None)
+    process_manager.started = []
+    monkeypatch.setattr(process_manager, "_start_process",
+                        lambda slot, program, arguments, duration=None: process_manager.started.append((program, arguments)))
+    return process_manager
+
+
+def make_task(tmp_path, script=2, output_path=None):
+    mkv = tmp_path / "ep01.mkv"
+    subtitles = tmp_path / "ep01.ass"
+    mkv.write_bytes(b"mkv")
+    subtitles.write_text("[Script Info]\n")
+    return Task(mkv_file=mkv, subtitle_file=subtitles, font_folder=None, selected_script=script, selected_ffmpeg_script=1,
+                gpu_bitrate=5, debug_mode=False, intro_file=None, output_path=output_path)
+
+
+@pytest.mark.parametrize("output_name", [None, "Odcinek 1.mp4"])
+def test_single_pass_writes_the_file_described_by_the_recipe(tmp_path, manager, output_name):
+    task = make_task(tmp_path, output_path=tmp_path / "out" / output_name if output_name else None)
+    manager.single_pass_remux_hardsub = True
+    manager.run_mkvmerge_ffmpeg(ProcessSlot(1, task), task.mkv_file, task.subtitle_file, task.font_folder)
+    (_, _), (program, arguments) = manager.started
+    assert program == "ffmpeg"
+    recipe_output, _ = task_recipe(task, single_pass=True)
+    assert Path(arguments[-1]) == recipe_output
+    assert recipe_output != Path(task.mkv_file)
+    if output_name:
+        assert recipe_output == task.output_path
+
+
+def test_chained_mode_writes_the_same_file_as_single_pass(tmp_path, manager):
+    task = make_task(tmp_path)
+    manager.run_ffmpeg(ProcessSlot(1, task), tmp_path / "ep01_remux.mkv", True)
+    (_, arguments), = manager.started
+    assert Path(arguments[-1]) == task_recipe(task, single_pass=True)[0] == tmp_path / "ep01_hardsub.mp4"
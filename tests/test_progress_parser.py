@@ -0,0 +1,192 @@
+from types import SimpleNamespace
+
+import progress_parser
+from progress_parser import FfmpegProgressParser, MkvmergeProgressParser, EtaEstimator, ProcessProgress
+
+# Bloki zapisane z `ffmpeg -progress pipe:1` (FFmpeg 6): pierwszy przed zakodowaniem pierwszej klatki
+START_BLOCK = """frame=0
+fps=0.00
+stream_0_0_q=0.0
+bitrate=N/A
+total_size=N/A
+out_time_us=N/A
+out_time_ms=N/A
+out_time=N/A
+dup_frames=0
+drop_frames=0
+speed=N/A
+progress=continue
+"""
+
+MIDDLE_BLOCK = """frame=1438
+fps=47.91
+stream_0_0_q=28.0
+bitrate=1893.4kbits/s
+total_size=14155824
+out_time_us=59809000
+out_time_ms=59809000
+out_time=00:00:59.809000
+dup_frames=0
+drop_frames=0
+speed=1.99x
+progress=continue
+"""
+
+END_BLOCK = """frame=2877
+fps=48.02
+stream_0_0_q=-1.0
+bitrate=1901.2kbits/s
+total_size=28550231
+out_time_us=120120000
+out_time_ms=120120000
+out_time=00:02:00.120000
+dup_frames=0
+drop_frames=0
+speed=2x
+progress=end
+"""
+
+
+def test_parses_recorded_blocks():
+    snapshots = FfmpegProgressParser().feed(START_BLOCK + MIDDLE_BLOCK + END_BLOCK)
+    assert len(snapshots) == 3
+    start, middle, end = snapshots
+    assert start == {"out_time": None, "frame": 0, "fps": 0.0, "bitrate": "N/A", "total_size": None, "speed": None, "finished": False}
+    assert middle["out_time"] == 59.809
+    assert middle["frame"] == 1438 and middle["speed"] == 1.99 and middle["total_size"] == 14155824
+    assert end["finished"] and end["speed"] == 2.0
+
+
+def test_blocks_split_across_reads_and_crlf():
+    parser = FfmpegProgressParser()
+    data = MIDDLE_BLOCK.replace("\n", "\r\n")
+    snapshots = []
+    for start in range(0, len(data), 7):
+        snapshots += parser.feed(data[start:start + 7])
+    assert len(snapshots) == 1
+    assert snapshots[0]["out_time"] == 59.809 and snapshots[0]["fps"] == 47.91
+
+
+def test_old_ffmpeg_without_out_time_us():
+    block = "frame=10\nout_time_ms=2500000\nprogress=continue\n"
+    assert FfmpegProgressParser().feed(block)[0]["out_time"] == 2.5
+
+
+def test_negative_out_time_is_ignored():
+    block = "out_time_us=-9223372036854775807\nprogress=continue\n"
+    assert FfmpegProgressParser().feed(block)[0]["out_time"] is None
+
+
+def test_process_progress_with_duration():
+    progress = ProcessProgress(duration=120.12)
+    assert progress.feed_ffmpeg(START_BLOCK, None)
+    assert progress.fraction == 0.0
+    progress.feed_ffmpeg(MIDDLE_BLOCK, None)
+    assert abs(progress.fraction - 59.809 / 120.12) < 1e-9
+    progress.feed_ffmpeg(END_BLOCK, None)
+    assert progress.fraction == 1.0 and progress.eta_seconds == 0
+
+
+def test_process_progress_without_duration_keeps_snapshot_only():
+    progress = ProcessProgress()
+    assert progress.feed_ffmpeg(MIDDLE_BLOCK, None)
+    assert progress.fraction == 0.0 and progress.eta_seconds is None
+    assert progress.snapshot["frame"] == 1438
+    # Czas trwania z całego zadania zastępuje brakujący czas etapu
+    progress.feed_ffmpeg(MIDDLE_BLOCK, 119.618)
+    assert progress.fraction == 0.5
+
+
+def test_eta_uses_smoothed_rate():
+    estimator = EtaEstimator(smoothing=0.5, min_interval=0.5)
+    assert estimator.update(0.0, now=0.0) is None
+    # 10% na 10 s -> 0.01/s, zostało 90%
+    assert estimator.update(0.1, now=10.0) == 90
+    # Szybszy odcinek (0.03/s) tylko częściowo zmienia tempo: 0.5 * 0.03 + 0.5 * 0.01 = 0.02/s
+    assert estimator.update(0.4, now=20.0) in (29, 30)
+
+
+def test_eta_ignores_too_frequent_updates_and_going_back():
+    estimator = EtaEstimator(smoothing=0.5, min_interval=0.5)
+    estimator.update(0.0, now=0.0)
+    estimator.update(0.1, now=10.0)
+    # W odstępie krótszym niż min_interval tempo się nie zmienia
+    assert estimator.update(0.2, now=10.1) == 80
+    # Cofnięcie postępu (np. nowy etap) nie psuje tempa
+    assert estimator.update(0.05, now=20.0) == 95
+
+
+def test_eta_unknown_without_progress():
+    estimator = EtaEstimator()
+    estimator.update(0.3, now=0.0)
+    assert estimator.update(0.3, now=5.0) is None
+    # Postęp ponad 100% jest przycinany do końca zadania
+    assert estimator.update(1.5, now=10.0) == 0
+
+
+def test_mkvmerge_gui_progress_lines():
+    parser = MkvmergeProgressParser()
+    fractions, log_text = parser.feed("mkvmerge v80.0 ('Roundabout') 64-bit\n#GUI#progress 0%\n#GUI#progress 4")
+    assert fractions == [0.0]
+    assert log_text == "mkvmerge v80.0 ('Roundabout') 64-bit"
+    # Reszta linii dochodzi w kolejnej porcji; CRLF z Windows nie przeszkadza
+    fractions, log_text = parser.feed("2%\r\n#GUI#warning Brak czcionki\r\n#GUI#progress 100%\r\n")
+    assert fractions == [0.42, 1.0]
+    assert log_text == "warning Brak czcionki"
+
+
+def test_mkvmerge_malformed_progress_is_dropped():
+    fractions, log_text = MkvmergeProgressParser().feed("#GUI#progress abc%\n")
+    assert fractions == [] and log_text == ""
+
+
+def test_process_progress_from_mkvmerge():
+    progress = ProcessProgress()
+    assert progress.feed_mkvmerge("#GUI#progress 50%\n") == (True, "")
+    assert progress.fraction == 0.5
+    assert progress.feed_mkvmerge("Multiplexing took 2 seconds.\n") == (False, "Multiplexing took 2 seconds.")
+    progress.feed_mkvmerge("#GUI#progress 100%\n")
+    assert progress.fraction == 1.0 and progress.eta_seconds == 0
+
+
+class _FakeProcess:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def readAll(self):
+        return self.chunks.pop(0).encode("utf-8")
+
+
+class _FakeOutput:
+    def __init__(self):
+        self.lines = []
+
+    def write(self, text, channel=None):
+        self.lines.append(text)
+
+
+def test_remux_stage_feeds_task_progress_and_queue_eta(monkeypatch, qt_test_paths):
+    clock = [100.0]
+    monkeypatch.setattr(progress_parser.time, "monotonic", lambda: clock[0])
+    from process_manager import ProcessManager, ProcessSlot
+    output = _FakeOutput()
+    manager = ProcessManager(task_manager=None, output_window=output, rpc_manager=None)
+    task = SimpleNamespace(mkv_file="/media/ep01.mkv", debug_mode=False)
+    slot = ProcessSlot(1, task)
+    manager.slots.append(slot)
+    process = _FakeProcess(["#GUI#progress 0%\n", "Plik 'ep01.ass': napisy SSA/ASS\n#GUI#progress 25%\n", "#GUI#progress 50%\n"])
+    slot.progress[process] = ProcessProgress()
+    task_progress, queue_eta = [], []
+    manager.task_progress.connect(lambda _task, fraction, eta: task_progress.append((fraction, eta)))
+    manager.eta_updated.connect(queue_eta.append)
+
+    for _ in range(3):
+        manager._on_mkvmerge_output(slot, process)
+        clock[0] += 10
+
+    # 25% na 10 s, tempo wygładzane - ETA dla remuxu liczona tak samo jak dla kodowania
+    assert [fraction for fraction, _ in task_progress] == [0.0, 0.25, 0.5]
+    assert task_progress[0][1] == -1 and queue_eta[0] == -1
+    assert task_progress[1][1] == 30 and queue_eta[1] == 30
+    assert queue_eta[2] == slot.eta_seconds > 0
+    assert output.lines == ["Plik 'ep01.ass': napisy SSA/ASS"]
@@ -0,0 +1,162 @@
+import json
+import os
+
+import pytest
+
+import queue_journal
+import task_manager as task_manager_module
+from queue_journal import QueueJournal
+from task_manager import Task, TaskManager
+
+
+class _NoProbe:
+    def prefetch(self, path):
+        return None
+
+
+def make_task(task_id, name="ep", status="Oczekuje", priority=1):
+    task = Task(mkv_file=f"/media/{name}{task_id}.mkv", subtitle_file=None, font_folder=None, selected_script=3,
+                selected_ffmpeg_script=1, gpu_bitrate=5, debug_mode=False, intro_file=None)
+    task.task_id, task.status, task.priority = task_id, status, priority
+    return task
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as journal_file:
+        return [json.loads(line) for line in journal_file]
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(task_manager_module, "get_probe_service", lambda: _NoProbe())
+    return TaskManager(None, None, None)
+
+
+def test_second_instance_cannot_lock_journal(tmp_path):
+    path = str(tmp_path / "queue_journal.jsonl")
+    first, second = QueueJournal(path), QueueJournal(path)
+    assert first.try_lock()
+    assert not second.try_lock()
+    first.close()
+    assert second.try_lock()
+    second.close()
+
+
+def test_attach_refuses_locked_journal(tmp_path, manager):
+    path = str(tmp_path / "queue_journal.jsonl")
+    owner = QueueJournal(path)
+    assert owner.try_lock()
+    assert manager.attach_journal(QueueJournal(path)) is None
+    assert manager.journal is None
+    owner.close()
+
+
+def test_rewrite_keeps_running_tasks_interrupted(tmp_path):
+    path = str(tmp_path / "queue_journal.jsonl")
+    journal = QueueJournal(path)
+    journal.rewrite([make_task(1, status="Przetwarzanie..."), make_task(2)])
+    restored = journal.load()
+    assert [record["status"] for record in restored] == ["Przetwarzanie...", "Oczekuje"]
+
+
+def test_status_lines_trigger_compaction(tmp_path, manager, monkeypatch):
+    monkeypatch.setattr(QueueJournal, "COMPACT_AFTER_LINES", 10)
+    path = str(tmp_path / "queue_journal.jsonl")
+    manager.attach_journal(QueueJournal(path))
+    task = manager.add_task("/media/ep1.mkv", None, None, 3, 1, 5, False, None)
+    for percent in range(30):
+        manager.mark_as_processing(task, f"Przetwarzanie... {percent}%")
+    manager.journal.flush()
+    assert len(read_lines(path)) < 10
+    assert manager.journal.load()[0]["status"] == "Przetwarzanie... 29%"
+    manager.journal.close()
+
+
+def test_journal_is_emptied_with_the_queue(tmp_path, manager):
+    path = str(tmp_path / "queue_journal.jsonl")
+    manager.attach_journal(QueueJournal(path))
+    task = manager.add_task("/media/ep1.mkv", None, None, 3, 1, 5, False, None)
+    manager.mark_as_processing(task)
+    manager.complete_task(task)
+    manager.journal.flush()
+    assert read_lines(path) == []
+    manager.journal.close()
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    path = tmp_path / "queue_journal.jsonl"
+    journal = QueueJournal(str(path))
+    for task_id in (1, 2, 3):
+        journal.record_add(make_task(task_id))
+    journal.record_status(2, "Przetwarzanie...")
+    journal.close()
+    data = path.read_bytes()
+    # Awaria w trakcie zapisu: ostatnia linia (zmiana statusu) urwana w połowie
+    path.write_bytes(data[:-20])
+    restored = QueueJournal(str(path)).load()
+    assert [record["mkv_file"] for record in restored] == ["/media/ep1.mkv", "/media/ep2.mkv", "/media/ep3.mkv"]
+    assert all(record["status"] == "Oczekuje" for record in restored)
+
+
+def test_journal_replays_priority_moves_and_removals(tmp_path):
+    path = str(tmp_path / "queue_journal.jsonl")
+    journal = QueueJournal(path)
+    for task_id in (1, 2, 3):
+        journal.record_add(make_task(task_id))
+    journal.record_priority(3, 0)
+    journal.record_move(1, "back")
+    journal.record_remove(2)
+    journal.record_status(99, "Błąd")
+    journal.close()
+    restored = QueueJournal(path).load()
+    assert [(record["mkv_file"], record["priority"]) for record in restored] == [("/media/ep3.mkv", 0), ("/media/ep1.mkv", 1)]
+
+
+def test_interrupted_tasks_are_restored_first_as_retries(tmp_path, manager):
+    path = str(tmp_path / "queue_journal.jsonl")
+    journal = QueueJournal(path)
+    for task_id in (1, 2, 3):
+        journal.record_add(make_task(task_id))
+    journal.record_status(3, "Przetwarzanie... 40%")
+    journal.close()
+    assert manager.attach_journal(QueueJournal(path)) == (3, 1)
+    assert [(str(task.mkv_file), task.retry) for task in manager.tasks] == [
+        ("/media/ep3.mkv", True), ("/media/ep1.mkv", False), ("/media/ep2.mkv", False)]
+    manager.journal.close()
+    # Przepisany dziennik zachowuje oznaczenie ponowienia także po kolejnym restarcie
+    assert [record["retry"] for record in QueueJournal(path).load()] == [True, False, False]
+
+
+def test_rewrite_replaces_file_atomically(tmp_path, monkeypatch):
+    path = tmp_path / "queue_journal.jsonl"
+    journal = QueueJournal(str(path))
+    journal.record_add(make_task(1))
+    journal.close()
+    replaced = []
+    real_replace = os.replace
+
+    def tracking_replace(source, target):
+        replaced.append((source, target))
+        # Do chwili podmiany stary dziennik pozostaje nietknięty
+        assert read_lines(target)[0]["id"] == 1
+        real_replace(source, target)
+
+    monkeypatch.setattr(queue_journal.os, "replace", tracking_replace)
+    journal.rewrite([make_task(7), make_task(8)])
+    assert replaced == [(str(path) + ".tmp", str(path))]
+    assert not os.path.exists(str(path) + ".tmp")
+    assert [line["id"] for line in read_lines(path)] == [7, 8]
+
+
+def test_failed_rewrite_keeps_old_journal(tmp_path, monkeypatch):
+    path = tmp_path / "queue_journal.jsonl"
+    journal = QueueJournal(str(path))
+    journal.record_add(make_task(1))
+    journal.close()
+
+    def failing_replace(source, target):
+        raise OSError("dysk pełny")
+
+    monkeypatch.setattr(queue_journal.os, "replace", failing_replace)
+    journal.rewrite([make_task(7)])
+    assert [line["id"] for line in read_lines(path)] == [1]
@@ -0,0 +1,47 @@
+import pytest
+
+import recipe
+from recipe import task_recipe
+from task_manager import Task
+
+
+@pytest.fixture(autouse=True)
+def fixed_tool_versions(monkeypatch):
+    monkeypatch.setattr(recipe, "tool_versions", lambda: {"ffmpeg": "ffmpeg version 6.1", "mkvmerge": "mkvmerge v80.0"})
+
+
+def make_task(tmp_path, script, encoder=1):
+    mkv = tmp_path / "ep01.mkv"
+    subtitles = tmp_path / "ep01.ass"
+    mkv.write_bytes(b"mkv")
+    subtitles.write_text("[Script Info]\n")
+    return Task(mkv_file=mkv, subtitle_file=subtitles, font_folder=None, selected_script=script, selected_ffmpeg_script=encoder,
+                gpu_bitrate=5, debug_mode=False, intro_file=None)
+
+
+@pytest.mark.parametrize("script", [1, 2])
+def test_segment_count_changes_cpu_encode_fingerprint(tmp_path, script):
+    task = make_task(tmp_path, script)
+    _, normal = task_recipe(task)
+    _, segmented = task_recipe(task, segment_count=4)
+    assert normal != segmented
+    assert segmented != task_recipe(task, segment_count=2)[1]
+    assert normal == task_recipe(task, segment_count=1)[1]
+
+
+@pytest.mark.parametrize("script, encoder, single_pass", [
+    (1, 2, False),  # NVENC nie jest dzielony na segmenty
+    (2, 1, True),   # etap jednoprzebiegowy biegnie obok mkvmerge w jednym procesie
+    (3, 1, False),  # sam remux
+])
+def test_segment_count_ignored_where_encode_is_not_split(tmp_path, script, encoder, single_pass):
+    task = make_task(tmp_path, script, encoder)
+    assert task_recipe(task, single_pass=single_pass)[1] == task_recipe(task, single_pass=single_pass, segment_count=4)[1]
+
+
+def test_single_pass_and_chain_fingerprints_differ(tmp_path):
+    task = make_task(tmp_path, 2)
+    chained_output, chained = task_recipe(task)
+    single_output, single = task_recipe(task, single_pass=True)
+    assert chained_output == single_output
+    assert chained != single
@@ -0,0 +1,25 @@
+from task_manifest import resolve_task
+
+PRESET = {
+    "selected_script": 1, "selected_ffmpeg_script": 2, "gpu_bitrate": 5, "debug_mode": False,
+    "custom_output": False, "output_dir": "", "subtitle_track_name": "Preset", "keep_movie_name": False, "movie_name": "",
+}
+PRESETS = {"anime": PRESET, "other": {**PRESET, "gpu_bitrate": 20}}
+
+
+def test_defaults_field_wins_over_task_preset():
+    kwargs, _ = resolve_task("Zadanie 1", {"mkv_file": "a.mkv", "preset": "anime"}, {"gpu_bitrate": 12}, PRESETS.get)
+    assert kwargs["gpu_bitrate"] == 12
+    assert kwargs["selected_ffmpeg_script"] == 2
+
+
+def test_task_field_wins_over_defaults_and_preset():
+    kwargs, options = resolve_task("Zadanie 1", {"mkv_file": "a.mkv", "preset": "anime", "gpu_bitrate": 30, "subtitle_track_name": "Zadanie"},
+                                   {"gpu_bitrate": 12}, PRESETS.get)
+    assert kwargs["gpu_bitrate"] == 30
+    assert options["subtitle_track_name"] == "Zadanie"
+
+
+def test_task_preset_replaces_defaults_preset():
+    kwargs, _ = resolve_task("Zadanie 1", {"mkv_file": "a.mkv", "preset": "anime"}, {"preset": "other"}, PRESETS.get)
+    assert kwargs["gpu_bitrate"] == 5
@@ -0,0 +1,106 @@
+import random
+from types import SimpleNamespace
+
+from task_list_model import TaskListModel
+from task_queue import TaskQueue, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+
+
+def make_task(priority=PRIORITY_NORMAL):
+    return SimpleNamespace(task_id=0, priority=priority, status="Oczekuje")
+
+
+def fill(queue, priorities):
+    return [queue.add(make_task(priority)) for priority in priorities]
+
+
+def display_order(queue):
+    return list(queue._active) + [task.task_id for task in queue.iter_pending()]
+
+
+def test_pending_tasks_follow_priority_then_insertion_order():
+    queue = TaskQueue()
+    low, normal, high, normal2 = fill(queue, [PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH, PRIORITY_NORMAL])
+    assert display_order(queue) == [high, normal, normal2, low]
+    assert queue.next_pending().task_id == high
+    assert queue.next_pending(lambda task: task.priority != PRIORITY_HIGH).task_id == normal
+
+
+def test_unknown_priority_falls_back_to_normal():
+    queue = TaskQueue()
+    task_id = queue.add(make_task(priority=7))
+    assert queue.get(task_id).priority == PRIORITY_NORMAL
+
+
+def test_activated_tasks_come_first_in_start_order():
+    queue = TaskQueue()
+    first, second, third = fill(queue, [PRIORITY_NORMAL] * 3)
+    queue.activate(second)
+    queue.activate(first)
+    assert display_order(queue) == [second, first, third]
+    assert queue.active_count() == 2 and queue.pending_count() == 1
+    assert not queue.set_priority(first, PRIORITY_HIGH)
+    assert not queue.move_to_back(second)
+
+
+def test_priority_change_moves_task_to_end_of_new_group():
+    queue = TaskQueue()
+    high, normal, low, low2 = fill(queue, [PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW, PRIORITY_LOW])
+    assert queue.set_priority(low2, PRIORITY_HIGH)
+    assert display_order(queue) == [high, low2, normal, low]
+    assert queue.pending_row(low2) == 1
+    assert not queue.set_priority(low2, 9)
+
+
+def test_moves_within_group_and_pending_row():
+    queue = TaskQueue()
+    active, first, second, third = fill(queue, [PRIORITY_NORMAL] * 4)
+    queue.activate(active)
+    assert queue.move_to_front(third)
+    assert display_order(queue) == [active, third, first, second]
+    assert queue.pending_row(third) == 1
+    assert queue.move_to_back(third)
+    assert display_order(queue) == [active, first, second, third]
+    assert queue.pending_row(third) == 3
+
+
+def test_group_end_row_counts_active_and_higher_groups():
+    queue = TaskQueue()
+    active, _, _, _ = fill(queue, [PRIORITY_HIGH, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW])
+    queue.activate(active)
+    assert queue.group_end_row(PRIORITY_HIGH) == 2
+    assert queue.group_end_row(PRIORITY_NORMAL) == 3
+    assert queue.group_end_row(PRIORITY_LOW) == 4
+
+
+def test_remove_drops_task_from_every_section():
+    queue = TaskQueue()
+    active, pending = fill(queue, [PRIORITY_NORMAL] * 2)
+    queue.activate(active)
+    assert queue.remove(active).task_id == active
+    assert queue.remove(pending).task_id == pending
+    assert queue.remove(pending) is None
+    assert len(queue) == 0 and display_order(queue) == []
+
+
+def test_model_rows_stay_correct_after_random_edits():
+    rng = random.Random(4)
+    model = TaskListModel()
+    next_id = 1
+    for _ in range(2000):
+        operation = rng.random()
+        if operation < 0.4 or not model.tasks:
+            tasks = []
+            for _ in range(rng.randint(1, 3)):
+                tasks.append(SimpleNamespace(task_id=next_id))
+                next_id += 1
+            model.insert_tasks(rng.randint(0, len(model.tasks)), tasks)
+        elif operation < 0.7:
+            model.remove_row(rng.randrange(len(model.tasks)))
+        else:
+            model.move_row(rng.randrange(len(model.tasks)), rng.randrange(len(model.tasks)))
+        for _ in range(3):
+            if model.tasks:
+                row = rng.randrange(len(model.tasks))
+                assert model.row_of(model.tasks[row].task_id) == row
+    assert model.row_of(next_id) == -1
+    assert all(model.row_of(task.task_id) == row for row, task in enumerate(model.tasks))
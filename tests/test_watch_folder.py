@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+import watch_folder
+from watch_folder import WatchFolderService
+
+PRESET = {"selected_script": 3, "selected_ffmpeg_script": 1, "gpu_bitrate": 5, "debug_mode": False, "custom_output": False,
+          "output_dir": "", "subtitle_track_name": "", "keep_movie_name": False, "movie_name": ""}
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(watch_folder, "load_preset", lambda settings, name: PRESET)
+    monkeypatch.setattr(WatchFolderService, "STABLE_SECONDS", 0)
+    watch_service = WatchFolderService(settings=None)
+    watch_service.folders = {str(tmp_path): "anime"}
+    watch_service.ready = []
+    watch_service.tasks_ready.connect(lambda tasks, folder: watch_service.ready.extend(tasks))
+    return watch_service
+
+
+def scan_twice(service, folder):
+    # Pierwsze skanowanie zapamiętuje stan zestawu, drugie (stan bez zmian) dodaje zadanie
+    service._scan(str(folder))
+    service._scan(str(folder))
+
+
+def test_loose_fonts_complete_the_set(tmp_path, service):
+    (tmp_path / "ep01.mkv").write_bytes(b"mkv")
+    (tmp_path / "ep01.ass").write_text("[Script Info]\n")
+    scan_twice(service, tmp_path)
+    assert service.ready == []
+    (tmp_path / "Lato.ttf").write_bytes(b"font")
+    scan_twice(service, tmp_path)
+    assert [(task["mkv_file"].name, task["font_folder"]) for task in service.ready] == [("ep01.mkv", tmp_path)]
+
+
+def test_font_subfolder_completes_the_set(tmp_path, service):
+    (tmp_path / "ep01.mkv").write_bytes(b"mkv")
+    (tmp_path / "ep01.pl.ass").write_text("[Script Info]\n")
+    (tmp_path / "fonts").mkdir()
+    scan_twice(service, tmp_path)
+    assert service.ready == []
+    (tmp_path / "fonts" / "Lato.otf").write_bytes(b"font")
+    scan_twice(service, tmp_path)
+    assert [task["font_folder"] for task in service.ready] == [tmp_path / "fonts"]
+
+
+def test_done_entries_are_forgotten_when_files_go_away(tmp_path, service):
+    (tmp_path / "Lato.ttf").write_bytes(b"font")
+    for name in ("ep01", "ep02"):
+        (tmp_path / f"{name}.mkv").write_bytes(b"mkv")
+        (tmp_path / f"{name}.ass").write_text("[Script Info]\n")
+    scan_twice(service, tmp_path)
+    assert len(service.ready) == 2 and len(service._done) == 2
+
+    os.remove(tmp_path / "ep01.mkv")
+    (tmp_path / "ep02.mkv").write_bytes(b"nowa wersja")
+    service._scan(str(tmp_path))
+    assert service._done == {}
+    # Podmieniony plik jest nowym odcinkiem
+    service._scan(str(tmp_path))
+    assert [task["mkv_file"].name for task in service.ready[2:]] == ["ep02.mkv"]
+
+
+def test_removed_folder_forgets_done_entries(tmp_path, service):
+    (tmp_path / "ep01.mkv").write_bytes(b"mkv")
+    (tmp_path / "ep01.ass").write_text("[Script Info]\n")
+    (tmp_path / "Lato.ttf").write_bytes(b"font")
+    scan_twice(service, tmp_path)
+    assert service._done
+    service.stop()
+    assert service._done == {}